@@ -1,8 +1,11 @@
-from setuptools import setup, find_packages
+from setuptools import setup, find_namespace_packages
 
 setup(
     name='emotionlesstrade-server',
     version='0.1',
-    packages=find_packages(where='src'),
+    packages=find_namespace_packages(where='src'),
     package_dir={'': 'src'},
+    entry_points={
+        'console_scripts': ['emotionlesstrade=cli.main:main'],
+    },
 )
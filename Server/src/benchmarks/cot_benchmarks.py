@@ -0,0 +1,283 @@
+import argparse
+import asyncio
+from datetime import datetime, timezone
+import inspect
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Final
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
+from features.sentiment.cot.tools.cot_report_builder import COTReportBuilder
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.cot_snapshot_store import COTReleaseSnapshot
+from shared.connections.database.sqlite_repository import SQLiteRepository
+from shared.models.reported_assets import ReportedAssets
+from shared.utils.logger import Logger
+from shared.utils.util import Util
+
+
+class COTBenchmarks:
+    """
+    Benchmarks the conversion, COT Index and repository paths of COT reports on synthetic data, so no data files,
+    network or MySQL server are needed. Repository paths run against an in-memory SQLite database.
+
+    Each case is repeated and its min, median and mean times are reported in JSON, so runs of different commits can be
+    compared with compare.
+    """
+    _SCHEMA_VERSION: Final[int] = 1
+
+    def __init__(self, data: SyntheticCOTData, repeat: int = 5):
+        """
+        :param data: The synthetic data to benchmark on.
+        :type data: SyntheticCOTData
+        :param repeat: The number of timed runs of each case.
+        :type repeat: int
+        """
+        self._data = data
+        self._repeat = repeat
+        self._results: list[dict[str, Any]] = []
+
+    async def run(self) -> dict[str, Any]:
+        """
+        :return dict[str, Any]: The environment, parameters and timing of each case.
+        """
+        self._results = []
+        dataframe = self._data.to_dataframe()
+        records: list[dict[str, Any]] = self._data.to_records()
+        rows: list[tuple] = self._data.to_rows()
+        reports: list[COTReport] = self._data.to_reports()
+        reports_by_asset: dict[str, list[COTReport]] = {}
+        for report in reports:
+            reports_by_asset.setdefault(report.asset_code, []).append(report)
+        n_reports: int = self._data.n_reports
+        builder: COTReportBuilder = COTReportBuilder()
+        presenter: COTReportPresenter = COTReportPresenter()
+
+        await self._measure("presenter.from_dataframe", lambda: presenter.from_dataframe(dataframe), n_reports)
+        with tempfile.TemporaryDirectory() as directory:
+            state_file: str = os.path.join(directory, "cot_index_state.json")
+            await self._measure(
+                "presenter.from_dicts",
+                lambda state: presenter.from_dicts(records, state),
+                n_reports,
+                setup=lambda: COTIndexState(state_file=state_file)
+            )
+        await self._measure("presenter.from_list", lambda: presenter.from_list(rows), n_reports)
+        await self._measure(
+            "builder.update_cot_index_group",
+            lambda: [builder.update_cot_index_group(group) for group in reports_by_asset.values()],
+            n_reports
+        )
+        await self._measure(
+            "report.to_dict",
+            lambda: [report.to_dict(verbose=True, enhanced=True) for report in reports],
+            n_reports
+        )
+        await self._measure(
+            "report.describe",
+            lambda: [report.describe(verbose=True, enhanced=True) for report in reports],
+            n_reports
+        )
+        latest_reports: list[COTReport] = [
+            max(group, key=lambda report: report.reported_date) for group in reports_by_asset.values()
+        ]
+        await self._measure(
+            "snapshot.from_reports",
+            lambda: COTReleaseSnapshot.from_reports(latest_reports[0].reported_date, latest_reports),
+            len(latest_reports)
+        )
+        snapshot: COTReleaseSnapshot = COTReleaseSnapshot.from_reports(latest_reports[0].reported_date, latest_reports)
+        await self._measure(
+            "snapshot.to_json_array",
+            lambda: snapshot.to_json_array(snapshot.asset_codes),
+            len(latest_reports)
+        )
+        await self._benchmark_repository(reports)
+        return {
+            "schema_version": self._SCHEMA_VERSION,
+            "commit": self._get_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {
+                "n_assets": len(self._data.assets),
+                "n_weeks": self._data.n_weeks,
+                "n_reports": n_reports,
+                "repeat": self._repeat
+            },
+            "results": self._results
+        }
+
+    async def _benchmark_repository(self, reports: list[COTReport]) -> None:
+        asset_codes: list[str] = [asset.code for asset in self._data.assets]
+        released_dates: list[str] = self._data.dates[-52:]
+        n_fetched: int = len(asset_codes) * len(released_dates)
+
+        async def empty_repository() -> SQLiteRepository:
+            repository: SQLiteRepository = SQLiteRepository(":memory:")
+            await repository.build_assets_table(ReportedAssets.all)
+            await repository.build_cot_report_table([])
+            return repository
+
+        async def filled_repository() -> SQLiteRepository:
+            repository: SQLiteRepository = await empty_repository()
+            await repository.insert_cot_reports(reports)
+            return repository
+
+        await self._measure(
+            "repository.insert_cot_reports",
+            lambda repository: repository.insert_cot_reports(reports),
+            len(reports),
+            setup=empty_repository,
+            teardown=lambda repository: repository.disconnect()
+        )
+        repository: SQLiteRepository = await filled_repository()
+        try:
+            await self._measure(
+                "repository.fetch_cot_reports_between",
+                lambda: repository.fetch_cot_reports_between(asset_codes, self._data.dates[0], self._data.dates[-1]),
+                len(reports)
+            )
+            await self._measure(
+                "repository.fetch_cot_reports_by",
+                lambda: repository.fetch_cot_reports_by(asset_codes, released_dates),
+                n_fetched
+            )
+        finally:
+            await repository.disconnect()
+
+    async def _measure(
+            self,
+            name: str,
+            run: Callable[..., Any],
+            n_items: int,
+            setup: Callable[[], Any] | None = None,
+            teardown: Callable[[Any], Any] | None = None
+        ) -> dict[str, Any]:
+        """
+        Times a case, after one untimed warm-up run.
+
+        :param name: The name of the case.
+        :type name: str
+        :param run: The timed function, sync or async. It is given the result of the setup if there is one.
+        :type run: Callable[..., Any]
+        :param n_items: The number of reports the case processes in a run.
+        :type n_items: int
+        :param setup: Prepares the input of each run outside of the timing, sync or async.
+        :type setup: Callable[[], Any]
+        :param teardown: Releases the input of each run outside of the timing, sync or async.
+        :type teardown: Callable[[Any], Any]
+        :return dict[str, Any]: The timing of the case.
+        """
+        times: list[float] = []
+        for i in range(self._repeat + 1):
+            arguments: tuple = (await self._call(setup),) if setup else ()
+            start: float = time.perf_counter()
+            await self._call(run, *arguments)
+            elapsed: float = time.perf_counter() - start
+            if teardown:
+                await self._call(teardown, *arguments)
+            if i > 0:
+                times.append(elapsed)
+        median: float = statistics.median(times)
+        result: dict[str, Any] = {
+            "name": name,
+            "n_items": n_items,
+            "min_seconds": round(min(times), 9),
+            "median_seconds": round(median, 9),
+            "mean_seconds": round(statistics.fmean(times), 9),
+            "items_per_second": round(n_items / median, 1) if median else None
+        }
+        self._results.append(result)
+        return result
+
+    @staticmethod
+    async def _call(function: Callable[..., Any], *args: Any) -> Any:
+        result: Any = function(*args)
+        return await result if inspect.isawaitable(result) else result
+
+    @staticmethod
+    def _get_commit() -> str | None:
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd=Util.get_root_dir(), capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    @staticmethod
+    def compare(current: dict[str, Any], baseline: dict[str, Any], tolerance: float = 0.1) -> list[dict[str, Any]]:
+        """
+        :param current: The results of this run.
+        :type current: dict[str, Any]
+        :param baseline: The results of a previous run, with the same parameters.
+        :type baseline: dict[str, Any]
+        :param tolerance: The fraction a median time may grow by before the case counts as a regression.
+        :type tolerance: float
+        :return list[dict[str, Any]]: The median time ratio of each case in both runs, regressed cases are flagged.
+        """
+        baseline_results: dict[str, dict[str, Any]] = {result["name"]: result for result in baseline["results"]}
+        comparisons: list[dict[str, Any]] = []
+        for result in current["results"]:
+            previous: dict[str, Any] | None = baseline_results.get(result["name"])
+            if previous is None or not previous["median_seconds"]:
+                continue
+            ratio: float = result["median_seconds"] / previous["median_seconds"]
+            comparisons.append({
+                "name": result["name"],
+                "baseline_median_seconds": previous["median_seconds"],
+                "median_seconds": result["median_seconds"],
+                "ratio": round(ratio, 3),
+                "regressed": ratio > 1 + tolerance
+            })
+        return comparisons
+
+
+def main(argv: list[str] | None = None):
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmarks COT report paths.")
+    parser.add_argument("--assets", type=int, default=len(ReportedAssets.all), help="Number of assets.")
+    parser.add_argument("--weeks", type=int, default=520, help="Number of weeks of reports of each asset.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of timed runs of each case.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data.")
+    parser.add_argument("--output", help="File to write the results to, printed if not given.")
+    parser.add_argument("--write-fixtures", metavar="DIRECTORY", help="Also write the data as CSV and JSON files.")
+    parser.add_argument("--baseline", help="Results of a previous run to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown against the baseline.")
+    arguments: argparse.Namespace = parser.parse_args(argv)
+
+    # The builder logs each report short of history, which would be timed along with it.
+    Logger.configure(level=Logger.CRITICAL)
+    data: SyntheticCOTData = SyntheticCOTData(arguments.assets, arguments.weeks, arguments.seed)
+    if arguments.write_fixtures:
+        for file in data.write_fixtures(arguments.write_fixtures):
+            print(f"Wrote {file}", file=sys.stderr)
+    results: dict[str, Any] = asyncio.run(COTBenchmarks(data, arguments.repeat).run())
+    output: str = json.dumps(results, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline: dict[str, Any] = json.load(file)
+        if baseline.get("parameters") != results["parameters"]:
+            print("The baseline was run with different parameters, times may not be comparable.", file=sys.stderr)
+        comparisons: list[dict[str, Any]] = COTBenchmarks.compare(results, baseline, arguments.tolerance)
+        for comparison in comparisons:
+            flag: str = " REGRESSED" if comparison["regressed"] else ""
+            print(f"{comparison["name"]}: {comparison["ratio"]:.3f}x{flag}", file=sys.stderr)
+        if any(comparison["regressed"] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
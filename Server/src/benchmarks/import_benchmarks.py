@@ -0,0 +1,121 @@
+import argparse
+from datetime import datetime, timezone
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from typing import Any, Final
+from benchmarks.cot_benchmarks import COTBenchmarks
+from shared.utils.util import Util
+
+
+class ImportBenchmarks:
+    """
+    Benchmarks the startup of the CLI entry points: the time to import each module in a fresh interpreter, and which
+    heavy dependencies the import pulls in.
+
+    Results have the same shape as the COT benchmarks, so runs of different commits can be compared with
+    COTBenchmarks.compare.
+    """
+    MODULES: Final[list[str]] = [
+        "cli.main",
+        "features.sentiment.cot.core.models.cot_report",
+        "features.sentiment.cot.core.events.view_default_latest_cot_report_event",
+        "features.sentiment.cot.core.events.view_enhanced_latest_cot_report_event",
+        "features.sentiment.cot.core.events.view_pair_readings_event",
+        "features.sentiment.cot.tools.cot_report_builder",
+        "shared.connections.database.mysql_repository"
+    ]
+    HEAVY_MODULES: Final[list[str]] = ["pandas", "aiohttp", "aiomysql", "pymysql", "numpy"]
+    _SCHEMA_VERSION: Final[int] = 1
+    _MEASURE: Final[str] = """
+import importlib, json, sys, time
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - start
+print(json.dumps({"seconds": seconds, "loaded": [name for name in sys.argv[2:] if name in sys.modules]}))
+"""
+
+    def __init__(self, modules: list[str] = MODULES, repeat: int = 5):
+        """
+        :param modules: The modules to import.
+        :type modules: list[str]
+        :param repeat: The number of fresh interpreters each module is imported in.
+        :type repeat: int
+        """
+        self._modules = modules
+        self._repeat = repeat
+
+    def run(self) -> dict[str, Any]:
+        """
+        :return dict[str, Any]: The environment, parameters and import time of each module.
+        """
+        results: list[dict[str, Any]] = []
+        for module in self._modules:
+            times: list[float] = []
+            loaded: list[str] = []
+            for _ in range(self._repeat):
+                measurement: dict[str, Any] = self._import(module)
+                times.append(measurement["seconds"])
+                loaded = measurement["loaded"]
+            results.append({
+                "name": f"import {module}",
+                "n_items": 1,
+                "min_seconds": round(min(times), 6),
+                "median_seconds": round(statistics.median(times), 6),
+                "mean_seconds": round(statistics.fmean(times), 6),
+                "heavy_modules": loaded
+            })
+        return {
+            "schema_version": self._SCHEMA_VERSION,
+            "commit": COTBenchmarks._get_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "parameters": {"repeat": self._repeat},
+            "results": results
+        }
+
+    def _import(self, module: str) -> dict[str, Any]:
+        environment: dict[str, str] = dict(os.environ, PYTHONPATH=os.path.join(Util.get_root_dir(), "src"))
+        completed: subprocess.CompletedProcess = subprocess.run(
+            [sys.executable, "-c", self._MEASURE, module, *self.HEAVY_MODULES],
+            env=environment,
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None):
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Benchmarks the import time of entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of fresh interpreters each module is imported in.")
+    parser.add_argument("--output", help="File to write the results to, printed if not given.")
+    parser.add_argument("--baseline", help="Results of a previous run to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown against the baseline.")
+    arguments: argparse.Namespace = parser.parse_args(argv)
+
+    results: dict[str, Any] = ImportBenchmarks(repeat=arguments.repeat).run()
+    output: str = json.dumps(results, indent=4)
+    if arguments.output:
+        with open(arguments.output, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if arguments.baseline:
+        with open(arguments.baseline) as file:
+            baseline: dict[str, Any] = json.load(file)
+        comparisons: list[dict[str, Any]] = COTBenchmarks.compare(results, baseline, arguments.tolerance)
+        for comparison in comparisons:
+            flag: str = " REGRESSED" if comparison["regressed"] else ""
+            print(f"{comparison["name"]}: {comparison["ratio"]:.3f}x{flag}", file=sys.stderr)
+        if any(comparison["regressed"] for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
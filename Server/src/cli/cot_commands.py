@@ -0,0 +1,248 @@
+import argparse
+import asyncio
+import glob
+import json
+import signal
+from typing import TextIO
+from features.sentiment.cot.connections.api.client.socrata_client import SocrataClient
+from features.sentiment.cot.connections.api.service.socrata_service import SocrataService
+from features.sentiment.cot.core.events.view_default_latest_cot_report_event import ViewDefaultLatestCOTReportsEvent
+from features.sentiment.cot.core.events.view_enhanced_latest_cot_report_event import ViewEnhancedLatestCOTReportsEvent
+from features.sentiment.cot.core.events.view_pair_readings_event import ViewPairReadingsEvent
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_backfill_pipeline import COTBackfillPipeline, StageStatistics
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
+from features.sentiment.cot.tools.cot_release_broadcaster import COTReleaseBroadcaster
+from features.sentiment.cot.tools.cot_report_write_behind_queue import COTReportWriteBehindQueue
+from features.sentiment.cot.tools.cot_snapshot_store import COTSnapshotStore
+from features.sentiment.cot.tools.pair_reading_matrix import PairReadingCache
+from features.sentiment.cot.tools.percentile_rank_index import PercentileRankIndex
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from shared.connections.database.mysql_pool_manager import MySQLPoolManager
+from shared.connections.database.mysql_repository import MySQLRepository
+from shared.connections.database.sqlite_repository import SQLiteRepository
+from shared.models.asset import Asset
+from shared.models.pair import Pair
+from shared.models.reported_assets import ReportedAssets
+from shared.models.reported_pairs import ReportedPairs
+from shared.utils.util import Util
+
+
+class COTCommands:
+    """
+    Runs the commands of the CLI against one set of connections and caches: the repository and its read-through
+    cache, the HTTP session of the Socrata client, the COT Index state, the percentile ranks, the pair reading matrix and the snapshot of the latest
+    release.
+
+    A single command creates what it needs on first use and closes it when done. The daemon calls warm_up once and
+    keeps everything open between commands, so a command only costs its own work.
+    """
+
+    def __init__(self, repository: str = "mysql"):
+        """
+        :param repository: The repository of the reports, mysql or sqlite.
+        :type repository: str
+        """
+        if repository not in ("mysql", "sqlite"):
+            raise ValueError(f"Unknown repository {repository}, expected mysql or sqlite.")
+        self.repository = repository
+        self._cot_repository: CachingCOTRepository | None = None
+        self._client: SocrataClient | None = None
+        self._cot_report_writer: COTReportWriteBehindQueue | None = None
+        self._cot_service: SocrataService | None = None
+        self._pair_reading_cache: PairReadingCache | None = None
+        self._snapshot_store: COTSnapshotStore | None = None
+        self._cot_index_state: COTIndexState = COTIndexState()
+        self._percentile_rank_index: PercentileRankIndex = PercentileRankIndex()
+        self._broadcaster: COTReleaseBroadcaster = COTReleaseBroadcaster()
+
+    async def warm_up(self) -> None:
+        """
+        Opens the database connections and the HTTP session ahead of the first command.
+        """
+        if self.repository == "mysql":
+            await MySQLPoolManager.get_instance().warm_up()
+        await self._get_client().open()
+        self._get_pair_reading_cache()
+        self._get_snapshot_store()
+
+    async def close(self) -> None:
+        """
+        Writes the reports still queued and closes the HTTP session and the database connections.
+        """
+        if self._cot_report_writer is not None:
+            await self._cot_report_writer.close()
+        if self._client is not None:
+            await self._client.close()
+        if self._cot_repository is not None:
+            await self._cot_repository.disconnect()
+
+    async def run(self, arguments: argparse.Namespace, output: TextIO) -> int:
+        """
+        :param arguments: The parsed command line, see cli.cot_parser.build_parser.
+        :type arguments: argparse.Namespace
+        :param output: The stream the result of the command is written to.
+        :type output: TextIO
+        :return int: The exit code of the command.
+        """
+        try:
+            if arguments.command == "backfill":
+                await self._backfill(arguments.files, arguments.socrata_where, output)
+            elif arguments.command == "fetch-latest":
+                await self._fetch_latest(arguments.assets, output)
+            elif arguments.command == "reconcile":
+                await self._reconcile(arguments.weeks, output)
+            elif arguments.command == "view":
+                await self._view(arguments.version, arguments.assets, output)
+            elif arguments.command == "serve-api":
+                await self._serve_api(arguments.host, arguments.port, output)
+            else:
+                raise ValueError(f"The command {arguments.command} can't be run against the repository.")
+        except (ValueError, LookupError) as error:
+            print(f"Error: {error}", file=output)
+            return 1
+        return 0
+
+    async def _backfill(self, files: list[str] | None, socrata_where: str | None, output: TextIO) -> None:
+        cot_repository: CachingCOTRepository = self._get_cot_repository()
+        await self._get_asset_repository().build_assets_table(ReportedAssets.all)
+        await cot_repository.build_cot_report_table([])
+        pipeline: COTBackfillPipeline = COTBackfillPipeline(
+            cot_repository=cot_repository,
+            cot_index_state=self._cot_index_state,
+            percentile_rank_index=self._percentile_rank_index
+        )
+        statistics: dict[str, StageStatistics]
+        if socrata_where is not None:
+            statistics = await pipeline.run_from_socrata(self._get_client(), socrata_where)
+        else:
+            files = files or sorted(glob.glob(f"{Util.get_root_dir()}/data/cot/historical_reports/*.txt"))
+            if not files:
+                raise ValueError("No COT report files were given or found in data/cot/historical_reports.")
+            statistics = await pipeline.run_from_files(files)
+        if self._pair_reading_cache is not None:
+            self._pair_reading_cache.invalidate()
+        print(json.dumps({name: stage.to_dict() for name, stage in statistics.items()}, indent=2), file=output)
+        print(f"Finished backfilling in: {pipeline.elapsed}", file=output)
+
+    async def _fetch_latest(self, asset_codes: list[str] | None, output: TextIO) -> None:
+        cot_reports: list[COTReport] = await self._get_cot_service().fetch_latest_report(self._to_assets(asset_codes))
+        print(json.dumps([report.to_dict(verbose=True, enhanced=True) for report in cot_reports], indent=2), file=output)
+
+    async def _reconcile(self, n_weeks: int, output: TextIO) -> None:
+        cot_reports: list[COTReport] = await self._get_cot_service().reconcile_restatements(
+            ReportedAssets.all, n_weeks
+        )
+        print(f"Rewrote {len(cot_reports)} reports", file=output)
+
+    async def _view(self, version: str, codes: list[str] | None, output: TextIO) -> None:
+        if version == "pairs":
+            event: ViewPairReadingsEvent = ViewPairReadingsEvent(pair_reading_cache=self._get_pair_reading_cache())
+            await event.execute(self._to_pairs(codes), output)
+        elif version == "enhanced":
+            await ViewEnhancedLatestCOTReportsEvent(
+                cot_service=self._get_cot_service(), snapshot_store=self._get_snapshot_store()
+            ).execute(self._to_assets(codes), output)
+        else:
+            await ViewDefaultLatestCOTReportsEvent(
+                cot_service=self._get_cot_service(), snapshot_store=self._get_snapshot_store()
+            ).execute(self._to_assets(codes), output)
+
+    async def _serve_api(self, host: str | None, port: int | None, output: TextIO) -> None:
+        """
+        Serves the API until the process is interrupted or terminated.
+        """
+        from features.sentiment.cot.connections.api.server.cot_api_server import COTAPIServer
+        server: COTAPIServer = COTAPIServer(
+            cot_service=self._get_cot_service(),
+            cot_repository=self._get_cot_repository(),
+            broadcaster=self._broadcaster,
+            snapshot_store=self._get_snapshot_store()
+        )
+        self._get_cot_service().add_restatement_listener(server.on_restatement)
+        stopped: asyncio.Event = asyncio.Event()
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, stopped.set)
+        url: str = await server.start(host, port)
+        print(f"Serving COT reports at {url}", file=output, flush=True)
+        try:
+            await stopped.wait()
+        finally:
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signal_number)
+            await server.stop()
+
+    def _get_cot_repository(self) -> CachingCOTRepository:
+        if self._cot_repository is None:
+            self._cot_repository = CachingCOTRepository(
+                MySQLRepository() if self.repository == "mysql" else SQLiteRepository()
+            )
+        return self._cot_repository
+
+    def _get_asset_repository(self) -> MySQLRepository | SQLiteRepository:
+        return self._get_cot_repository().cot_repository
+
+    def _get_client(self) -> SocrataClient:
+        if self._client is None:
+            self._client = SocrataClient()
+        return self._client
+
+    def _get_cot_service(self) -> SocrataService:
+        if self._cot_service is None:
+            self._cot_report_writer = COTReportWriteBehindQueue(cot_repository=self._get_cot_repository())
+            self._cot_service = SocrataService(
+                cot_repository=self._get_cot_repository(),
+                cot_report_writer=self._cot_report_writer,
+                client=self._get_client(),
+                cot_index_state=self._cot_index_state,
+                percentile_rank_index=self._percentile_rank_index,
+                broadcaster=self._broadcaster
+            )
+            self._cot_service.add_restatement_listener(self._on_restatement)
+        return self._cot_service
+
+    def _on_restatement(self, cot_reports: list[COTReport]) -> None:
+        """
+        Drops the pair reading matrix and the snapshots built from the reports before the CFTC restated them.
+        """
+        if not cot_reports:
+            return
+        if self._pair_reading_cache is not None:
+            self._pair_reading_cache.invalidate()
+        if self._snapshot_store is not None:
+            self._snapshot_store.invalidate([report.reported_date for report in cot_reports])
+
+    def _get_pair_reading_cache(self) -> PairReadingCache:
+        if self._pair_reading_cache is None:
+            self._pair_reading_cache = PairReadingCache(cot_service=self._get_cot_service())
+        return self._pair_reading_cache
+
+    def _get_snapshot_store(self) -> COTSnapshotStore:
+        if self._snapshot_store is None:
+            self._snapshot_store = COTSnapshotStore(cot_service=self._get_cot_service())
+        return self._snapshot_store
+
+    @staticmethod
+    def _to_assets(codes: list[str] | None) -> list[Asset]:
+        """
+        :raises ValueError: If a code is not the code of a reported asset.
+        """
+        if not codes:
+            return ReportedAssets.all
+        unknown: list[str] = [code for code in codes if code.upper() not in ReportedAssets.by_code]
+        if unknown:
+            raise ValueError(f"Unknown asset codes: {', '.join(unknown)}.")
+        return [ReportedAssets.by_code[code.upper()] for code in codes]
+
+    @staticmethod
+    def _to_pairs(codes: list[str] | None) -> list[Pair]:
+        """
+        :raises ValueError: If a code is not the code of a reported pair.
+        """
+        if not codes:
+            return ReportedPairs.all
+        unknown: list[str] = [code for code in codes if code.upper() not in ReportedPairs.by_code]
+        if unknown:
+            raise ValueError(f"Unknown pair codes: {', '.join(unknown)}.")
+        return [ReportedPairs.by_code[code.upper()] for code in codes]
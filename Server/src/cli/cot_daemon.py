@@ -0,0 +1,129 @@
+import argparse
+import asyncio
+import io
+import json
+import os
+import signal
+import time
+from typing import Any, Final
+from cli.cot_commands import COTCommands
+from cli.cot_daemon_client import COTDaemonClient
+from cli.cot_parser import build_parser
+from shared.utils.logger import Logger
+
+
+class COTDaemon:
+    """
+    Serves the commands of the CLI over a local unix socket, so the database pool, the HTTP session and the in-memory
+    history of COTCommands stay warm between invocations.
+
+    The protocol is one JSON line per connection each way: the client sends {"argv": [...]} and receives
+    {"exit_code": int, "output": str}. Commands run one at a time, in the order they arrive. The socket is only
+    accessible to the user running the daemon, in a directory only that user can write to.
+    """
+    _SOCKET_PERMISSIONS: Final[int] = 0o600
+
+    def __init__(self, commands: COTCommands, socket_path: str | None = None):
+        """
+        :param commands: The commands served, warmed up when the daemon starts and closed when it stops.
+        :type commands: COTCommands
+        :param socket_path: The socket the daemon listens on, see COTDaemonClient.get_default_socket_path.
+        :type socket_path: str
+        """
+        self._commands = commands
+        self._socket_path: str = socket_path or COTDaemonClient.get_default_socket_path()
+        self._parser: argparse.ArgumentParser = build_parser()
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._stopped: asyncio.Event = asyncio.Event()
+        self._started: float = time.monotonic()
+        self._n_commands: int = 0
+
+    async def serve(self) -> None:
+        """
+        Serves commands until daemon stop is received or the process is interrupted or terminated.
+
+        :raises RuntimeError: If another daemon is already listening on the socket.
+        :raises PermissionError: If other users could replace the socket, see COTDaemonClient.prepare_socket_dir.
+        """
+        COTDaemonClient.prepare_socket_dir(self._socket_path)
+        if os.path.exists(self._socket_path):
+            if COTDaemonClient(self._socket_path).is_running():
+                raise RuntimeError(f"A daemon is already listening on {self._socket_path}.")
+            os.remove(self._socket_path)
+        await self._commands.warm_up()
+        server: asyncio.Server = await asyncio.start_unix_server(self._handle, path=self._socket_path)
+        os.chmod(self._socket_path, self._SOCKET_PERMISSIONS)
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signal_number, self._stopped.set)
+        Logger.log(
+            name=self.__class__.__name__,
+            level=Logger.INFO,
+            message=f"Serving commands on {self._socket_path} with the {self._commands.repository} repository."
+        )
+        try:
+            async with server:
+                await self._stopped.wait()
+        finally:
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signal_number)
+            if os.path.exists(self._socket_path):
+                os.remove(self._socket_path)
+            await self._commands.close()
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Stopped after serving {self._n_commands} commands."
+            )
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request: dict[str, Any] = json.loads(await reader.readline())
+            exit_code, output = await self._run(request["argv"])
+            writer.write(json.dumps({"exit_code": exit_code, "output": output}).encode() + b"\n")
+            await writer.drain()
+        except (ValueError, KeyError, ConnectionError) as error:
+            Logger.log(name=self.__class__.__name__, level=Logger.WARNING, message=f"Dropped a request: {error}")
+        finally:
+            writer.close()
+
+    async def _run(self, argv: list[str]) -> tuple[int, str]:
+        """
+        :return tuple[int, str]: The exit code and the output of the command.
+        """
+        try:
+            arguments: argparse.Namespace = self._parser.parse_args(argv)
+        except SystemExit as error:
+            return (error.code if isinstance(error.code, int) else 2), f"Invalid command: {' '.join(argv)}\n"
+        if arguments.command in ("bench", "serve-api"):
+            return 2, f"The {arguments.command} command runs in the process of the CLI, not in the daemon.\n"
+        if arguments.command == "daemon":
+            if arguments.action == "stop":
+                self._stopped.set()
+                return 0, "Stopping the daemon.\n"
+            if arguments.action == "status":
+                return 0, json.dumps(self._status(), indent=2) + "\n"
+            return 1, f"A daemon is already listening on {self._socket_path}.\n"
+        output: io.StringIO = io.StringIO()
+        async with self._lock:
+            self._n_commands += 1
+            try:
+                exit_code: int = await self._commands.run(arguments, output)
+            except Exception as error:
+                Logger.log(
+                    name=self.__class__.__name__,
+                    level=Logger.ERROR,
+                    message=f"The command {' '.join(argv)} failed: Error Type: {type(error)}: {error}"
+                )
+                print(f"Error: {error}", file=output)
+                exit_code = 1
+        return exit_code, output.getvalue()
+
+    def _status(self) -> dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "socket": self._socket_path,
+            "repository": self._commands.repository,
+            "uptime_seconds": round(time.monotonic() - self._started, 1),
+            "commands_served": self._n_commands
+        }
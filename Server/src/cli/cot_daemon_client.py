@@ -0,0 +1,111 @@
+import json
+import os
+import socket
+import stat
+import tempfile
+from typing import Any, Final
+from shared.utils.settings import Settings
+
+
+class COTDaemonClient:
+    """
+    Forwards commands of the CLI to the daemon over its unix socket.
+
+    It uses a blocking socket and imports nothing heavy, so a forwarded command costs the start of the interpreter and
+    one round trip to the daemon.
+
+    Commands are only sent to a socket owned by the user, in a directory only the user can write to, so another local
+    user can't receive them or answer in place of the daemon.
+    """
+    _DEFAULT_TIMEOUT: Final[float] = 600.0
+    _BUFFER_SIZE: Final[int] = 65_536
+
+    def __init__(self, socket_path: str | None = None, timeout: float = _DEFAULT_TIMEOUT):
+        """
+        :param socket_path: The socket of the daemon, see get_default_socket_path.
+        :type socket_path: str
+        :param timeout: The number of seconds a command may take before it is abandoned.
+        :type timeout: float
+        """
+        self.socket_path: str = socket_path or self.get_default_socket_path()
+        self._timeout = timeout
+
+    @staticmethod
+    def get_default_socket_path() -> str:
+        """
+        :return str: The COT_DAEMON_SOCKET environment variable, or a socket in the runtime directory of the user
+        ($XDG_RUNTIME_DIR), or in a private directory of the user in the temporary directory.
+        """
+        configured: str | None = Settings.get_instance().cot_daemon_socket
+        if configured:
+            return configured
+        runtime_dir: str | None = os.getenv("XDG_RUNTIME_DIR")
+        if runtime_dir and os.path.isdir(runtime_dir):
+            return os.path.join(runtime_dir, "emotionlesstrade.sock")
+        return os.path.join(tempfile.gettempdir(), f"emotionlesstrade-{os.getuid()}", "daemon.sock")
+
+    @staticmethod
+    def prepare_socket_dir(socket_path: str) -> None:
+        """
+        Creates the directory of the socket, only accessible to the user, if it is missing.
+
+        :param socket_path: The socket of the daemon.
+        :type socket_path: str
+        :raises PermissionError: If the directory is not owned by the user or other users can write to it.
+        """
+        directory: str = os.path.dirname(os.path.abspath(socket_path))
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        status: os.stat_result = os.lstat(directory)
+        if not stat.S_ISDIR(status.st_mode) or status.st_uid != os.getuid() or status.st_mode & 0o022:
+            raise PermissionError(
+                f"The directory {directory} of the daemon socket must be owned by the user and not writable by others."
+            )
+
+    def is_running(self) -> bool:
+        """
+        :return bool: Whether a daemon answers on the socket.
+        """
+        try:
+            self.send(["daemon", "status"])
+        except ConnectionError:
+            return False
+        return True
+
+    def send(self, argv: list[str]) -> tuple[int, str]:
+        """
+        :param argv: The command line of the command, as given to the CLI.
+        :type argv: list[str]
+        :return tuple[int, str]: The exit code and the output of the command.
+        :raises ConnectionRefusedError: If no daemon is listening on the socket, the command was not sent.
+        :raises ConnectionError: If the daemon failed after the command was sent, the command may have run.
+        """
+        try:
+            owner: int = os.stat(self.socket_path).st_uid
+        except FileNotFoundError as error:
+            raise ConnectionRefusedError(f"No daemon is listening on {self.socket_path}.") from error
+        if owner != os.getuid():
+            raise ConnectionError(f"The socket {self.socket_path} is owned by another user, the command was not sent.")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self._timeout)
+            try:
+                connection.connect(self.socket_path)
+            except (FileNotFoundError, ConnectionRefusedError) as error:
+                raise ConnectionRefusedError(f"No daemon is listening on {self.socket_path}.") from error
+            try:
+                connection.sendall(json.dumps({"argv": argv}).encode() + b"\n")
+                chunks: list[bytes] = []
+                while chunk := connection.recv(self._BUFFER_SIZE):
+                    chunks.append(chunk)
+            except TimeoutError as error:
+                raise ConnectionError(
+                    f"The daemon on {self.socket_path} did not answer within {self._timeout:g} seconds."
+                ) from error
+            except OSError as error:
+                raise ConnectionError(f"The connection to the daemon on {self.socket_path} failed: {error}") from error
+        if not chunks:
+            raise ConnectionError(f"The daemon on {self.socket_path} closed the connection without answering.")
+        try:
+            response: dict[str, Any] = json.loads(b"".join(chunks))
+            return response["exit_code"], response["output"]
+        except (ValueError, KeyError, TypeError) as error:
+            raise ConnectionError(f"The daemon on {self.socket_path} sent an invalid answer: {error}") from error
@@ -0,0 +1,72 @@
+import argparse
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    The parser of the command line of the CLI. It imports nothing heavy, so commands can be validated before they are
+    forwarded to the daemon.
+
+    :return argparse.ArgumentParser: The parser of the global options and of each command.
+    """
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        prog="emotionlesstrade",
+        description="Backfills, fetches and views COT reports. Commands are served by the daemon if one is running."
+    )
+    parser.add_argument("--no-daemon", action="store_true", help="Run the command in this process.")
+    parser.add_argument(
+        "--socket",
+        help="The socket of the daemon, defaults to the COT_DAEMON_SOCKET variable or a private socket of the user."
+    )
+    parser.add_argument(
+        "--repository",
+        choices=("mysql", "sqlite"),
+        default="mysql",
+        help="The repository of the reports, used when the command runs in this process or starts the daemon."
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile the command, used when the command runs in this process or starts the daemon."
+    )
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+
+    backfill: argparse.ArgumentParser = commands.add_parser(
+        "backfill", help="Rebuild the report history from CFTC files or the Socrata API."
+    )
+    source = backfill.add_mutually_exclusive_group()
+    source.add_argument(
+        "--files", nargs="+", metavar="FILE", help="CFTC txt or csv files, defaults to data/cot/historical_reports."
+    )
+    source.add_argument("--socrata-where", metavar="WHERE", help="The $where clause of the reports on the Socrata API.")
+
+    fetch_latest: argparse.ArgumentParser = commands.add_parser(
+        "fetch-latest", help="Print the latest reports as JSON."
+    )
+    fetch_latest.add_argument("--assets", nargs="+", metavar="CODE", help="Asset codes, defaults to every asset.")
+
+    reconcile: argparse.ArgumentParser = commands.add_parser(
+        "reconcile", help="Rewrite the reports of the last weeks the CFTC restated since they were stored."
+    )
+    reconcile.add_argument("--weeks", type=int, default=8, help="The number of past weekly reports to check.")
+
+    view: argparse.ArgumentParser = commands.add_parser("view", help="Print the latest reports or pair readings.")
+    view.add_argument("version", choices=("default", "enhanced", "pairs"))
+    view.add_argument(
+        "--assets", nargs="+", metavar="CODE", help="Asset codes, or pair codes such as EUR/USD, defaults to all."
+    )
+
+    serve_api: argparse.ArgumentParser = commands.add_parser(
+        "serve-api", help="Serve the reports over HTTP in this process, see COTAPIServer."
+    )
+    serve_api.add_argument("--host", help="The host to listen on, defaults to the COT_API_HOST variable.")
+    serve_api.add_argument("--port", type=int, help="The port to listen on, defaults to the COT_API_PORT variable.")
+
+    bench: argparse.ArgumentParser = commands.add_parser("bench", help="Run a benchmark suite in this process.")
+    bench.add_argument("suite", choices=("cot", "imports"))
+    bench.add_argument("arguments", nargs=argparse.REMAINDER, help="The options of the suite, e.g. --assets 5.")
+
+    daemon: argparse.ArgumentParser = commands.add_parser(
+        "daemon", help="Start, stop or query the daemon keeping connections and caches warm."
+    )
+    daemon.add_argument("action", choices=("start", "stop", "status"))
+    return parser
@@ -0,0 +1,83 @@
+import argparse
+import sys
+from cli.cot_daemon_client import COTDaemonClient
+from cli.cot_parser import build_parser
+
+
+def _run_benchmark(suite: str, suite_argv: list[str]) -> int:
+    if suite == "imports":
+        from benchmarks import import_benchmarks
+        import_benchmarks.main(suite_argv)
+    else:
+        from benchmarks import cot_benchmarks
+        cot_benchmarks.main(suite_argv)
+    return 0
+
+
+def _run_locally(arguments: argparse.Namespace) -> int:
+    """
+    Runs the command in this process, or the daemon in the foreground for daemon start.
+    """
+    import asyncio
+    from cli.cot_commands import COTCommands
+    from shared.utils.profiler import Profiler
+    Profiler.configure(enabled=True if arguments.profile else None)
+    commands: COTCommands = COTCommands(repository=arguments.repository)
+
+    async def run() -> int:
+        try:
+            return await commands.run(arguments, sys.stdout)
+        finally:
+            await commands.close()
+
+    async def serve() -> int:
+        from cli.cot_daemon import COTDaemon
+        await COTDaemon(commands, arguments.socket).serve()
+        return 0
+
+    try:
+        return asyncio.run(serve() if arguments.command == "daemon" else run())
+    except KeyboardInterrupt:
+        return 130
+
+
+def main(argv: list[str] | None = None) -> int:
+    """
+    The entry point of the CLI. Commands are forwarded to the daemon if one is listening, otherwise they run in this
+    process, benchmarks and the API server always run in this process. A command the daemon accepted is never run
+    again in this process, even if the daemon failed while running it.
+
+    :param argv: The command line arguments, defaults to sys.argv.
+    :type argv: list[str]
+    :return int: The exit code.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    arguments: argparse.Namespace = build_parser().parse_args(argv)
+    if arguments.command == "bench":
+        return _run_benchmark(arguments.suite, arguments.arguments)
+    if arguments.command == "serve-api":
+        return _run_locally(arguments)
+
+    client: COTDaemonClient = COTDaemonClient(arguments.socket)
+    if arguments.command == "daemon" and arguments.action == "start":
+        if client.is_running():
+            print(f"A daemon is already listening on {client.socket_path}.", file=sys.stderr)
+            return 1
+        return _run_locally(arguments)
+    if arguments.command == "daemon" or not arguments.no_daemon:
+        try:
+            exit_code, output = client.send(argv)
+            sys.stdout.write(output)
+            return exit_code
+        except ConnectionRefusedError:
+            if arguments.command == "daemon":
+                print(f"No daemon is listening on {client.socket_path}.", file=sys.stderr)
+                return 1
+        except ConnectionError as error:
+            print(f"Error: {error}", file=sys.stderr)
+            return 1
+    return _run_locally(arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
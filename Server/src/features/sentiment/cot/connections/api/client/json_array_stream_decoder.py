@@ -0,0 +1,95 @@
+import codecs
+import json
+import re
+from typing import Any, Final
+
+
+class JSONArrayStreamDecoder:
+    """
+    Incrementally decodes a JSON array whose bytes arrive in chunks.
+
+    Every time a chunk is fed, the elements of the array that are complete so far are decoded and returned, so the
+    elements can be processed while the rest of the response is still being downloaded.
+    """
+    _WHITESPACE: Final[str] = " \t\n\r"
+    _NUMBER_CHARACTERS: Final[re.Pattern] = re.compile(r"[0-9.eE+\-]*")
+
+    def __init__(self):
+        self._decoder: json.JSONDecoder = json.JSONDecoder()
+        self._text_decoder: codecs.IncrementalDecoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer: str = ""
+        self._started: bool = False
+        self._expects_element: bool = True
+        self._has_elements: bool = False
+        self._finished: bool = False
+
+    def feed(self, chunk: bytes) -> list[Any]:
+        """
+        :param chunk: The next chunk of the JSON array.
+        :type chunk: bytes
+        :return list[Any]: The array elements completed by this chunk.
+        :raises ValueError: If the data is not a JSON array.
+        """
+        self._buffer += self._text_decoder.decode(chunk)
+        elements: list[Any] = []
+        position: int = 0
+        while not self._finished:
+            position = self._skip_whitespace(position)
+            if position >= len(self._buffer):
+                break
+            character: str = self._buffer[position]
+            if not self._started:
+                if character != "[":
+                    raise ValueError(f"Expected a JSON array, got {character!r}.")
+                self._started = True
+                position += 1
+            elif character == "]":
+                if self._expects_element and self._has_elements:
+                    raise ValueError("Expected an array element after ',', got ']'.")
+                self._finished = True
+                position += 1
+            elif not self._expects_element:
+                if character != ",":
+                    raise ValueError(f"Expected ',' or ']' between the array elements, got {character!r}.")
+                self._expects_element = True
+                position += 1
+            else:
+                try:
+                    element, end = self._decoder.raw_decode(self._buffer, position)
+                except json.JSONDecodeError:
+                    break
+                if end >= len(self._buffer) and not isinstance(element, (dict, list, str)):
+                    # A number or literal at the end of the buffer may continue in the next chunk.
+                    break
+                if self._is_number(element) and self._NUMBER_CHARACTERS.match(self._buffer, end).end() >= len(
+                    self._buffer
+                ):
+                    # The number was cut short, e.g. "1." or "1e", the rest of it is in the next chunk.
+                    break
+                elements.append(element)
+                self._expects_element = False
+                self._has_elements = True
+                position = end
+        self._buffer = self._buffer[position:]
+        return elements
+
+    def close(self) -> None:
+        """
+        Verifies that the whole array was received.
+
+        :raises ValueError: If the array is incomplete or followed by more data.
+        """
+        self._buffer += self._text_decoder.decode(b"", final=True)
+        if not self._finished:
+            raise ValueError("The JSON array is incomplete.")
+        if self._buffer.strip(self._WHITESPACE):
+            raise ValueError("Unexpected data after the JSON array.")
+
+    @staticmethod
+    def _is_number(element: Any) -> bool:
+        return isinstance(element, (int, float)) and not isinstance(element, bool)
+
+    def _skip_whitespace(self, position: int) -> int:
+        while position < len(self._buffer) and self._buffer[position] in self._WHITESPACE:
+            position += 1
+        return position
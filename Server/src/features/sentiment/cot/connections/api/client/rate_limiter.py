@@ -0,0 +1,69 @@
+import asyncio
+import time
+
+
+class TokenBucketRateLimiter:
+    """
+    Asynchronous token bucket rate limiter.
+
+    The bucket holds up to capacity tokens and is refilled at rate tokens per second, each request takes one token.
+    Requests wait in the order they arrived, so a burst is spread out at the refill rate instead of being rejected.
+    """
+    def __init__(self, rate: float, capacity: int):
+        """
+        :param rate: The number of tokens added to the bucket per second, i.e. the sustained requests per second.
+        :type rate: float
+        :param capacity: The maximum number of tokens in the bucket, i.e. the largest burst allowed.
+        :type capacity: int
+        """
+        if rate <= 0 or capacity < 1:
+            raise ValueError("The rate must be greater than 0 and the capacity at least 1.")
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens: float = capacity
+        self._updated: float = time.monotonic()
+        self._paused_until: float = 0.0
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    async def acquire(self) -> None:
+        """
+        Waits until a token is available and takes it.
+        """
+        async with self._lock:
+            while True:
+                now: float = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Empties the bucket and holds every request back for the given number of seconds, e.g. when the server asked
+        the client to slow down.
+
+        :param seconds: The number of seconds to hold the requests back.
+        :type seconds: float
+        """
+        now: float = time.monotonic()
+        self._tokens = 0
+        self._updated = max(self._updated, now + seconds)
+        self._paused_until = max(self._paused_until, now + seconds)
+
+    def _refill(self, now: float) -> None:
+        elapsed: float = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self._capacity, self._tokens + elapsed * self._rate)
+            self._updated = now
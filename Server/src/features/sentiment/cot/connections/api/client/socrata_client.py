@@ -1,32 +1,270 @@
 import asyncio
-from typing import Any
-import aiohttp
-from shared.utils.util import Util
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Final
+from urllib.parse import urlsplit
+import weakref
+from features.sentiment.cot.connections.api.client.json_array_stream_decoder import JSONArrayStreamDecoder
+from features.sentiment.cot.connections.api.client.rate_limiter import TokenBucketRateLimiter
+from shared.utils.logger import Logger
+from shared.utils.metrics import Counter, Histogram, MetricsRegistry
+from shared.utils.settings import Settings
+from shared.utils.tracer import Tracer
+
+if TYPE_CHECKING:
+    import aiohttp
 
 
 class SocrataClient:
     """
     Socrata client communicates with the socrata api through HTTPS requests.
+
+    Requests are rate limited with a token bucket and their concurrency is capped, both are shared by every client
+    using the same app token in the same event loop. Throttled (429) and failed (5xx) requests, connection errors and
+    timeouts are retried with a jittered exponential backoff that honours the Retry-After header, up to a cap.
     """
-    def __init__(self):
-        self._app_token: str = Util.get_env_variables(["SOCRATA_APP_TOKEN"])[0]
-        self.base_url: str = "https://publicreporting.cftc.gov/resource/6dca-aqww.json"
-    
+    _DEFAULT_BASE_URL: Final[str] = "https://publicreporting.cftc.gov/resource/6dca-aqww.json"
+    _DEFAULT_REQUESTS_PER_SECOND: Final[float] = 5.0
+    _DEFAULT_BURST: Final[int] = 10
+    _DEFAULT_MAX_CONCURRENCY: Final[int] = 4
+    _DEFAULT_MAX_RETRIES: Final[int] = 5
+    _BASE_BACKOFF: Final[float] = 0.5
+    _MAX_BACKOFF: Final[float] = 30.0
+    _MAX_RETRY_AFTER: Final[float] = 120.0
+    _LOCAL_HOSTS: Final[frozenset[str]] = frozenset({"localhost", "127.0.0.1", "::1"})
+    _RETRYABLE_STATUSES: Final[frozenset[int]] = frozenset({429, 500, 502, 503, 504})
+    _DEFAULT_STREAM_BATCH_SIZE: Final[int] = 100
+    _STREAM_CHUNK_SIZE: Final[int] = 64 * 1024
+    _REQUEST_SECONDS: Final[Histogram] = MetricsRegistry.get_instance().histogram(
+        "socrata_request_seconds", "Time until the Socrata API responded to a request, by response status."
+    )
+    _REQUESTS: Final[Counter] = MetricsRegistry.get_instance().counter(
+        "socrata_requests_total", "Number of requests sent to the Socrata API, retries included, by response status."
+    )
+    # The rate limiter and the semaphore of each app token, by event loop: asyncio primitives are bound to the loop
+    # they were first used in, and the CLI, the daemon and the benchmarks each run their own loops.
+    _limits: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    def __init__(
+            self,
+            base_url: str | None = None,
+            app_token: str | None = None,
+            requests_per_second: float | None = None,
+            burst: int | None = None,
+            max_concurrency: int | None = None,
+            max_retries: int = _DEFAULT_MAX_RETRIES
+        ):
+        """
+        Unless given, the limits are read from the SOCRATA_REQUESTS_PER_SECOND, SOCRATA_BURST and
+        SOCRATA_MAX_CONCURRENCY environment variables. The limits are set by the first client sending a request for an
+        app token in an event loop.
+
+        :param base_url: The URL of the legacy COT reports dataset. Defaults to the SOCRATA_BASE_URL environment
+        variable or the CFTC's public reporting endpoint, it can point to a local stand-in for offline testing.
+        :type base_url: str
+        :param app_token: The Socrata app token. Defaults to the SOCRATA_APP_TOKEN environment variable, which is only
+        required when the base URL is not a local stand-in.
+        :type app_token: str
+        :param requests_per_second: The sustained number of requests per second allowed for the app token.
+        :type requests_per_second: float
+        :param burst: The number of requests that can be sent at once before the rate limit applies.
+        :type burst: int
+        :param max_concurrency: The maximum number of requests in flight for the app token.
+        :type max_concurrency: int
+        :param max_retries: The number of times a throttled or failed request is retried.
+        :type max_retries: int
+        :raises ValueError: If no app token is given or set and the base URL is not a local stand-in.
+        """
+        settings: Settings = Settings.get_instance()
+        self.base_url: str = base_url or settings.socrata_base_url or self._DEFAULT_BASE_URL
+        self._app_token: str | None = app_token or settings.socrata_app_token
+        if self._app_token is None and urlsplit(self.base_url).hostname not in self._LOCAL_HOSTS:
+            self._app_token = settings.require("socrata_app_token")[0]
+        self._max_retries = max_retries
+        self._rate: float = (
+            requests_per_second or settings.socrata_requests_per_second or self._DEFAULT_REQUESTS_PER_SECOND
+        )
+        self._burst: int = burst or settings.socrata_burst or self._DEFAULT_BURST
+        self._max_concurrency: int = (
+            max_concurrency or settings.socrata_max_concurrency or self._DEFAULT_MAX_CONCURRENCY
+        )
+        self._session: "aiohttp.ClientSession | None" = None
+
+    async def open(self) -> None:
+        """
+        Opens an HTTP session shared by the requests of this client until close is called, so connections to the
+        Socrata API are kept alive between requests. Without it, each request opens its own session.
+        """
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @asynccontextmanager
+    async def _open_session(self) -> AsyncIterator["aiohttp.ClientSession"]:
+        """
+        :returns AsyncIterator[aiohttp.ClientSession]: The shared session if it is open, otherwise a session closed
+        when the context is exited.
+        """
+        if self._session is not None and not self._session.closed:
+            yield self._session
+            return
+        import aiohttp
+        async with aiohttp.ClientSession() as session:
+            yield session
+
     async def fetch_latest_report(self, params: dict[str, Any]) -> list[dict[str, Any]]:
         """
         :returns list[dict[str, Any]]: returns the response containing the latest report from the socrata api.
-        :raises aiohttp.ClientResponseError:
+        :raises aiohttp.ClientResponseError: If the request failed and can't be retried or ran out of retries.
         """
-        headers: dict[str, Any] = {
-            "X-App-Token": self._app_token
-        }
-        
-        async with aiohttp.ClientSession() as session:
-            async with session.get(self.base_url, headers=headers, params=params) as response:
-                if response.status != 200:
-                    response.raise_for_status()
+        async with self._open_session() as session:
+            async with self._get(session, params) as response:
                 return await response.json()
-    
+
+    async def stream_latest_report(
+            self,
+            params: dict[str, Any],
+            batch_size: int = _DEFAULT_STREAM_BATCH_SIZE
+        ) -> AsyncIterator[list[dict[str, Any]]]:
+        """
+        Streams the response containing the latest report from the socrata api. The response is decoded as it
+        arrives and its records are yielded in batches, so they can be processed while the rest is downloaded.
+
+        :param batch_size: The number of records in each yielded batch, the last batch may be smaller.
+        :type batch_size: int
+        :returns AsyncIterator[list[dict[str, Any]]]: The records of the response in batches.
+        :raises aiohttp.ClientResponseError: If the request failed and can't be retried or ran out of retries.
+        :raises ValueError: If the response is not a complete JSON array.
+        """
+        async with self._open_session() as session:
+            async with self._get(session, params) as response:
+                decoder: JSONArrayStreamDecoder = JSONArrayStreamDecoder()
+                batch: list[dict[str, Any]] = []
+                async for chunk in response.content.iter_chunked(self._STREAM_CHUNK_SIZE):
+                    batch.extend(decoder.feed(chunk))
+                    while len(batch) >= batch_size:
+                        yield batch[: batch_size]
+                        batch = batch[batch_size:]
+                decoder.close()
+                if batch:
+                    yield batch
+
+    @asynccontextmanager
+    async def _get(
+            self,
+            session: "aiohttp.ClientSession",
+            params: dict[str, Any]
+        ) -> AsyncIterator["aiohttp.ClientResponse"]:
+        """
+        Sends a GET request within the rate limit and concurrency cap of the app token, retrying throttled and failed
+        requests. The concurrency slot is held until the response has been read.
+
+        :returns AsyncIterator[aiohttp.ClientResponse]: The successful response.
+        :raises aiohttp.ClientResponseError: If the request failed and can't be retried or ran out of retries.
+        :raises aiohttp.ClientError: If the connection failed and ran out of retries.
+        :raises asyncio.TimeoutError: If the request timed out and ran out of retries.
+        """
+        import aiohttp
+        headers: dict[str, Any] = {"X-App-Token": self._app_token} if self._app_token else {}
+        rate_limiter, semaphore = self._get_limits()
+
+        for attempt in range(self._max_retries + 1):
+            async with Tracer.span("SocrataClient.request", attempt=attempt + 1) as span, semaphore:
+                await rate_limiter.acquire()
+                sent_at: float = time.perf_counter()
+                try:
+                    response: aiohttp.ClientResponse = await session.get(self.base_url, headers=headers, params=params)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                    self._REQUEST_SECONDS.observe(time.perf_counter() - sent_at, status="error")
+                    self._REQUESTS.inc(status="error")
+                    span.set_attribute("status", "error")
+                    if attempt == self._max_retries:
+                        raise
+                    delay: float = self._calculate_backoff(attempt)
+                    reason: str = f"Socrata API request failed ({type(error).__name__}: {error})"
+                else:
+                    async with response:
+                        self._REQUEST_SECONDS.observe(time.perf_counter() - sent_at, status=response.status)
+                        self._REQUESTS.inc(status=response.status)
+                        span.set_attribute("status", response.status)
+                        if response.status not in self._RETRYABLE_STATUSES:
+                            response.raise_for_status()
+                            yield response
+                            return
+                        if attempt == self._max_retries:
+                            response.raise_for_status()
+                        delay = self._calculate_retry_delay(response, attempt)
+                        reason = f"Socrata API responded with {response.status}"
+                        if response.status == 429:
+                            rate_limiter.pause(delay)
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.WARNING,
+                message=f"{reason}, retrying in {delay:.2f}s (Attempt {attempt + 1}/{self._max_retries})."
+            )
+            await asyncio.sleep(delay)
+
+    def _get_limits(self) -> tuple[TokenBucketRateLimiter, asyncio.Semaphore]:
+        """
+        :return tuple[TokenBucketRateLimiter, asyncio.Semaphore]: The rate limiter and the concurrency cap of the app
+        token in the running event loop, created by the first request.
+        """
+        limits: dict[str, tuple[TokenBucketRateLimiter, asyncio.Semaphore]] = self._limits.setdefault(
+            asyncio.get_running_loop(), {}
+        )
+        key: str = self._app_token or ""
+        if key not in limits:
+            limits[key] = (
+                TokenBucketRateLimiter(rate=self._rate, capacity=self._burst),
+                asyncio.Semaphore(self._max_concurrency)
+            )
+        return limits[key]
+
+    def _calculate_retry_delay(self, response: "aiohttp.ClientResponse", attempt: int) -> float:
+        """
+        :return float: The Retry-After delay if the server sent one, capped so a wrong header can't hold back every
+        request of the app token for long, otherwise a full-jitter exponential backoff.
+        """
+        retry_after: float | None = self._parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is not None:
+            return min(retry_after, self._MAX_RETRY_AFTER) + random.uniform(0, self._BASE_BACKOFF)
+        return self._calculate_backoff(attempt)
+
+    def _calculate_backoff(self, attempt: int) -> float:
+        """
+        :return float: A full-jitter exponential backoff.
+        """
+        return random.uniform(0, min(self._MAX_BACKOFF, self._BASE_BACKOFF * 2 ** attempt))
+
+    @staticmethod
+    def _parse_retry_after(value: str | None) -> float | None:
+        """
+        :param value: The Retry-After header, either a number of seconds or an HTTP date.
+        :type value: str
+        :return float | None: The number of seconds to wait, None if the header is missing or invalid.
+        """
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at: datetime = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
 async def main():
     client = SocrataClient()
     try:
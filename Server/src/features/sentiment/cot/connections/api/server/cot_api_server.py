@@ -0,0 +1,625 @@
+import argparse
+import asyncio
+from collections import OrderedDict
+from datetime import date
+import gzip
+import hashlib
+import json
+from typing import Awaitable, Callable, Final
+from aiohttp import web
+from features.sentiment.cot.connections.api.service.socrata_service import SocrataService
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.interfaces.cot_service import COTService
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_release_broadcaster import COTReleaseBroadcaster, COTSubscription
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.cot_report_write_behind_queue import COTReportWriteBehindQueue
+from features.sentiment.cot.tools.cot_snapshot_store import COTReleaseSnapshot, COTSnapshotStore
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from shared.connections.database.mysql_pool_manager import MySQLPoolManager
+from shared.connections.database.mysql_repository import MySQLRepository
+from shared.enums.reading import Reading
+from shared.models.asset import Asset
+from shared.models.reported_assets import ReportedAssets
+from shared.utils.logger import Logger
+from shared.utils.metrics import Counter, Histogram, MetricsRegistry
+from shared.utils.settings import Settings
+
+
+class CachedResponse:
+    """
+    A serialized response body with its gzip encoding and the strong ETag of each encoding.
+    """
+    _MIN_COMPRESSED_SIZE: Final[int] = 1024
+
+    def __init__(self, body: bytes, content_type: str = "application/json", is_complete: bool = True):
+        """
+        :param body: The serialized body.
+        :type body: bytes
+        :param content_type: The media type of the body.
+        :type content_type: str
+        :param is_complete: Whether the body holds every requested report of the release, an incomplete body is served
+        but not cached.
+        :type is_complete: bool
+        """
+        digest: str = hashlib.sha256(body).hexdigest()[:32]
+        self.body = body
+        self.content_type = content_type
+        self.is_complete = is_complete
+        self.etag: str = f'"{digest}"'
+        # Small bodies grow when compressed. mtime is fixed, so the same body always compresses to the same bytes.
+        self.gzip_body: bytes | None = (
+            gzip.compress(body, mtime=0) if len(body) >= self._MIN_COMPRESSED_SIZE else None
+        )
+        self.gzip_etag: str = f'"{digest}-gzip"'
+
+    def matches(self, if_none_match: str | None) -> bool:
+        """
+        :param if_none_match: The If-None-Match header of the request.
+        :type if_none_match: str
+        :return bool: Whether the client already has the body in either encoding.
+        """
+        if not if_none_match:
+            return False
+        tags: list[str] = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag in tags or self.gzip_etag in tags
+
+
+class COTResponseCache:
+    """
+    Keeps the serialized responses of the latest release by request, the least recently used ones are dropped when
+    the cache is full.
+
+    A response is built once however many requests ask for it at the same time, they all wait for the same build.
+    Every response is dropped once a new release is due, or by invalidate, e.g. once reports were restated. Failed
+    builds are not kept, nor are incomplete ones, e.g. while the release is not (fully) published yet, so the next
+    request builds them again.
+
+    Keys of responses built from the repository include its data version, see CachingCOTRepository.generation, so a
+    report written after the response was built, e.g. by the write-behind queue, isn't hidden until the next release.
+    """
+    _DEFAULT_MAX_ENTRIES: Final[int] = 1024
+    _REQUESTS: Final[Counter] = MetricsRegistry.get_instance().counter(
+        "cot_api_cache_requests_total", "Number of API responses served from the cache (hit) or built (miss)."
+    )
+
+    def __init__(self, max_entries: int = _DEFAULT_MAX_ENTRIES):
+        """
+        :param max_entries: The maximum number of responses kept.
+        :type max_entries: int
+        """
+        self._max_entries = max_entries
+        self._entries: OrderedDict[tuple, CachedResponse] = OrderedDict()
+        self._pending: dict[tuple, asyncio.Future] = {}
+        self._release_date: str | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(
+            self,
+            release_date: str,
+            key: tuple,
+            build: Callable[[], Awaitable[CachedResponse]]
+        ) -> CachedResponse:
+        """
+        :param release_date: The date of the latest release, responses of an older release are dropped.
+        :type release_date: str
+        :param key: Identifies the request, e.g. its route and normalized parameters.
+        :type key: tuple
+        :param build: Builds the response if it isn't cached.
+        :type build: Callable[[], Awaitable[CachedResponse]]
+        :return CachedResponse: The cached or built response.
+        """
+        if release_date != self._release_date:
+            self.invalidate()
+            self._release_date = release_date
+        cached: CachedResponse | None = self._entries.get(key)
+        if cached is not None:
+            self._entries.move_to_end(key)
+            self._REQUESTS.inc(result="hit")
+            return cached
+        pending: asyncio.Future | None = self._pending.get(key)
+        if pending is None:
+            self._REQUESTS.inc(result="miss")
+            pending = asyncio.ensure_future(build())
+            self._pending[key] = pending
+            pending.add_done_callback(lambda done: self._store(release_date, key, done))
+        # A request that is cancelled, e.g. by its client disconnecting, doesn't cancel the build others wait for.
+        return await asyncio.shield(pending)
+
+    def invalidate(self) -> None:
+        """
+        Drops every response, e.g. after the repository was backfilled.
+        """
+        self._entries.clear()
+        self._pending.clear()
+
+    def _store(self, release_date: str, key: tuple, build: asyncio.Future) -> None:
+        if self._pending.get(key) is build:
+            del self._pending[key]
+        if build.cancelled() or build.exception() is not None or release_date != self._release_date:
+            return
+        if not build.result().is_complete:
+            return
+        self._entries[key] = build.result()
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+
+class COTAPIServer:
+    """
+    Serves COT reports over HTTP as JSON:
+    - GET /cot/latest?assets=EUR,JPY&view=enhanced: the latest report of each asset.
+    - GET /cot/history?assets=EUR&start=2024-01-02&end=2024-12-31: the reports released between two dates (both
+    included), oldest first.
+    - GET /cot/screen?sentiment=bullish&min_cot_index=80: the latest reports of the assets matching every filter,
+    highest COT Index first.
+    - GET /metrics: the metrics of the process in the Prometheus text exposition format.
+
+    With a broadcaster, new releases are also pushed to subscribers, see COTReleaseBroadcaster:
+    - GET /cot/stream?assets=EUR,JPY: Server-Sent Events, one release event per release.
+    - GET /cot/ws?assets=EUR,JPY: WebSocket, one text message per release.
+    The server then fetches the latest release once it is due, retrying at an interval until it is published, so the
+    polling is done once by the server instead of by every client. The service publishes the release once it is
+    stored, so it must be given the same broadcaster.
+
+    Assets default to every reported asset. The view is default (positions), enhanced (COT Index, sentiment and
+    percentile ranks) or full (both, the default).
+
+    With a snapshot store, latest reports are assembled from the snapshot of the release instead of being fetched and
+    serialized, see COTSnapshotStore.
+
+    Each response is serialized once per release and request, then served from memory with a strong ETag: gzip
+    encoded if the client accepts it, and answered with 304 Not Modified if the client already has it. Many clients
+    polling the same data cost one fetch and one serialization per release.
+    """
+    _DEFAULT_HOST: Final[str] = "127.0.0.1"
+    _DEFAULT_PORT: Final[int] = 8080
+    _DEFAULT_RELEASE_POLL_INTERVAL: Final[float] = 60.0
+    _KEEPALIVE_INTERVAL: Final[float] = 15.0
+    _VIEWS: Final[dict[str, tuple[bool, bool]]] = {
+        "default": (True, False),
+        "enhanced": (False, True),
+        "full": (True, True)
+    }
+    _REQUEST_SECONDS: Final[Histogram] = MetricsRegistry.get_instance().histogram(
+        "cot_api_request_seconds", "Time taken to answer each API request, by route."
+    )
+
+    def __init__(
+            self,
+            cot_service: COTService,
+            cot_repository: COTRepository,
+            response_cache: COTResponseCache | None = None,
+            broadcaster: COTReleaseBroadcaster | None = None,
+            release_poll_interval: float | None = None,
+            snapshot_store: COTSnapshotStore | None = None
+        ):
+        """
+        :param cot_service: The service the latest reports are fetched from.
+        :type cot_service: COTService
+        :param cot_repository: The repository the history of reports is fetched from.
+        :type cot_repository: COTRepository
+        :param response_cache: The cache of serialized responses.
+        :type response_cache: COTResponseCache
+        :param broadcaster: The broadcaster pushing new releases to subscribers, give the same one to the service, which
+        publishes the releases it fetches once they are stored.
+        :type broadcaster: COTReleaseBroadcaster
+        :param release_poll_interval: The number of seconds between two checks for a due release, defaults to the
+        COT_RELEASE_POLL_INTERVAL environment variable or 60.
+        :type release_poll_interval: float
+        :param snapshot_store: The store of the snapshot latest reports are served from.
+        :type snapshot_store: COTSnapshotStore
+        """
+        self._cot_service = cot_service
+        self._cot_repository = cot_repository
+        self.response_cache: COTResponseCache = response_cache or COTResponseCache()
+        self._broadcaster = broadcaster
+        self._snapshot_store = snapshot_store
+        self._release_poll_interval: float = (
+            release_poll_interval
+            or Settings.get_instance().cot_release_poll_interval
+            or self._DEFAULT_RELEASE_POLL_INTERVAL
+        )
+        self._cot_report_presenter: COTReportPresenter = COTReportPresenter()
+        self._runner: web.AppRunner | None = None
+        self._release_watcher: asyncio.Task | None = None
+        self.url: str = ""
+
+    def create_app(self) -> web.Application:
+        """
+        :return web.Application: The application serving the API.
+        """
+        app: web.Application = web.Application()
+        app.router.add_get("/cot/latest", self._handle_latest)
+        app.router.add_get("/cot/history", self._handle_history)
+        app.router.add_get("/cot/screen", self._handle_screen)
+        app.router.add_get("/metrics", self._handle_metrics)
+        if self._broadcaster is not None:
+            app.router.add_get("/cot/stream", self._handle_stream)
+            app.router.add_get("/cot/ws", self._handle_websocket)
+        return app
+
+    async def start(self, host: str | None = None, port: int | None = None) -> str:
+        """
+        Starts serving the API.
+
+        :param host: The host to listen on, defaults to the COT_API_HOST environment variable or 127.0.0.1.
+        :type host: str
+        :param port: The port to listen on, defaults to the COT_API_PORT environment variable or 8080. A free port is
+        picked if 0.
+        :type port: int
+        :return str: The base URL of the API.
+        """
+        settings: Settings = Settings.get_instance()
+        host = host or settings.cot_api_host or self._DEFAULT_HOST
+        port = port if port is not None else settings.cot_api_port or self._DEFAULT_PORT
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site: web.TCPSite = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.url = f"http://{host}:{self._runner.addresses[0][1]}"
+        if self._broadcaster is not None:
+            self._release_watcher = asyncio.create_task(self._watch_releases())
+        return self.url
+
+    async def stop(self) -> None:
+        if self._release_watcher is not None:
+            self._release_watcher.cancel()
+            self._release_watcher = None
+        if self._broadcaster is not None:
+            # Subscribers stop waiting, so their streams end instead of holding up the shutdown.
+            self._broadcaster.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def on_restatement(self, cot_reports: list[COTReport]) -> None:
+        """
+        Drops the responses and the snapshot built from the reports before the CFTC restated them. Give it to
+        SocrataService.add_restatement_listener.
+
+        :param cot_reports: The reports written by the restatement reconciler.
+        :type cot_reports: list[COTReport]
+        """
+        if not cot_reports:
+            return
+        self.response_cache.invalidate()
+        if self._snapshot_store is not None:
+            self._snapshot_store.invalidate([report.reported_date for report in cot_reports])
+
+    async def __aenter__(self) -> "COTAPIServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.stop()
+
+    async def _handle_latest(self, request: web.Request) -> web.Response:
+        async def build(assets: list[Asset], view: str) -> CachedResponse:
+            if self._snapshot_store is not None:
+                snapshot: COTReleaseSnapshot = await self._snapshot_store.get_latest()
+                return CachedResponse(
+                    snapshot.to_json_array([asset.code for asset in assets], view),
+                    is_complete=self._snapshot_store.is_complete(snapshot, assets)
+                )
+            cot_reports: list[COTReport] = await self._cot_service.fetch_latest_report(assets)
+            return self._serialize(cot_reports, view, self._has_every_asset(assets, cot_reports))
+
+        try:
+            assets: list[Asset] = self._parse_assets(request)
+            view: str = self._parse_view(request)
+        except ValueError as error:
+            return self._error(400, str(error))
+        key: tuple = ("latest", tuple(asset.code for asset in assets), view)
+        return await self._serve(request, "latest", key, lambda: build(assets, view))
+
+    async def _handle_history(self, request: web.Request) -> web.Response:
+        async def build(assets: list[Asset], start: str, end: str, view: str) -> CachedResponse:
+            rows: list[tuple] = await self._cot_repository.fetch_cot_reports_between(
+                [asset.code for asset in assets], start, end
+            )
+            return self._serialize(self._cot_report_presenter.from_list(rows), view)
+
+        try:
+            assets: list[Asset] = self._parse_assets(request)
+            view: str = self._parse_view(request)
+            start: str = self._parse_date(request, "start")
+            end: str = self._parse_date(request, "end")
+            if start > end:
+                raise ValueError(f"The start date {start} is after the end date {end}.")
+        except ValueError as error:
+            return self._error(400, str(error))
+        key: tuple = ("history", self._get_data_version(), tuple(asset.code for asset in assets), start, end, view)
+        return await self._serve(request, "history", key, lambda: build(assets, start, end, view))
+
+    async def _handle_screen(self, request: web.Request) -> web.Response:
+        async def build(
+                assets: list[Asset],
+                sentiment: Reading | None,
+                min_cot_index: int,
+                max_cot_index: int,
+                view: str
+            ) -> CachedResponse:
+            cot_reports: list[COTReport] = await self._cot_service.fetch_latest_report(assets)
+            # A report without a COT Index only passes a screen that doesn't bound the COT Index, and sorts last.
+            is_bounded: bool = min_cot_index > 0 or max_cot_index < 100
+            cot_indexes: dict[str, int | None] = {
+                report.asset_code: self._get_known_cot_index(report) for report in cot_reports
+            }
+            screened: list[COTReport] = [
+                report for report in cot_reports
+                if (
+                    not is_bounded if cot_indexes[report.asset_code] is None
+                    else min_cot_index <= cot_indexes[report.asset_code] <= max_cot_index
+                )
+                and (
+                    sentiment is None
+                    or report.noncommercials.get_sentiment(report.sentiment_threshold) == sentiment
+                )
+            ]
+            screened.sort(
+                key=lambda report: (cot_indexes[report.asset_code] is not None, cot_indexes[report.asset_code] or 0),
+                reverse=True
+            )
+            return self._serialize(screened, view, self._has_every_asset(assets, cot_reports))
+
+        try:
+            assets: list[Asset] = self._parse_assets(request)
+            view: str = self._parse_view(request)
+            sentiment: Reading | None = self._parse_sentiment(request)
+            min_cot_index: int = self._parse_cot_index(request, "min_cot_index", 0)
+            max_cot_index: int = self._parse_cot_index(request, "max_cot_index", 100)
+        except ValueError as error:
+            return self._error(400, str(error))
+        key: tuple = (
+            "screen",
+            tuple(asset.code for asset in assets),
+            sentiment.name if sentiment else None,
+            min_cot_index,
+            max_cot_index,
+            view
+        )
+        return await self._serve(
+            request, "screen", key, lambda: build(assets, sentiment, min_cot_index, max_cot_index, view)
+        )
+
+    async def _handle_metrics(self, _: web.Request) -> web.Response:
+        return web.Response(
+            text=MetricsRegistry.get_instance().to_prometheus(), content_type="text/plain", charset="utf-8"
+        )
+
+    async def _handle_stream(self, request: web.Request) -> web.StreamResponse:
+        try:
+            asset_codes: list[str] | None = self._parse_subscribed_asset_codes(request)
+        except ValueError as error:
+            return self._error(400, str(error))
+        response: web.StreamResponse = web.StreamResponse(
+            headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"}
+        )
+        await response.prepare(request)
+        subscription: COTSubscription = self._broadcaster.subscribe(asset_codes)
+        try:
+            while True:
+                try:
+                    message: bytes | None = await asyncio.wait_for(subscription.get(), self._KEEPALIVE_INTERVAL)
+                except TimeoutError:
+                    # A comment line keeps proxies from closing an idle stream and reveals disconnected clients.
+                    await response.write(b": keepalive\n\n")
+                    continue
+                if message is None:
+                    break
+                await response.write(b"event: release\ndata: " + message + b"\n\n")
+        except ConnectionResetError:
+            pass
+        finally:
+            self._broadcaster.unsubscribe(subscription)
+        return response
+
+    async def _handle_websocket(self, request: web.Request) -> web.WebSocketResponse | web.Response:
+        try:
+            asset_codes: list[str] | None = self._parse_subscribed_asset_codes(request)
+        except ValueError as error:
+            return self._error(400, str(error))
+        websocket: web.WebSocketResponse = web.WebSocketResponse(heartbeat=self._KEEPALIVE_INTERVAL)
+        await websocket.prepare(request)
+        subscription: COTSubscription = self._broadcaster.subscribe(asset_codes)
+
+        async def receive() -> None:
+            # Handles pings and the closing handshake, messages of the client are ignored.
+            async for _ in websocket:
+                pass
+            subscription.close()
+
+        receiver: asyncio.Task = asyncio.create_task(receive())
+        try:
+            async for message in subscription:
+                await websocket.send_str(message.decode())
+        except ConnectionResetError:
+            pass
+        finally:
+            self._broadcaster.unsubscribe(subscription)
+            receiver.cancel()
+            await websocket.close()
+        return websocket
+
+    async def _watch_releases(self) -> None:
+        while True:
+            if self._broadcaster.release_date != self._cot_service.calculate_last_report_release_date():
+                try:
+                    await self._cot_service.fetch_latest_report(ReportedAssets.all)
+                except Exception as error:
+                    Logger.log(
+                        name=self.__class__.__name__,
+                        level=Logger.WARNING,
+                        message=f"The latest release could not be fetched, retrying in {self._release_poll_interval} "
+                                f"seconds. Error: {error}"
+                    )
+            await asyncio.sleep(self._release_poll_interval)
+
+    async def _serve(
+            self,
+            request: web.Request,
+            route: str,
+            key: tuple,
+            build: Callable[[], Awaitable[CachedResponse]]
+        ) -> web.Response:
+        with self._REQUEST_SECONDS.time(route=route):
+            try:
+                cached: CachedResponse = await self.response_cache.get(
+                    self._cot_service.calculate_last_report_release_date(), key, build
+                )
+            except LookupError as error:
+                return self._error(404, str(error))
+            return self._respond(request, cached)
+
+    @classmethod
+    def _respond(cls, request: web.Request, cached: CachedResponse) -> web.Response:
+        is_gzipped: bool = cached.gzip_body is not None and cls._accepts_gzip(request.headers.get("Accept-Encoding"))
+        headers: dict[str, str] = {
+            "ETag": cached.gzip_etag if is_gzipped else cached.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding"
+        }
+        if cached.matches(request.headers.get("If-None-Match")):
+            return web.Response(status=304, headers=headers)
+        if is_gzipped:
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(
+            body=cached.gzip_body if is_gzipped else cached.body, content_type=cached.content_type, headers=headers
+        )
+
+    @classmethod
+    def _serialize(cls, cot_reports: list[COTReport], view: str, is_complete: bool = True) -> CachedResponse:
+        verbose, enhanced = cls._VIEWS[view]
+        return CachedResponse(
+            json.dumps([report.to_dict(verbose=verbose, enhanced=enhanced) for report in cot_reports]).encode(),
+            is_complete=is_complete
+        )
+
+    def _get_data_version(self) -> int | None:
+        """
+        :return int | None: The version of the reports in the repository, None if the repository doesn't track it.
+        """
+        if isinstance(self._cot_repository, CachingCOTRepository):
+            return self._cot_repository.generation
+        return None
+
+    @staticmethod
+    def _has_every_asset(assets: list[Asset], cot_reports: list[COTReport]) -> bool:
+        """
+        :return bool: Whether there is a report of every asset, the latest release may not be published yet or only
+        partially.
+        """
+        asset_codes: set[str] = {report.asset_code for report in cot_reports}
+        return all(asset.code in asset_codes for asset in assets)
+
+    @staticmethod
+    def _accepts_gzip(accept_encoding: str | None) -> bool:
+        for encoding in (accept_encoding or "").split(","):
+            name, _, parameters = encoding.partition(";")
+            if name.strip().lower() in ("gzip", "*"):
+                return parameters.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+        return False
+
+    @staticmethod
+    def _error(status: int, message: str) -> web.Response:
+        return web.json_response({"error": True, "message": message}, status=status)
+
+    @staticmethod
+    def _get_known_cot_index(cot_report: COTReport) -> int | None:
+        """
+        :return int | None: The COT Index of the report, None if it is unknown, unlike CommercialTraders.get_cot_index
+        that answers 0.
+        """
+        commercials = cot_report.commercials
+        if commercials.historical_net is None and commercials.cot_index is None:
+            return None
+        return commercials.get_cot_index()
+
+    @staticmethod
+    def _parse_assets(request: web.Request) -> list[Asset]:
+        """
+        :raises ValueError: If an asset code is not the code of a reported asset.
+        """
+        codes: list[str] = [code.strip().upper() for code in request.query.get("assets", "").split(",") if code.strip()]
+        if not codes:
+            return ReportedAssets.all
+        unknown: list[str] = [code for code in codes if code not in ReportedAssets.by_code]
+        if unknown:
+            raise ValueError(f"Unknown asset codes: {', '.join(unknown)}.")
+        return [ReportedAssets.by_code[code] for code in sorted(set(codes))]
+
+    @classmethod
+    def _parse_subscribed_asset_codes(cls, request: web.Request) -> list[str] | None:
+        """
+        :return list[str] | None: The asset codes to subscribe to, None for every asset.
+        :raises ValueError: If an asset code is not the code of a reported asset.
+        """
+        return [asset.code for asset in cls._parse_assets(request)] if request.query.get("assets") else None
+
+    @classmethod
+    def _parse_view(cls, request: web.Request) -> str:
+        view: str = request.query.get("view", "full")
+        if view not in cls._VIEWS:
+            raise ValueError(f"Unknown view {view}, expected one of {', '.join(cls._VIEWS)}.")
+        return view
+
+    @staticmethod
+    def _parse_date(request: web.Request, name: str) -> str:
+        if name not in request.query:
+            raise ValueError(f"The {name} date is required, e.g. {name}=2024-01-02.")
+        return date.fromisoformat(request.query[name]).isoformat()
+
+    @staticmethod
+    def _parse_sentiment(request: web.Request) -> Reading | None:
+        if "sentiment" not in request.query:
+            return None
+        try:
+            return Reading[request.query["sentiment"].lower()]
+        except KeyError:
+            raise ValueError(
+                f"Unknown sentiment {request.query["sentiment"]}, expected one of "
+                f"{', '.join(reading.name for reading in Reading)}."
+            ) from None
+
+    @staticmethod
+    def _parse_cot_index(request: web.Request, name: str, default: int) -> int:
+        cot_index: int = int(request.query.get(name, default))
+        if not 0 <= cot_index <= 100:
+            raise ValueError(f"The {name} must be between 0 and 100.")
+        return cot_index
+
+
+async def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Serves COT reports over HTTP.")
+    parser.add_argument("--host", default=None, help="The host to listen on.")
+    parser.add_argument("--port", type=int, default=None, help="The port to listen on.")
+    arguments: argparse.Namespace = parser.parse_args()
+
+    await MySQLPoolManager.get_instance().warm_up()
+    cot_repository: CachingCOTRepository = CachingCOTRepository(MySQLRepository())
+    cot_report_writer: COTReportWriteBehindQueue = COTReportWriteBehindQueue(cot_repository=cot_repository)
+    broadcaster: COTReleaseBroadcaster = COTReleaseBroadcaster()
+    cot_service: SocrataService = SocrataService(
+        cot_repository=cot_repository, cot_report_writer=cot_report_writer, broadcaster=broadcaster
+    )
+    server: COTAPIServer = COTAPIServer(
+        cot_service=cot_service,
+        cot_repository=cot_repository,
+        broadcaster=broadcaster,
+        snapshot_store=COTSnapshotStore(cot_service=cot_service)
+    )
+    cot_service.add_restatement_listener(server.on_restatement)
+    url: str = await server.start(arguments.host, arguments.port)
+    print(f"Serving COT reports at {url}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        await cot_report_writer.close()
+        await cot_repository.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,31 +1,96 @@
 import asyncio
-from typing import Any
-from aiohttp import ClientResponseError
+from datetime import date, timedelta
+from typing import Any, Callable, Final
 from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
 from features.sentiment.cot.connections.api.client.socrata_client import SocrataClient
 from features.sentiment.cot.core.interfaces.cot_service import COTService
 from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
+from features.sentiment.cot.tools.cot_release_broadcaster import COTReleaseBroadcaster
 from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.cot_report_write_behind_queue import COTReportWriteBehindQueue
+from features.sentiment.cot.tools.cot_restatement_reconciler import COTRestatementReconciler
+from features.sentiment.cot.tools.percentile_rank_index import PercentileRankIndex
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from shared.connections.database.mysql_pool_manager import MySQLPoolManager
 from shared.connections.database.mysql_repository import MySQLRepository
 from shared.models.asset import Asset
 from shared.models.reported_assets import ReportedAssets
 from shared.utils.logger import Logger
+from shared.utils.tracer import Tracer
 import urllib
 
 
 class SocrataService(COTService):
-    def __init__(self, cot_repository: COTRepository):
-        self._client: SocrataClient = SocrataClient()
+    _DEFAULT_RESTATEMENT_LOOKBACK_WEEKS: Final[int] = 8
+    _MAX_RECORDS_PER_REQUEST: Final[int] = 50_000
+
+    def __init__(
+            self, 
+            cot_repository: COTRepository, 
+            cot_report_writer: COTReportWriteBehindQueue | None = None,
+            stream_batch_size: int | None = None,
+            client: SocrataClient | None = None,
+            cot_index_state: COTIndexState | None = None,
+            percentile_rank_index: PercentileRankIndex | None = None,
+            broadcaster: COTReleaseBroadcaster | None = None
+        ):
+        """
+        :param cot_repository: The repository the COT reports are fetched from and stored in.
+        :type cot_repository: COTRepository
+        :param cot_report_writer: If given, reports fetched from the Socrata API are stored in the background through
+        this queue instead of being written before they are returned.
+        :type cot_report_writer: COTReportWriteBehindQueue
+        :param stream_batch_size: If given, responses of the Socrata API are decoded while they are downloaded and 
+        converted into COT reports in batches of this size.
+        :type stream_batch_size: int
+        :param client: The client used to reach the Socrata API, e.g. one pointing to a local stand-in.
+        :type client: SocrataClient
+        :param cot_index_state: The rolling COT Index state the fetched reports are applied to, defaults to the one of
+        the state file.
+        :type cot_index_state: COTIndexState
+        :param percentile_rank_index: The index the fetched reports are ranked with, built from the repository on first
+        use.
+        :type percentile_rank_index: PercentileRankIndex
+        :param broadcaster: If given, the latest reports are pushed to its subscribers once stored: right away when
+        they are read from the repository, once the writer wrote them when they are fetched from the Socrata API.
+        Restated reports of the latest release are pushed again.
+        :type broadcaster: COTReleaseBroadcaster
+        """
+        self._client: SocrataClient = client or SocrataClient()
         self._cot_repository = cot_repository
+        self._cot_report_writer = cot_report_writer
+        self._stream_batch_size = stream_batch_size
         self._cot_report_presenter: COTReportPresenter = COTReportPresenter()
+        self._cot_index_state: COTIndexState = cot_index_state or COTIndexState()
+        self._percentile_rank_index: PercentileRankIndex = percentile_rank_index or PercentileRankIndex()
+        self._broadcaster = broadcaster
+        self._restatement_listeners: list[Callable[[list[COTReport]], None]] = []
+        if broadcaster is not None:
+            self.add_restatement_listener(broadcaster.publish_restatements)
+
+    def add_restatement_listener(self, listener: Callable[[list[COTReport]], None]) -> None:
+        """
+        :param listener: Called with the reports written by reconcile_restatements, e.g. to invalidate a cache of the
+        latest release.
+        :type listener: Callable[[list[COTReport]], None]
+        """
+        self._restatement_listeners.append(listener)
 
+    @Tracer.traced("SocrataService.fetch_latest_report")
     async def fetch_latest_report(self, assets: list[Asset]) -> list[COTReport]:
+        Tracer.current_span().set_attribute("n_assets", len(assets))
         try:
             from_repository: list[tuple[Any]] = await self._cot_repository.fetch_cot_reports_by(
                 asset_codes=list(map(lambda asset: asset.code, assets)),
                 released_dates=[self.calculate_last_report_release_date()]
             )
-            return self._cot_report_presenter.from_list(from_repository)
+            Tracer.current_span().set_attribute("source", "repository")
+            stored_reports: list[COTReport] = self._cot_report_presenter.from_list(from_repository)
+            if self._broadcaster is not None:
+                # Published again by every fetch, the broadcaster ignores releases it already published.
+                self._broadcaster.publish(stored_reports)
+            return stored_reports
         except LookupError:
             Logger.log(
                 SocrataClient.__name__, 
@@ -40,9 +105,38 @@ class SocrataService(COTService):
             }
             query: str = " AND ".join([f"{key} {value}" for key, value in query_dict.items()])
             params: dict[str, str] = {"$where": query}
-            from_api: list[dict[str, Any]] = await self._client.fetch_latest_report(params=params)
-            cot_reports: list[COTReport] = await self._cot_report_presenter.from_dicts(from_api)
-            await self._cot_repository.insert_cot_reports(cot_reports)
+            Tracer.current_span().set_attribute("source", "socrata")
+            await self._cot_index_state.load_or_recover(
+                self._cot_repository,
+                asset_codes=[asset.code for asset in assets],
+                end_date=self.calculate_last_report_release_date()
+            )
+            await self._percentile_rank_index.build(
+                self._cot_repository,
+                asset_codes=[asset.code for asset in assets],
+                end_date=self.calculate_last_report_release_date()
+            )
+            cot_reports: list[COTReport]
+            if self._stream_batch_size is not None:
+                cot_reports = await self._cot_report_presenter.from_dict_stream(
+                    self._client.stream_latest_report(params=params, batch_size=self._stream_batch_size),
+                    self._cot_index_state
+                )
+            else:
+                from_api: list[dict[str, Any]] = await self._client.fetch_latest_report(params=params)
+                cot_reports = await self._cot_report_presenter.from_dicts(from_api, self._cot_index_state)
+            with Tracer.span("PercentileRankIndex.rank", n_reports=len(cot_reports)):
+                self._percentile_rank_index.rank(cot_reports)
+            if self._cot_report_writer is not None:
+                # The writer publishes the reports once it stored them, so subscribers never see unstored reports.
+                async with Tracer.span("COTReportWriteBehindQueue.put"):
+                    await self._cot_report_writer.put(
+                        cot_reports, on_written=self._broadcaster.publish if self._broadcaster is not None else None
+                    )
+            else:
+                await self._cot_repository.insert_cot_reports(cot_reports)
+                if self._broadcaster is not None:
+                    self._broadcaster.publish(cot_reports)
             return cot_reports
         except Exception as error:
             Logger.log(
@@ -52,13 +146,75 @@ class SocrataService(COTService):
                 )
             raise
     
-    async def fetch_historical_report(self, assets: list[Asset], start_date: int, n_weeks: int) -> list[COTReport]:
-        raise NotImplementedError
+    @Tracer.traced("SocrataService.fetch_historical_report")
+    async def fetch_historical_report(self, assets: list[Asset], start_date: str, n_weeks: int) -> list[COTReport]:
+        """
+        The reports are returned as published, without their COT Index.
+        """
+        end_date: date = date.fromisoformat(start_date)
+        assets_cftc_codes: list[str] = [f"'{asset.cftc_code}'" for asset in assets]
+        query: str = " AND ".join(
+            [
+                f"report_date_as_yyyy_mm_dd > '{end_date - timedelta(weeks=n_weeks)}T00:00:00.000'",
+                f"report_date_as_yyyy_mm_dd <= '{end_date}T00:00:00.000'",
+                f"cftc_contract_market_code IN ({', '.join(assets_cftc_codes)})"
+            ]
+        )
+        from_api: list[dict[str, Any]] = await self._client.fetch_latest_report(
+            params={
+                "$where": query,
+                "$order": "report_date_as_yyyy_mm_dd ASC",
+                "$limit": self._MAX_RECORDS_PER_REQUEST
+            }
+        )
+        built: list[COTReport | None] = [
+            self._cot_report_presenter._build_from_dict(record, suppress_error=True) for record in from_api
+        ]
+        return [report for report in built if report is not None]
+
+    @Tracer.traced("SocrataService.reconcile_restatements")
+    async def reconcile_restatements(
+            self,
+            assets: list[Asset],
+            n_weeks: int = _DEFAULT_RESTATEMENT_LOOKBACK_WEEKS
+        ) -> list[COTReport]:
+        """
+        Fetches the reports of the last weeks again and writes the ones the CFTC revised since they were stored, along
+        with the COT Index and percentile ranks they affect. The restatement listeners are called with the written
+        reports.
+
+        :param assets: A list of assets.
+        :type assets: list[Asset]
+        :param n_weeks: The number of past weekly reports to check for revisions.
+        :type n_weeks: int
+        :return list[COTReport]: The reports that were written.
+        """
+        if self._cot_report_writer is not None:
+            await self._cot_report_writer.flush()
+        published_reports: list[COTReport] = await self.fetch_historical_report(
+            assets, self.calculate_last_report_release_date(), n_weeks
+        )
+        reconciler: COTRestatementReconciler = COTRestatementReconciler(
+            self._cot_repository,
+            self._cot_index_state,
+            percentile_rank_index=self._percentile_rank_index,
+            listeners=self._restatement_listeners
+        )
+        return await reconciler.reconcile(published_reports)
 
 
 async def main():
-    service: SocrataService = SocrataService(cot_repository=MySQLRepository())
-    latest_cot_reports: list[COTReport] = await service.fetch_latest_report(ReportedAssets.all)
+    await MySQLPoolManager.get_instance().warm_up()
+    cot_repository: CachingCOTRepository = CachingCOTRepository(MySQLRepository())
+    cot_report_writer: COTReportWriteBehindQueue = COTReportWriteBehindQueue(cot_repository=cot_repository)
+    service: SocrataService = SocrataService(cot_repository=cot_repository, cot_report_writer=cot_report_writer)
+    try:
+        latest_cot_reports: list[COTReport] = await service.fetch_latest_report(ReportedAssets.all)
+        restated_reports: list[COTReport] = await service.reconcile_restatements(ReportedAssets.all)
+        print(f"Rewrote {len(restated_reports)} reports")
+    finally:
+        await cot_report_writer.close()
+        await cot_repository.disconnect()
     for report in latest_cot_reports:
         print(f"asset: {report.asset_code}")
         print(f"reported_dated: {report.reported_date}")
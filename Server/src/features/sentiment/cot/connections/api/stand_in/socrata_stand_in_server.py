@@ -0,0 +1,374 @@
+import argparse
+import asyncio
+from collections import deque
+from datetime import date, timedelta
+import json
+import os
+import random
+import re
+import time
+from typing import Any, Callable, Final
+from aiohttp import web
+from features.sentiment.cot.connections.api.client.socrata_client import SocrataClient
+from shared.utils.logger import Logger
+from shared.utils.util import Util
+
+
+class SocrataQuery:
+    """
+    Applies the subset of the Socrata query language (SoQL) used by the Socrata client to a list of records: $where
+    with AND-ed comparisons (=, !=, <, <=, >, >=, IN), $select, $order, $limit and $offset.
+
+    Socrata serves numeric columns as strings, but compares and orders them as numbers. Columns compared to a number
+    literal are therefore coerced to numbers first, and a value that isn't numeric doesn't match. $order sorts numeric
+    values as numbers, before any text values.
+    """
+    _DEFAULT_LIMIT: Final[int] = 1000
+    _CONDITION_PATTERN: Final[re.Pattern] = re.compile(
+        r"^\s*(?P<field>\w+)\s*(?P<operator>>=|<=|!=|=|>|<|IN\b)\s*(?P<value>.+?)\s*$",
+        re.IGNORECASE
+    )
+    _VALUE_PATTERN: Final[re.Pattern] = re.compile(r"'((?:[^']|'')*)'|(-?\d+(?:\.\d+)?)")
+    _OPERATORS: Final[dict[str, Callable[[Any, Any], bool]]] = {
+        "=": lambda left, right: left == right,
+        "!=": lambda left, right: left != right,
+        "<": lambda left, right: left < right,
+        "<=": lambda left, right: left <= right,
+        ">": lambda left, right: left > right,
+        ">=": lambda left, right: left >= right
+    }
+    _NUMBER_PATTERN: Final[re.Pattern] = re.compile(r"\s*-?\d+(?:\.\d+)?\s*")
+
+    def __init__(self, params: dict[str, str]):
+        """
+        :param params: The query parameters of the request.
+        :type params: dict[str, str]
+        :raises ValueError: If a parameter can't be parsed.
+        """
+        self._conditions: list[tuple[str, str, Any]] = self._parse_where(params.get("$where", ""))
+        self._select: list[str] | None = [
+            field.strip() for field in params["$select"].split(",")
+        ] if params.get("$select") else None
+        self._order: list[tuple[str, bool]] = [
+            (parts[0], len(parts) > 1 and parts[1].upper() == "DESC")
+            for parts in (clause.split() for clause in params.get("$order", "").split(",") if clause.strip())
+        ]
+        self._limit: int = int(params.get("$limit", self._DEFAULT_LIMIT))
+        self._offset: int = int(params.get("$offset", 0))
+
+    def apply(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        :param records: The records to query.
+        :type records: list[dict[str, Any]]
+        :return list[dict[str, Any]]: The records matching the query.
+        """
+        results: list[dict[str, Any]] = [record for record in records if self._matches(record)]
+        for field, descending in reversed(self._order):
+            results.sort(key=lambda record: self._sort_key(record.get(field, "")), reverse=descending)
+        results = results[self._offset: self._offset + self._limit]
+        if self._select is not None:
+            results = [{field: record[field] for field in self._select if field in record} for record in results]
+        return results
+
+    def _matches(self, record: dict[str, Any]) -> bool:
+        for field, operator, value in self._conditions:
+            if field not in record:
+                return False
+            if operator == "IN":
+                if not any(self._compare(record[field], "=", candidate) for candidate in value):
+                    return False
+            elif not self._compare(record[field], operator, value):
+                return False
+        return True
+
+    @classmethod
+    def _compare(cls, left: Any, operator: str, right: Any) -> bool:
+        if isinstance(right, float):
+            left = cls._to_number(left)
+            if left is None:
+                return False
+        return cls._OPERATORS[operator](left, right)
+
+    @classmethod
+    def _sort_key(cls, value: Any) -> tuple[int, Any]:
+        number: float | None = cls._to_number(value)
+        return (0, number) if number is not None else (1, str(value))
+
+    @classmethod
+    def _to_number(cls, value: Any) -> float | None:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        if isinstance(value, str) and cls._NUMBER_PATTERN.fullmatch(value):
+            return float(value)
+        return None
+
+    @classmethod
+    def _parse_where(cls, where: str) -> list[tuple[str, str, Any]]:
+        conditions: list[tuple[str, str, Any]] = []
+        for clause in re.split(r"\s+AND\s+", where.strip(), flags=re.IGNORECASE) if where.strip() else []:
+            match: re.Match | None = cls._CONDITION_PATTERN.match(clause)
+            if match is None:
+                raise ValueError(f"Unsupported $where clause: {clause}")
+            operator: str = match["operator"].upper()
+            values: list[Any] = [
+                quoted.replace("''", "'") if number == "" else float(number)
+                for quoted, number in cls._VALUE_PATTERN.findall(match["value"])
+            ]
+            if operator == "IN":
+                conditions.append((match["field"], operator, set(values)))
+            elif len(values) == 1:
+                conditions.append((match["field"], operator, values[0]))
+            else:
+                raise ValueError(f"Unsupported $where value: {match['value']}")
+        return conditions
+
+
+class SocrataStandInServer:
+    """
+    Local stand-in for the Socrata API that serves recorded legacy COT report fixtures.
+
+    It understands the queries sent by the Socrata client and can inject latency, throttling (429 with a Retry-After
+    header) and server errors, so the fetch path can be load tested offline and reproducibly.
+
+    Fixtures are recorded from the live API with the record command into data/cot/fixtures/socrata_legacy_reports.json,
+    or written by SyntheticCOTData.write_fixtures. Without a fixture file, synthetic reports of every reported asset up
+    to the last Tuesday are served.
+    """
+    _DEFAULT_FIXTURE_FILE: Final[str] = f"{Util.get_root_dir()}/data/cot/fixtures/socrata_legacy_reports.json"
+    _DEFAULT_SYNTHETIC_WEEKS: Final[int] = 160
+    _DATASET_PATH: Final[str] = "/resource/6dca-aqww.json"
+
+    def __init__(
+            self,
+            records: list[dict[str, Any]],
+            latency: float = 0.0,
+            latency_jitter: float = 0.0,
+            requests_per_second: float | None = None,
+            error_rate: float = 0.0,
+            seed: int | None = None
+        ):
+        """
+        :param records: The records served by the stand-in.
+        :type records: list[dict[str, Any]]
+        :param latency: The number of seconds each response is delayed by.
+        :type latency: float
+        :param latency_jitter: The maximum number of seconds randomly added to the latency.
+        :type latency_jitter: float
+        :param requests_per_second: If given, requests over this rate are throttled with a 429 response.
+        :type requests_per_second: float
+        :param error_rate: The fraction of requests answered with a 500 response.
+        :type error_rate: float
+        :param seed: The seed of the random jitter and errors, for reproducible runs.
+        :type seed: int
+        """
+        self._records = records
+        self._latency = latency
+        self._latency_jitter = latency_jitter
+        self._requests_per_second = requests_per_second
+        self._error_rate = error_rate
+        self._random: random.Random = random.Random(seed)
+        self._recent_requests: deque[float] = deque()
+        self._runner: web.AppRunner | None = None
+        self.url: str = ""
+        self.requests: int = 0
+        self.throttled: int = 0
+        self.errors: int = 0
+
+    @classmethod
+    def from_fixture_file(cls, fixture_file: str | None = None, **kwargs: Any) -> "SocrataStandInServer":
+        """
+        :param fixture_file: The JSON file holding the recorded records.
+        :type fixture_file: str
+        :return SocrataStandInServer: A stand-in serving the records of the fixture file.
+        """
+        with open(fixture_file or cls._DEFAULT_FIXTURE_FILE, "r") as fixtures:
+            return cls(json.load(fixtures), **kwargs)
+
+    @classmethod
+    def from_synthetic_data(
+            cls,
+            n_weeks: int = _DEFAULT_SYNTHETIC_WEEKS,
+            seed: int | None = None,
+            **kwargs: Any
+        ) -> "SocrataStandInServer":
+        """
+        :param n_weeks: The number of weekly reports of each reported asset, the newest one reported last Tuesday.
+        :type n_weeks: int
+        :param seed: The seed of the synthetic data, and of the random jitter and errors.
+        :type seed: int
+        :return SocrataStandInServer: A stand-in serving synthetic records of every reported asset.
+        """
+        from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+        from shared.models.reported_assets import ReportedAssets
+        today: date = date.today()
+        data: SyntheticCOTData = SyntheticCOTData(
+            n_assets=len(ReportedAssets.all),
+            n_weeks=n_weeks,
+            seed=seed or 0,
+            last_date=today - timedelta(days=(today.weekday() - 1) % 7)
+        )
+        return cls(data.to_records(), seed=seed, **kwargs)
+
+    @classmethod
+    def from_default_fixtures(cls, **kwargs: Any) -> "SocrataStandInServer":
+        """
+        :return SocrataStandInServer: A stand-in serving the default fixture file if it was recorded, synthetic records
+        otherwise.
+        """
+        if os.path.exists(cls._DEFAULT_FIXTURE_FILE):
+            return cls.from_fixture_file(cls._DEFAULT_FIXTURE_FILE, **kwargs)
+        Logger.log(
+            name=cls.__name__,
+            level=Logger.INFO,
+            message=f"No fixtures recorded in {cls._DEFAULT_FIXTURE_FILE}, serving synthetic reports."
+        )
+        return cls.from_synthetic_data(**kwargs)
+
+    def create_app(self) -> web.Application:
+        """
+        :return web.Application: The application serving the dataset.
+        """
+        app: web.Application = web.Application()
+        app.router.add_get(self._DATASET_PATH, self._handle_query)
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        Starts serving the records.
+
+        :param port: The port to listen on, a free port is picked if 0.
+        :type port: int
+        :return str: The URL of the dataset, to be given to the Socrata client as its base URL.
+        """
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        site: web.TCPSite = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_port: int = self._runner.addresses[0][1]
+        self.url = f"http://{host}:{bound_port}{self._DATASET_PATH}"
+        return self.url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self) -> "SocrataStandInServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.stop()
+
+    async def _handle_query(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        retry_after: float | None = self._check_throttle()
+        if retry_after is not None:
+            self.throttled += 1
+            return web.json_response(
+                {"error": True, "message": "Too many requests"},
+                status=429,
+                headers={"Retry-After": f"{retry_after:.3f}"}
+            )
+        delay: float = self._latency + self._random.uniform(0, self._latency_jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if self._random.random() < self._error_rate:
+            self.errors += 1
+            return web.json_response({"error": True, "message": "Injected server error"}, status=500)
+        try:
+            results: list[dict[str, Any]] = SocrataQuery(dict(request.query)).apply(self._records)
+        except ValueError as error:
+            return web.json_response({"error": True, "message": str(error)}, status=400)
+        return web.json_response(results)
+
+    def _check_throttle(self) -> float | None:
+        """
+        :return float | None: The number of seconds until a request is allowed again, None if it is allowed now.
+        """
+        if self._requests_per_second is None:
+            return None
+        now: float = time.monotonic()
+        while self._recent_requests and now - self._recent_requests[0] >= 1:
+            self._recent_requests.popleft()
+        if len(self._recent_requests) >= self._requests_per_second:
+            return 1 - (now - self._recent_requests[0])
+        self._recent_requests.append(now)
+        return None
+
+
+async def record_fixtures(where: str, fixture_file: str) -> None:
+    """
+    Records the response of the live Socrata API to the given query into a fixture file.
+
+    :param where: The $where clause of the query.
+    :type where: str
+    :param fixture_file: The file the records are written to.
+    :type fixture_file: str
+    """
+    records: list[dict[str, Any]] = await SocrataClient().fetch_latest_report(
+        params={"$where": where, "$limit": 50_000}
+    )
+    os.makedirs(os.path.dirname(fixture_file), exist_ok=True)
+    with open(fixture_file, "w") as fixtures:
+        json.dump(records, fixtures)
+    Logger.log(
+        name=SocrataStandInServer.__name__,
+        level=Logger.INFO,
+        message=f"Recorded {len(records)} records into {fixture_file}."
+    )
+
+
+async def serve(arguments: argparse.Namespace) -> None:
+    options: dict[str, Any] = {
+        "latency": arguments.latency,
+        "latency_jitter": arguments.jitter,
+        "requests_per_second": arguments.rate,
+        "error_rate": arguments.error_rate,
+        "seed": arguments.seed
+    }
+    server: SocrataStandInServer
+    if arguments.fixtures:
+        server = SocrataStandInServer.from_fixture_file(arguments.fixtures, **options)
+    elif arguments.weeks is not None:
+        server = SocrataStandInServer.from_synthetic_data(arguments.weeks, **options)
+    else:
+        server = SocrataStandInServer.from_default_fixtures(**options)
+    url: str = await server.start(port=arguments.port)
+    print(f"Serving the Socrata stand-in at {url} (set SOCRATA_BASE_URL to use it)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+def main():
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description="Local stand-in for the Socrata API.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser: argparse.ArgumentParser = commands.add_parser("serve", help="Serve recorded fixtures.")
+    serve_parser.add_argument(
+        "--fixtures",
+        default=None,
+        help="The fixture file to serve, e.g. recorded with the record command or written by "
+             "SyntheticCOTData.write_fixtures. Defaults to data/cot/fixtures/socrata_legacy_reports.json, or to "
+             "synthetic reports if it was not recorded."
+    )
+    serve_parser.add_argument(
+        "--weeks", type=int, default=None, help="Serve this many weeks of synthetic reports instead of fixtures."
+    )
+    serve_parser.add_argument("--port", type=int, default=8090)
+    serve_parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to each response.")
+    serve_parser.add_argument("--jitter", type=float, default=0.0, help="Maximum random seconds added to the latency.")
+    serve_parser.add_argument("--rate", type=float, default=None, help="Requests per second before throttling.")
+    serve_parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 500.")
+    serve_parser.add_argument("--seed", type=int, default=None)
+    record_parser: argparse.ArgumentParser = commands.add_parser("record", help="Record fixtures from the live API.")
+    record_parser.add_argument("--where", default="report_date_as_yyyy_mm_dd >= '2021-01-01T00:00:00.000'")
+    record_parser.add_argument("--output", default=SocrataStandInServer._DEFAULT_FIXTURE_FILE)
+    arguments: argparse.Namespace = parser.parse_args()
+    if arguments.command == "serve":
+        asyncio.run(serve(arguments))
+    else:
+        asyncio.run(record_fixtures(arguments.where, arguments.output))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import csv
+from datetime import date, timedelta
+import json
+import os
+from typing import TYPE_CHECKING, Any, Final
+import numpy as np
+from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.core.models.noncommercial_traders import NonCommercialTraders
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from shared.models.asset import Asset
+from shared.models.reported_assets import ReportedAssets
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class SyntheticCOTData:
+    """
+    Generates legacy COT reports of reported assets over consecutive weeks, in the shapes the presenter reads: CFTC
+    text/CSV files, Socrata API records and repository rows. The Socrata stand-in serves them when no fixtures were
+    recorded, and the benchmarks run on them.
+
+    The positions of each asset follow a random walk from a seeded generator, so the same parameters always generate
+    the same data and benchmark results can be compared across commits.
+    """
+    _DEFAULT_LAST_DATE: Final[date] = date(2024, 12, 31)
+    _SOCRATA_FIELDS: Final[list[str]] = [
+        "cftc_contract_market_code",
+        "report_date_as_yyyy_mm_dd",
+        "open_interest_all",
+        "noncomm_positions_long_all",
+        "noncomm_positions_short_all",
+        "comm_positions_long_all",
+        "comm_positions_short_all",
+        "change_in_open_interest_all",
+        "change_in_noncomm_long_all",
+        "change_in_noncomm_short_all",
+        "change_in_comm_long_all",
+        "change_in_comm_short_all"
+    ]
+
+    def __init__(self, n_assets: int, n_weeks: int, seed: int = 0, last_date: date = _DEFAULT_LAST_DATE):
+        """
+        :param n_assets: The number of assets, taken in order from the reported assets.
+        :type n_assets: int
+        :param n_weeks: The number of consecutive weekly reports of each asset.
+        :type n_weeks: int
+        :param seed: The seed of the random walk.
+        :type seed: int
+        :param last_date: The reported date of the newest reports, a Tuesday.
+        :type last_date: date
+        :raises ValueError: If there are fewer reported assets than requested, reports can only be built for assets the
+        presenter can resolve by CFTC code.
+        """
+        if not 0 < n_assets <= len(ReportedAssets.all):
+            raise ValueError(f"The number of assets should be from 1 to {len(ReportedAssets.all)}, got {n_assets}.")
+        self.assets: list[Asset] = ReportedAssets.all[: n_assets]
+        self.n_weeks = n_weeks
+        self.dates: list[str] = [str(last_date - timedelta(weeks=week)) for week in range(n_weeks - 1, -1, -1)]
+        self._columns: np.ndarray = self._generate(np.random.default_rng(seed))
+
+    @property
+    def n_reports(self) -> int:
+        return len(self.assets) * self.n_weeks
+
+    def _generate(self, rng: np.random.Generator) -> np.ndarray:
+        """
+        :return np.ndarray: The fields of each report, in the order of the Socrata fields, shaped weeks by assets by
+        fields. The date and the CFTC code are filled in when the data is shaped.
+        """
+        shape: tuple[int, int] = (self.n_weeks, len(self.assets))
+        scale: np.ndarray = rng.integers(10_000, 1_000_000, size=len(self.assets))
+
+        def random_walk() -> np.ndarray:
+            steps: np.ndarray = rng.normal(0, 0.05, size=shape) * scale
+            return np.maximum(np.cumsum(steps, axis=0) + scale, 1).astype(np.int64)
+
+        noncommercial_long, noncommercial_short = random_walk(), random_walk()
+        commercial_long, commercial_short = random_walk(), random_walk()
+        open_interest: np.ndarray = noncommercial_long + noncommercial_short + commercial_long + commercial_short
+
+        def changes(positions: np.ndarray) -> np.ndarray:
+            return np.diff(positions, axis=0, prepend=positions[:1])
+
+        fields: list[np.ndarray] = [
+            open_interest, noncommercial_long, noncommercial_short, commercial_long, commercial_short,
+            changes(open_interest), changes(noncommercial_long), changes(noncommercial_short),
+            changes(commercial_long), changes(commercial_short)
+        ]
+        return np.stack(fields, axis=2)
+
+    def _iterate(self) -> list[tuple[Asset, str, list[int]]]:
+        """
+        :return list[tuple[Asset, str, list[int]]]: The asset, reported date and numeric fields of each report, in
+        chronological order.
+        """
+        values: list[list[list[int]]] = self._columns.tolist()
+        return [
+            (asset, reported_date, values[week][column])
+            for week, reported_date in enumerate(self.dates)
+            for column, asset in enumerate(self.assets)
+        ]
+
+    def to_dataframe(self) -> "pd.DataFrame":
+        """
+        :return pd.DataFrame: The reports as read from a CFTC text/CSV file.
+        """
+        import pandas as pd
+        columns: list[str] = COTReportPresenter._REQUIRED_DATAFRAME_COLUMNS
+        return pd.DataFrame(
+            [[asset.cftc_code, reported_date, *values] for asset, reported_date, values in self._iterate()],
+            columns=columns
+        )
+
+    def to_records(self) -> list[dict[str, Any]]:
+        """
+        :return list[dict[str, Any]]: The reports as returned by the Socrata API, numbers are strings.
+        """
+        return [
+            dict(
+                zip(
+                    self._SOCRATA_FIELDS,
+                    [asset.cftc_code, f"{reported_date}T00:00:00.000", *map(str, values)]
+                )
+            )
+            for asset, reported_date, values in self._iterate()
+        ]
+
+    def to_reports(self) -> list[COTReport]:
+        """
+        :return list[COTReport]: The reports, without their COT Index.
+        """
+        reports: list[COTReport] = []
+        for asset, reported_date, values in self._iterate():
+            (
+                open_interest, noncommercial_long, noncommercial_short, commercial_long, commercial_short,
+                open_interest_change, noncommercial_long_change, noncommercial_short_change,
+                commercial_long_change, commercial_short_change
+            ) = values
+            reports.append(
+                COTReport(
+                    reported_date=reported_date,
+                    asset_code=asset.code,
+                    commercials=CommercialTraders(
+                        commercial_long, commercial_long_change, commercial_short, commercial_short_change, None
+                    ),
+                    noncommercials=NonCommercialTraders(
+                        noncommercial_long, noncommercial_long_change, noncommercial_short, noncommercial_short_change
+                    ),
+                    open_interest=open_interest,
+                    open_interest_change=open_interest_change,
+                    sentiment_threshold=SentimentThresholds.get_configured().for_asset(asset.code)
+                )
+            )
+        return reports
+
+    def to_rows(self) -> list[tuple]:
+        """
+        :return list[tuple]: The reports as fetched from the repository.
+        """
+        return [
+            (report_id, report.asset_code, report.reported_date, json.dumps(report.to_dict(verbose=True, enhanced=True)))
+            for report_id, report in enumerate(self.to_reports(), start=1)
+        ]
+
+    def write_fixtures(self, directory: str) -> list[str]:
+        """
+        Writes the reports as a CFTC text file and as a Socrata API response. Text fields are quoted like in CFTC files,
+        read the CFTC code as a str to keep its leading zeros, e.g. pd.read_csv(file, dtype={"CFTC Contract Market Code":
+        str}).
+
+        :param directory: The directory to write the fixtures in.
+        :type directory: str
+        :return list[str]: The paths of the written files.
+        """
+        os.makedirs(directory, exist_ok=True)
+        name: str = f"synthetic_cot_reports_{len(self.assets)}x{self.n_weeks}"
+        text_file: str = os.path.join(directory, f"{name}.txt")
+        json_file: str = os.path.join(directory, f"{name}.json")
+        self.to_dataframe().to_csv(text_file, index=False, quoting=csv.QUOTE_NONNUMERIC)
+        with open(json_file, "w") as file:
+            json.dump(self.to_records(), file)
+        return [text_file, json_file]
+
+
+def main():
+    data: SyntheticCOTData = SyntheticCOTData(n_assets=3, n_weeks=4)
+    print(data.to_dataframe())
+    print(json.dumps(data.to_records()[0], indent=4))
+    print(data.to_reports()[-1].describe(verbose=True, enhanced=True))
+
+
+if __name__ == "__main__":
+    main()
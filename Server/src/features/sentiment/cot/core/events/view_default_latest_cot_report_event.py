@@ -1,11 +1,16 @@
 import asyncio
+from typing import TextIO
 from features.sentiment.cot.connections.api.service.socrata_service import SocrataService
-from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
 from features.sentiment.cot.core.interfaces.cot_service import COTService
 from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_report_write_behind_queue import COTReportWriteBehindQueue
+from features.sentiment.cot.tools.cot_snapshot_store import COTReleaseSnapshot, COTSnapshotStore
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from shared.connections.database.mysql_pool_manager import MySQLPoolManager
 from shared.connections.database.mysql_repository import MySQLRepository
 from shared.models.asset import Asset
 from shared.models.reported_assets import ReportedAssets
+from shared.utils.profiler import Profiler
 
 
 class ViewDefaultLatestCOTReportsEvent:
@@ -14,21 +19,48 @@ class ViewDefaultLatestCOTReportsEvent:
     commercial and non commercial traders and changes from the previous week report.
     """
 
-    def __init__(self, cot_service: COTService) -> None:
+    def __init__(self, cot_service: COTService, snapshot_store: COTSnapshotStore | None = None) -> None:
+        """
+        :param cot_service: The service the latest reports are fetched from.
+        :type cot_service: COTService
+        :param snapshot_store: If given, the reports are described from the snapshot of the latest release instead of
+        being fetched and described on each execution.
+        :type snapshot_store: COTSnapshotStore
+        """
         self._cot_service = cot_service
+        self._snapshot_store = snapshot_store
 
-    async def execute(self, assets: list[Asset]) -> None:
+    @Profiler.profiled("ViewDefaultLatestCOTReportsEvent.execute")
+    async def execute(self, assets: list[Asset], output: TextIO | None = None) -> None:
+        """
+        :param output: The stream the reports are written to, defaults to the standard output.
+        :type output: TextIO
+        """
+        if self._snapshot_store is not None:
+            snapshot: COTReleaseSnapshot = await self._snapshot_store.get_latest()
+            for asset in filter(lambda asset: snapshot.has_asset(asset.code), assets):
+                print(snapshot.to_text(asset.code, "default"), end="\n"*2, file=output)
+            return
         latest_reports: list[COTReport] = await self._cot_service.fetch_latest_report(assets)
         for report in latest_reports:
             report_description: str = report.describe(verbose=True, enhanced=False)
-            print(report_description, end="\n"*2)
+            print(report_description, end="\n"*2, file=output)
 
 
 async def main():
-    cot_repository: COTRepository = MySQLRepository()
-    cot_service: COTService = SocrataService(cot_repository=cot_repository)
-    event: ViewDefaultLatestCOTReportsEvent = ViewDefaultLatestCOTReportsEvent(cot_service=cot_service)
-    await event.execute(ReportedAssets.all)
+    Profiler.configure_from_argv()
+    await MySQLPoolManager.get_instance().warm_up()
+    cot_repository: CachingCOTRepository = CachingCOTRepository(MySQLRepository())
+    cot_report_writer: COTReportWriteBehindQueue = COTReportWriteBehindQueue(cot_repository=cot_repository)
+    cot_service: COTService = SocrataService(cot_repository=cot_repository, cot_report_writer=cot_report_writer)
+    event: ViewDefaultLatestCOTReportsEvent = ViewDefaultLatestCOTReportsEvent(
+        cot_service=cot_service, snapshot_store=COTSnapshotStore(cot_service=cot_service)
+    )
+    try:
+        await event.execute(ReportedAssets.all)
+    finally:
+        await cot_report_writer.close()
+        await cot_repository.disconnect()
 
 if __name__ == "__main__":
     asyncio.run(main())
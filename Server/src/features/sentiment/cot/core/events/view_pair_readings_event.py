@@ -0,0 +1,48 @@
+import asyncio
+from typing import TextIO
+from features.sentiment.cot.connections.api.service.socrata_service import SocrataService
+from features.sentiment.cot.core.interfaces.cot_service import COTService
+from features.sentiment.cot.tools.cot_report_write_behind_queue import COTReportWriteBehindQueue
+from features.sentiment.cot.tools.pair_reading_matrix import PairReadingCache, PairReadingMatrix
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from shared.connections.database.mysql_pool_manager import MySQLPoolManager
+from shared.connections.database.mysql_repository import MySQLRepository
+from shared.models.pair import Pair
+from shared.models.reported_pairs import ReportedPairs
+from shared.utils.profiler import Profiler
+
+
+class ViewPairReadingsEvent:
+    """
+    View the readings of pairs from the latest released COT report, such as the relative COT Index and sentiment of the
+    base asset against the quote asset.
+    """
+
+    def __init__(self, pair_reading_cache: PairReadingCache):
+        self._pair_reading_cache = pair_reading_cache
+
+    @Profiler.profiled("ViewPairReadingsEvent.execute")
+    async def execute(self, pairs: list[Pair], output: TextIO | None = None) -> None:
+        """
+        :param output: The stream the readings are written to, defaults to the standard output.
+        :type output: TextIO
+        """
+        matrix: PairReadingMatrix = await self._pair_reading_cache.get()
+        for pair in filter(matrix.has_pair, pairs):
+            print(matrix.describe(pair), end="\n"*2, file=output)
+
+async def main():
+    Profiler.configure_from_argv()
+    await MySQLPoolManager.get_instance().warm_up()
+    cot_repository: CachingCOTRepository = CachingCOTRepository(MySQLRepository())
+    cot_report_writer: COTReportWriteBehindQueue = COTReportWriteBehindQueue(cot_repository=cot_repository)
+    cot_service: COTService = SocrataService(cot_repository=cot_repository, cot_report_writer=cot_report_writer)
+    event: ViewPairReadingsEvent = ViewPairReadingsEvent(pair_reading_cache=PairReadingCache(cot_service=cot_service))
+    try:
+        await event.execute(ReportedPairs.all)
+    finally:
+        await cot_report_writer.close()
+        await cot_repository.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
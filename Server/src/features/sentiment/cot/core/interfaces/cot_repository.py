@@ -58,4 +58,25 @@ class COTRepository(ABC):
         :raises LookUpError: If no COT report was found.
         """
         raise NotImplementedError("How do i fetch cot reports from the cot report table?")
-    
\ No newline at end of file
+
+    @abstractmethod
+    async def fetch_cot_reports_between(
+        self,
+        asset_codes: list[str],
+        start_date: str,
+        end_date: str
+        ) -> list[tuple]:
+        """
+        Fetches the COT reports of the given assets released between the start date and the end date (both included),
+        oldest first.
+
+        :param asset_codes: The asset codes that are the unique identifier of the requested assets in the database.
+        :type asset_codes: list[str]
+        :param start_date: The released date of the oldest report to fetch.
+        :type start_date: str
+        :param end_date: The released date of the newest report to fetch.
+        :type end_date: str
+        :returns list[tuple]: The fetched results from the database.
+        :raises LookUpError: If no COT report was found.
+        """
+        raise NotImplementedError("How do i fetch a range of cot reports from the cot report table?")
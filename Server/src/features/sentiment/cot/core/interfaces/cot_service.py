@@ -24,7 +24,7 @@ class COTService(ABC):
         raise NotImplementedError
     
     @abstractmethod
-    async def fetch_historical_report(self, assets: list[Asset], start_date: int, n_weeks: int) -> list[COTReport]:
+    async def fetch_historical_report(self, assets: list[Asset], start_date: str, n_weeks: int) -> list[COTReport]:
         """
         Fetches the historical report of the assets specified, from the start date going back to the specified number of
         weeks.
@@ -32,7 +32,7 @@ class COTService(ABC):
         :param assets: A list of assets.
         :type assets: list[Asset] 
         :param start_date: The starting date of the historical report.
-        :type start_date: int 
+        :type start_date: str 
         :param n_weeks: The number of past weekly reports to fetch.
         :type n_weeks: int
         :returns list[COTReport]: A list of COT reports (historical) of the given assets.
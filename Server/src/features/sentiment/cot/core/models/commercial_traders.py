@@ -55,23 +55,55 @@ class CommercialTraders(MarketTraders):
             )
         self._historical_net = historical_net[: 156]
 
+    @property
+    def cot_index(self) -> int | None:
+        return self._cot_index
+
+    @cot_index.setter
+    def cot_index(self, cot_index: int | None) -> None:
+        """
+        Sets a COT Index computed elsewhere, e.g. from a rolling window, it is used when there is no historical net.
+        """
+        self._cot_index = cot_index
+
     def get_cot_index(self) -> int:
         """
         The Commitments of Traders (COT) Index is a percentage that ranges from 0 to 100%. it indicates the level of
         bullishness or bearishness of commercial traders in a particular market.
+
+        :return int: The COT Index, 0 if there's neither a historical net nor a COT Index computed elsewhere, e.g. when
+        the rolling window holds less than n weeks. The cot_index property tells these cases apart.
         """
         if self._historical_net is None:
-            if self._cot_index:
+            if self._cot_index is not None:
                 return self._cot_index
             return 0
-        min_net = min(self._historical_net)
-        max_net = max(self._historical_net)
-        cot_index: float = (self.do_net() - min_net) / (max_net - min_net)
+        return self.calculate_cot_index(self.do_net(), min(self._historical_net), max(self._historical_net))
+
+    @staticmethod
+    def calculate_cot_index(net: int, min_net: int, max_net: int) -> int:
+        """
+        Calculates the COT Index from the current net position and the lowest and highest net positions over the
+        historical period.
+
+        :param net: The current net position.
+        :type net: int
+        :param min_net: The lowest net position over the historical period.
+        :type min_net: int
+        :param max_net: The highest net position over the historical period.
+        :type max_net: int
+        :return int: The COT Index, from 0 to 100.
+        """
+        if max_net == min_net:
+            return 0
+        cot_index: float = (net - min_net) / (max_net - min_net)
         cot_index = round(cot_index * 100, 1)
         return math.ceil(cot_index) if cot_index - int(cot_index) >= .5 else math.floor(cot_index)
 
     
     def to_dict(self, verbose: bool, enhanced: bool) -> dict[str, float]:
         result: dict[str, float] = super().to_dict(verbose, enhanced)
-        if enhanced: result.update(cot_index=self.get_cot_index())
+        # An unknown COT Index is stored as null instead of 0, so it can't be mistaken for the bottom of the window.
+        if enhanced:
+            result.update(cot_index=self.get_cot_index() if self._historical_net is not None else self._cot_index)
         return result
\ No newline at end of file
@@ -2,4 +2,14 @@ from typing import Final
 
 
 class Thresholds:
-    sentiment: Final[int] = 5
\ No newline at end of file
+    sentiment: Final[int] = 5
+    # Overrides of the sentiment threshold by asset class name (e.g. "Index") and by asset code (e.g. "BTC"), the
+    # asset's own class is looked up before its base classes. Overridden by the thresholds file, see
+    # SentimentThresholds.
+    sentiment_by_asset_class: Final[dict[str, float]] = {
+        "Currency": 5,
+        "CryptoCurrency": 5,
+        "Index": 5,
+        "Commodity": 5
+    }
+    sentiment_by_asset: Final[dict[str, float]] = {}
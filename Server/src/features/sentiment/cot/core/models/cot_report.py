@@ -1,8 +1,10 @@
 from abc import ABC
+import hashlib
 from typing import Any
 
 from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
 from features.sentiment.cot.core.models.noncommercial_traders import NonCommercialTraders
+from shared.models.asset import Asset
 from shared.models.reported_assets import ReportedAssets
 
 
@@ -24,7 +26,9 @@ class COTReport(ABC):
         commercials: CommercialTraders,
         noncommercials: NonCommercialTraders,
         open_interest: int,
-        open_interest_change: int
+        open_interest_change: int,
+        percentile_ranks: dict[str, float | None] | None = None,
+        sentiment_threshold: float | None = None
         ):
         """
         Initialises the base class for COT report.
@@ -36,6 +40,9 @@ class COTReport(ABC):
         :param open_interest: The total number of outstanding contracts that are held by market participants at the end
         of each day.
         :param open_interest_change: The total change in open interest from the previous week.
+        :param percentile_ranks: The percentile rank of this week's positioning metrics within the asset's history.
+        :param sentiment_threshold: The noncommercial percentage net from which the sentiment is bullish or bearish,
+        defaults to Thresholds.sentiment.
         """
         self._reported_date = str(reported_date)
         self._asset_code = str(asset_code)
@@ -43,6 +50,8 @@ class COTReport(ABC):
         self._noncommercial = noncommercials
         self._open_interest = int(open_interest)
         self._open_interest_change = int(open_interest_change)
+        self._percentile_ranks = percentile_ranks
+        self._sentiment_threshold = sentiment_threshold
 
     def to_dict(self, verbose: bool = True, enhanced: bool = True) -> dict[str, Any]:
         """
@@ -58,12 +67,41 @@ class COTReport(ABC):
             "asset_code": self._asset_code,
             "open_interest": self._open_interest,
             "commercials": self._commercials.to_dict(verbose=verbose, enhanced=enhanced),
-            "noncommercials": self._noncommercial.to_dict(verbose=verbose, enhanced=enhanced),
+            "noncommercials": self._noncommercial.to_dict(
+                verbose=verbose,
+                enhanced=enhanced,
+                sentiment_threshold=self._sentiment_threshold
+            ),
         }
         if verbose:
             result.update(open_interest_change=self._open_interest_change)
+        if enhanced and self._percentile_ranks is not None:
+            result.update(percentile_ranks=self._percentile_ranks)
         return result
     
+    def content_hash(self) -> str:
+        """
+        Digests the figures reported by the CFTC, derived values like the COT Index are left out. The digest changes
+        when the CFTC revises (restates) the report.
+
+        :return str: The SHA-256 digest of the reported figures.
+        """
+        fields: tuple = (
+            self._asset_code,
+            self._reported_date,
+            self._open_interest,
+            self._open_interest_change,
+            self._commercials.long,
+            self._commercials.long_change,
+            self._commercials.short,
+            self._commercials.short_change,
+            self._noncommercial.long,
+            self._noncommercial.long_change,
+            self._noncommercial.short,
+            self._noncommercial.short_change
+        )
+        return hashlib.sha256("|".join(map(str, fields)).encode()).hexdigest()
+
     def describe(self, verbose: bool, enhanced: bool) -> str:
         """
         Describes the COT report.
@@ -74,17 +112,14 @@ class COTReport(ABC):
         commercial traders.
         :type enhanced: bool 
         """
-        asset_name: str = ""
-        for asset in ReportedAssets.all:
-            if self._asset_code == asset.code:
-                asset_name = asset.name
-                break
+        asset: Asset | None = ReportedAssets.by_code.get(self._asset_code)
+        asset_name: str = asset.name if asset is not None else ""
         description: list[str] = [
             f"COT REPORT OF {asset_name} REPORTED ON {self._reported_date}",
             f"{f"COT INDEX: {self._commercials.get_cot_index()}" if enhanced else ""}",
             f"{f"CHANGE IN OPEN INTEREST: {self._open_interest_change}" if enhanced else ""}",
             f"{f"OPEN INTEREST: {self._open_interest}" if verbose else ""}",
-            f"{f"SENTIMENT OF TREND FOLLOWERS: {self._noncommercial.get_sentiment().name.upper()}" if enhanced else ""}",
+            f"{f"SENTIMENT OF TREND FOLLOWERS: {self._noncommercial.get_sentiment(self._sentiment_threshold).name.upper()}" if enhanced else ""}",
             f"{f"NONCOMMERCIAL NET PERCENTAGE: {self._noncommercial.do_percentage_net()}%, LONG PERCENTAGE = {self._noncommercial.do_long_percentage()}%, SHORT PERCENTAGE = {self._noncommercial.do_short_percentage()}%" if enhanced else ""}",
             f"{f"NONCOMMERCIAL CHANGES: LONG = {self._noncommercial.long_change}, SHORT = {self._noncommercial.short_change}" if enhanced else ""}",
             f"{f"COMMERCIAL POSITIONS: LONG = {self._commercials.long}, SHORT = {self._commercials.short}" if verbose else ""}",
@@ -136,5 +171,27 @@ class COTReport(ABC):
         :return int: The total change in open interest from the previous week.
         """
         return self._open_interest_change
-    
-    
\ No newline at end of file
+
+    @property
+    def percentile_ranks(self) -> dict[str, float | None] | None:
+        """
+        :return dict[str, float | None] | None: The percentile rank of this week's positioning metrics within the
+        asset's history, e.g. noncommercial_percentage_net.
+        """
+        return self._percentile_ranks
+
+    @percentile_ranks.setter
+    def percentile_ranks(self, percentile_ranks: dict[str, float | None] | None) -> None:
+        self._percentile_ranks = percentile_ranks
+
+    @property
+    def sentiment_threshold(self) -> float | None:
+        """
+        :return float | None: The noncommercial percentage net from which the sentiment is bullish or bearish, None
+        for Thresholds.sentiment.
+        """
+        return self._sentiment_threshold
+
+    @sentiment_threshold.setter
+    def sentiment_threshold(self, sentiment_threshold: float | None) -> None:
+        self._sentiment_threshold = sentiment_threshold
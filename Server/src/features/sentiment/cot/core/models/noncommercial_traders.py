@@ -10,18 +10,22 @@ class NonCommercialTraders(MarketTraders):
 
     NonCommercial traders are traders that use the futures market for speculative purposes.
     """
-    def get_sentiment(self) -> Reading:
+    def get_sentiment(self, threshold: float | None = None) -> Reading:
         """
+        :param threshold: The percentage net from which the sentiment is bullish or bearish, defaults to
+        Thresholds.sentiment.
+        :type threshold: float
         :return Reading: Returns the sentiment reading of non-commercial traders.
         """
+        threshold = Thresholds.sentiment if threshold is None else threshold
         percentage_net = self.do_percentage_net()
-        if percentage_net >= Thresholds.sentiment:
+        if percentage_net >= threshold:
             return Reading.bullish
-        elif percentage_net <= -Thresholds.sentiment:
+        elif percentage_net <= -threshold:
             return Reading.bearish
         return Reading.neutral
     
-    def to_dict(self, verbose: bool, enhanced: bool) -> dict[str, Any]:
+    def to_dict(self, verbose: bool, enhanced: bool, sentiment_threshold: float | None = None) -> dict[str, Any]:
         result: dict[str, Any] = super().to_dict(verbose, enhanced)
-        if enhanced: result.update(sentiment=self.get_sentiment().name)
+        if enhanced: result.update(sentiment=self.get_sentiment(sentiment_threshold).name)
         return result
\ No newline at end of file
@@ -0,0 +1,320 @@
+import asyncio
+import json
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Final
+from features.sentiment.cot.connections.api.client.socrata_client import SocrataClient
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState, RollingWindow
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.percentile_rank_index import PercentileRankIndex
+from shared.utils.logger import Logger
+from shared.utils.util import Util
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class StageStatistics:
+    """
+    Holds the throughput and input queue depth of a pipeline stage.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.items: int = 0
+        self.busy_time: float = 0.0
+        self.max_queue_depth: int = 0
+        self._queue_depth_total: int = 0
+        self._queue_depth_samples: int = 0
+
+    def record_queue_depth(self, depth: int) -> None:
+        """
+        :param depth: The number of items waiting in the stage's input queue.
+        :type depth: int
+        """
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._queue_depth_total += depth
+        self._queue_depth_samples += 1
+
+    @property
+    def throughput(self) -> float:
+        """
+        :return float: The number of items processed per second of work.
+        """
+        return self.items / self.busy_time if self.busy_time else 0.0
+
+    @property
+    def average_queue_depth(self) -> float:
+        return self._queue_depth_total / self._queue_depth_samples if self._queue_depth_samples else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        Represents the stage statistics in a JSON serialisable format.
+
+        :return dict[str, Any]:
+        """
+        return {
+            "items": self.items,
+            "busy_time": round(self.busy_time, 4),
+            "throughput": round(self.throughput, 1),
+            "average_queue_depth": round(self.average_queue_depth, 2),
+            "max_queue_depth": self.max_queue_depth
+        }
+
+
+class COTBackfillPipeline:
+    """
+    Rebuilds the COT report history as a pipeline of stages connected by bounded queues:
+
+    read (files or Socrata pages) -> parse (COT reports) -> index (COT Index) -> persist (bulk writes)
+
+    Every stage works on the next chunk of data while the following stage handles the previous one, so the total time
+    approaches the time of the slowest stage instead of the sum of all stages. A full queue makes the stages before
+    it wait, which bounds the memory held by the pipeline.
+
+    The data must be read oldest first: the index stage advances the rolling window of commercial net positions of
+    each asset and computes the COT Index of every report as it passes by. The resulting COT Index state is saved, so
+    the following weekly releases can be applied incrementally.
+    """
+    _STAGES: Final[tuple[str, ...]] = ("read", "parse", "index", "persist")
+    _DEFAULT_QUEUE_SIZE: Final[int] = 4
+    _DEFAULT_BATCH_SIZE: Final[int] = 500
+    _DEFAULT_PAGE_SIZE: Final[int] = 5_000
+
+    def __init__(
+            self,
+            cot_repository: COTRepository,
+            queue_size: int = _DEFAULT_QUEUE_SIZE,
+            batch_size: int = _DEFAULT_BATCH_SIZE,
+            cot_index_state: COTIndexState | None = None,
+            percentile_rank_index: PercentileRankIndex | None = None
+        ):
+        """
+        :param cot_repository: The repository the reports are written to.
+        :type cot_repository: COTRepository
+        :param queue_size: The maximum number of chunks waiting between two stages.
+        :type queue_size: int
+        :param batch_size: The number of reports written to the repository at once.
+        :type batch_size: int
+        :param cot_index_state: The COT Index state rebuilt by the backfill, defaults to the one of the state file.
+        :type cot_index_state: COTIndexState
+        :param percentile_rank_index: The index the positioning of each week is ranked with.
+        :type percentile_rank_index: PercentileRankIndex
+        """
+        self._cot_repository = cot_repository
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._cot_report_presenter: COTReportPresenter = COTReportPresenter()
+        self._cot_index_state: COTIndexState = cot_index_state or COTIndexState()
+        self._percentile_rank_index: PercentileRankIndex = percentile_rank_index or PercentileRankIndex()
+        self.statistics: dict[str, StageStatistics] = {}
+        self.elapsed: float = 0.0
+
+    async def run_from_files(self, cot_report_files: list[str]) -> dict[str, StageStatistics]:
+        """
+        Backfills the COT reports of the given files.
+
+        :param cot_report_files: The legacy COT report files (txt or csv), oldest first.
+        :type cot_report_files: list[str]
+        :return dict[str, StageStatistics]: The statistics of each stage.
+        """
+        import pandas as pd
+        for file in cot_report_files:
+            if not (file.endswith(".txt") or file.endswith(".csv")):
+                raise ValueError(f"Report should be a txt file or csv file, got {file}")
+
+        async def read() -> AsyncIterator[pd.DataFrame]:
+            for file in cot_report_files:
+                # CFTC codes are read as strings, they lose their leading zeros otherwise.
+                yield await asyncio.to_thread(
+                    pd.read_csv,
+                    file,
+                    dtype={COTReportPresenter._REQUIRED_DATAFRAME_COLUMNS[0]: str}
+                )
+        return await self._run(read())
+
+    async def run_from_socrata(
+            self,
+            client: SocrataClient,
+            where: str,
+            page_size: int = _DEFAULT_PAGE_SIZE
+        ) -> dict[str, StageStatistics]:
+        """
+        Backfills the COT reports returned by the Socrata API for the given query, page by page.
+
+        :param client: The Socrata client.
+        :type client: SocrataClient
+        :param where: The $where clause selecting the reports.
+        :type where: str
+        :param page_size: The number of records fetched per request.
+        :type page_size: int
+        :return dict[str, StageStatistics]: The statistics of each stage.
+        """
+        async def read() -> AsyncIterator[list[dict[str, Any]]]:
+            offset: int = 0
+            while True:
+                page: list[dict[str, Any]] = await client.fetch_latest_report(
+                    params={
+                        "$where": where,
+                        "$order": "report_date_as_yyyy_mm_dd ASC, cftc_contract_market_code ASC",
+                        "$limit": page_size,
+                        "$offset": offset
+                    }
+                )
+                if page:
+                    yield page
+                if len(page) < page_size:
+                    break
+                offset += len(page)
+        return await self._run(read())
+
+    async def _run(self, source: AsyncIterator["pd.DataFrame | list[dict[str, Any]]"]) -> dict[str, StageStatistics]:
+        self.statistics = {name: StageStatistics(name) for name in self._STAGES}
+        # The history is replayed into empty copies, the shared state and index are only replaced once it was written,
+        # so a failed backfill doesn't leave them holding part of the history.
+        cot_index_state: COTIndexState = self._cot_index_state.create_empty()
+        percentile_rank_index: PercentileRankIndex = self._percentile_rank_index.create_empty()
+        raw_queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        parsed_queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        indexed_queue: asyncio.Queue = asyncio.Queue(maxsize=self._queue_size)
+        await self._cot_repository.build_cot_report_table([])
+        started: float = time.perf_counter()
+        try:
+            async with asyncio.TaskGroup() as group:
+                group.create_task(self._read_stage(source, raw_queue))
+                group.create_task(self._parse_stage(raw_queue, parsed_queue))
+                group.create_task(
+                    self._index_stage(parsed_queue, indexed_queue, cot_index_state, percentile_rank_index)
+                )
+                group.create_task(self._persist_stage(indexed_queue))
+        except* (ValueError, LookupError) as errors:
+            # Callers handle the error of the stage that failed, not the group of the task group.
+            raise errors.exceptions[0]
+        self.elapsed = time.perf_counter() - started
+        cot_index_state.save()
+        self._cot_index_state.replace(cot_index_state)
+        self._percentile_rank_index.replace(percentile_rank_index)
+        Logger.log(
+            name=self.__class__.__name__,
+            level=Logger.INFO,
+            message=f"Backfill finished in {self.elapsed:.2f}s: "
+                    f"{json.dumps({name: stage.to_dict() for name, stage in self.statistics.items()})}"
+        )
+        return self.statistics
+
+    async def _read_stage(self, source: AsyncIterator[Any], output: asyncio.Queue) -> None:
+        statistics: StageStatistics = self.statistics["read"]
+        while True:
+            started: float = time.perf_counter()
+            try:
+                chunk: Any = await anext(source)
+            except StopAsyncIteration:
+                break
+            statistics.busy_time += time.perf_counter() - started
+            statistics.items += len(chunk)
+            await output.put(chunk)
+        await output.put(None)
+
+    async def _parse_stage(self, input: asyncio.Queue, output: asyncio.Queue) -> None:
+        statistics: StageStatistics = self.statistics["parse"]
+        while True:
+            statistics.record_queue_depth(input.qsize())
+            chunk: pd.DataFrame | list[dict[str, Any]] | None = await input.get()
+            if chunk is None:
+                break
+            started: float = time.perf_counter()
+            cot_reports: list[COTReport]
+            if isinstance(chunk, list):
+                built: list[COTReport | None] = [
+                    self._cot_report_presenter._build_from_dict(record, suppress_error=True) for record in chunk
+                ]
+                cot_reports = [report for report in built if report is not None]
+            else:
+                cot_reports = await self._cot_report_presenter.from_dataframe(chunk, suppress_error=True)
+            cot_reports.sort(key=lambda report: report.reported_date)
+            statistics.busy_time += time.perf_counter() - started
+            statistics.items += len(cot_reports)
+            await output.put(cot_reports)
+        await output.put(None)
+
+    async def _index_stage(
+            self,
+            input: asyncio.Queue,
+            output: asyncio.Queue,
+            cot_index_state: COTIndexState,
+            percentile_rank_index: PercentileRankIndex
+        ) -> None:
+        statistics: StageStatistics = self.statistics["index"]
+        batch: list[COTReport] = []
+        while True:
+            statistics.record_queue_depth(input.qsize())
+            cot_reports: list[COTReport] | None = await input.get()
+            if cot_reports is None:
+                break
+            started: float = time.perf_counter()
+            for report in cot_reports:
+                self._update_cot_index(report, cot_index_state, percentile_rank_index)
+                batch.append(report)
+            statistics.busy_time += time.perf_counter() - started
+            statistics.items += len(cot_reports)
+            while len(batch) >= self._batch_size:
+                await output.put(batch[: self._batch_size])
+                batch = batch[self._batch_size:]
+        if batch:
+            await output.put(batch)
+        await output.put(None)
+
+    @staticmethod
+    def _update_cot_index(
+            report: COTReport,
+            cot_index_state: COTIndexState,
+            percentile_rank_index: PercentileRankIndex
+        ) -> None:
+        """
+        Advances the rolling window of the report's asset and sets the report's COT Index and percentile ranks.
+
+        :raises ValueError: If the report is not newer than the previous report of its asset.
+        """
+        window: RollingWindow | None = cot_index_state.get_window(report.asset_code)
+        if window is not None and report.reported_date <= window.latest_date:
+            raise ValueError(
+                f"The report of {report.asset_code} released on {report.reported_date} arrived after the report "
+                f"released on {window.latest_date}, the data must be read oldest first."
+            )
+        report.commercials.cot_index = cot_index_state.advance(
+            report.asset_code, report.reported_date, report.commercials.do_net()
+        )
+        percentile_rank_index.add(report)
+        report.percentile_ranks = percentile_rank_index.percentile_ranks(report)
+
+    async def _persist_stage(self, input: asyncio.Queue) -> None:
+        statistics: StageStatistics = self.statistics["persist"]
+        while True:
+            statistics.record_queue_depth(input.qsize())
+            batch: list[COTReport] | None = await input.get()
+            if batch is None:
+                break
+            started: float = time.perf_counter()
+            await self._cot_repository.insert_cot_reports(batch)
+            statistics.busy_time += time.perf_counter() - started
+            statistics.items += len(batch)
+
+
+async def main():
+    from shared.connections.database.sqlite_repository import SQLiteRepository
+    from shared.models.reported_assets import ReportedAssets
+    cot_report_files: list[str] = [
+        f"{Util.get_root_dir()}/data/cot/historical_reports/202{i + 1}_cot_reports.txt" for i in range(4)
+    ]
+    repository: SQLiteRepository = SQLiteRepository()
+    try:
+        await repository.build_assets_table(ReportedAssets.all)
+        pipeline: COTBackfillPipeline = COTBackfillPipeline(cot_repository=repository)
+        statistics: dict[str, StageStatistics] = await pipeline.run_from_files(cot_report_files)
+        print(json.dumps({name: stage.to_dict() for name, stage in statistics.items()}, indent=2))
+        print(f"Finished backfilling in: {pipeline.elapsed}")
+    finally:
+        await repository.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
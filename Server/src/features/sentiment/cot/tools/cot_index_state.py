@@ -0,0 +1,313 @@
+from collections import deque
+from datetime import date, timedelta
+import json
+import os
+from typing import Any, Final
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.week_calendar import WeekCalendar
+from shared.utils.logger import Logger
+from shared.utils.metrics import Histogram, MetricsRegistry
+from shared.utils.settings import Settings
+from shared.utils.tracer import Tracer
+from shared.utils.util import Util
+
+
+class RollingWindow:
+    """
+    The net positions of an asset's commercial traders over the last n calendar weeks, oldest first.
+
+    Weeks are keyed by their week ordinal, so a missing week leaves a hole instead of pulling an older week into the
+    window. The minimum and maximum of the window are kept in monotonic deques, so pushing a new week and reading the
+    extremes are amortized O(1) instead of rescanning the whole window.
+    """
+    def __init__(
+            self,
+            size: int,
+            latest_date: str | None = None,
+            weeks: list[tuple[int, int]] | None = None,
+            first_week: int | None = None
+        ):
+        """
+        :param size: The number of calendar weeks held by the window.
+        :type size: int
+        :param latest_date: The reported date of the newest net position in the window.
+        :type latest_date: str
+        :param weeks: The initial week ordinals and net positions, oldest first.
+        :type weeks: list[tuple[int, int]]
+        :param first_week: The oldest week ever pushed, it tells whether the window covers n weeks of history.
+        :type first_week: int
+        """
+        self._size = size
+        self._weeks: deque[tuple[int, int]] = deque()
+        self._minimums: deque[tuple[int, int]] = deque()
+        self._maximums: deque[tuple[int, int]] = deque()
+        self._first_week: int | None = first_week
+        for week, net in weeks or []:
+            self._push(week, net)
+        self.latest_date = latest_date
+
+    @property
+    def is_full(self) -> bool:
+        return bool(self._weeks) and self._weeks[-1][0] - self._first_week >= self._size - 1
+
+    @property
+    def latest_week(self) -> int | None:
+        return self._weeks[-1][0] if self._weeks else None
+
+    @property
+    def minimum(self) -> int:
+        return self._minimums[0][1]
+
+    @property
+    def maximum(self) -> int:
+        return self._maximums[0][1]
+
+    @property
+    def historical_net(self) -> list[int]:
+        """
+        :return list[int]: The net positions newest first, as expected by CommercialTraders.historical_net.
+        """
+        return [net for _, net in reversed(self._weeks)]
+
+    def push(self, reported_date: str, net: int) -> None:
+        """
+        Adds the net position of a new week, the weeks that fall out of the last n calendar weeks leave the window.
+
+        :param reported_date: The reported date of the new week.
+        :type reported_date: str
+        :param net: The net position of the new week.
+        :type net: int
+        """
+        self._push(WeekCalendar.to_week(reported_date), net)
+        self.latest_date = reported_date
+
+    def replace_latest(self, net: int) -> None:
+        """
+        Replaces the net position of the newest week, e.g. when the same report is applied again or was restated.
+
+        :param net: The new net position of the newest week.
+        :type net: int
+        """
+        if self._weeks[-1][1] == net:
+            return
+        weeks: list[tuple[int, int]] = list(self._weeks)
+        weeks[-1] = (weeks[-1][0], net)
+        self._weeks.clear()
+        self._minimums.clear()
+        self._maximums.clear()
+        for week, value in weeks:
+            self._push(week, value)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "latest_date": self.latest_date,
+            "first_week": self._first_week,
+            "weeks": [list(week) for week in self._weeks]
+        }
+
+    def _push(self, week: int, net: int) -> None:
+        if self._first_week is None:
+            self._first_week = week
+        self._weeks.append((week, net))
+        while self._minimums and self._minimums[-1][1] >= net:
+            self._minimums.pop()
+        self._minimums.append((week, net))
+        while self._maximums and self._maximums[-1][1] <= net:
+            self._maximums.pop()
+        self._maximums.append((week, net))
+        oldest_week: int = week - self._size + 1
+        while self._weeks[0][0] < oldest_week:
+            self._weeks.popleft()
+        while self._minimums[0][0] < oldest_week:
+            self._minimums.popleft()
+        while self._maximums[0][0] < oldest_week:
+            self._maximums.popleft()
+
+
+class COTIndexState:
+    """
+    The rolling window of commercial net positions of every asset, persisted in a JSON state file.
+
+    Applying a new weekly release advances each asset's window by one week and computes its COT Index in amortized
+    O(1). If the state file is missing it is recovered from the reports stored in the repository.
+    """
+    _DEFAULT_STATE_FILE: Final[str] = f"{Util.get_root_dir()}/data/cot/cot_index_state.json"
+    _N_WEEKS: Final[int] = 156
+    _RECOVERY_LOOKBACK_WEEKS: Final[int] = 208
+    _STATE_VERSION: Final[int] = 2
+    COT_INDEX_SECONDS: Final[Histogram] = MetricsRegistry.get_instance().histogram(
+        "cot_index_seconds",
+        "Time taken to compute the COT Index, of one report for the rolling state and of one asset's history for the "
+        "builder.",
+        buckets=(0.000001, 0.0000025, 0.000005, 0.00001, 0.000025, 0.00005) + Histogram.DEFAULT_BUCKETS
+    )
+
+    def __init__(self, state_file: str | None = None, n_weeks: int = _N_WEEKS):
+        """
+        :param state_file: The file the state is persisted in. Defaults to the COT_INDEX_STATE_FILE environment
+        variable or data/cot/cot_index_state.json.
+        :type state_file: str
+        :param n_weeks: The number of weeks the COT Index is computed over.
+        :type n_weeks: int
+        """
+        self._state_file: str = state_file or Settings.get_instance().cot_index_state_file or self._DEFAULT_STATE_FILE
+        self._n_weeks = n_weeks
+        self._windows: dict[str, RollingWindow] = {}
+        self.is_loaded: bool = False
+
+    def get_window(self, asset_code: str) -> RollingWindow | None:
+        return self._windows.get(asset_code)
+
+    @COT_INDEX_SECONDS.time(method="rolling_state")
+    def advance(self, asset_code: str, reported_date: str, net: int) -> int | None:
+        """
+        Applies an asset's weekly net position to its window. A report of the newest week in the window replaces it
+        instead of being added twice.
+
+        :param asset_code: The code of the asset.
+        :type asset_code: str
+        :param reported_date: The reported date of the week.
+        :type reported_date: str
+        :param net: The net position of the asset's commercial traders that week.
+        :type net: int
+        :return int | None: The COT Index of the week, None if the window holds less than n weeks or the week is older
+        than the newest week in the window.
+        """
+        window: RollingWindow = self._windows.setdefault(asset_code, RollingWindow(self._n_weeks))
+        week: int = WeekCalendar.to_week(reported_date)
+        if window.latest_week is not None and week < window.latest_week:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.WARNING,
+                message=f"The report of {asset_code} released on {reported_date} is older than the COT Index state "
+                        f"({window.latest_date}), its COT Index can't be computed incrementally."
+            )
+            return None
+        if window.latest_week == week:
+            window.replace_latest(net)
+        else:
+            window.push(reported_date, net)
+        if not window.is_full:
+            return None
+        return CommercialTraders.calculate_cot_index(net, window.minimum, window.maximum)
+
+    def rebuild(self, cot_reports: list[COTReport]) -> None:
+        """
+        Replaces the windows of the assets of the given reports.
+
+        :param cot_reports: The reports of the last n weeks (or more) of the assets.
+        :type cot_reports: list[COTReport]
+        """
+        for asset_code in {report.asset_code for report in cot_reports}:
+            self._windows.pop(asset_code, None)
+        for report in sorted(cot_reports, key=lambda report: str(report.reported_date)):
+            self.advance(report.asset_code, str(report.reported_date), report.commercials.do_net())
+
+    @Tracer.traced("COTIndexState.load")
+    def load(self) -> bool:
+        """
+        :return bool: True if the state was loaded from the state file, False if it is missing, corrupt or outdated.
+        """
+        try:
+            with open(self._state_file, "r") as state_file:
+                data: dict[str, Any] = json.load(state_file)
+        except FileNotFoundError:
+            return False
+        except json.JSONDecodeError as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.ERROR,
+                message=f"Couldn't load {self._state_file} because: {error}."
+            )
+            return False
+        if data.get("version") != self._STATE_VERSION or data.get("n_weeks") != self._n_weeks:
+            return False
+        self._windows = {
+            asset_code: RollingWindow(
+                self._n_weeks,
+                window["latest_date"],
+                [(week, net) for week, net in window["weeks"]],
+                window["first_week"]
+            )
+            for asset_code, window in data["assets"].items()
+        }
+        self.is_loaded = True
+        return True
+
+    @Tracer.traced("COTIndexState.save")
+    def save(self) -> None:
+        """
+        Writes the state file atomically, a crash while saving leaves the previous state intact.
+        """
+        os.makedirs(os.path.dirname(self._state_file), exist_ok=True)
+        temporary_file: str = f"{self._state_file}.tmp"
+        with open(temporary_file, "w") as state_file:
+            json.dump(
+                {
+                    "version": self._STATE_VERSION,
+                    "n_weeks": self._n_weeks,
+                    "assets": {asset_code: window.to_dict() for asset_code, window in self._windows.items()}
+                },
+                state_file
+            )
+        os.replace(temporary_file, self._state_file)
+
+    @Tracer.traced("COTIndexState.recover")
+    async def recover(self, cot_repository: COTRepository, asset_codes: list[str], end_date: str) -> None:
+        """
+        Rebuilds the windows of the given assets from the reports stored in the repository and saves the state. Assets
+        without stored reports start with an empty window.
+
+        :param cot_repository: The repository holding the reports.
+        :type cot_repository: COTRepository
+        :param asset_codes: The codes of the assets to recover.
+        :type asset_codes: list[str]
+        :param end_date: The reported date of the newest report to include.
+        :type end_date: str
+        """
+        from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+        start_date: str = str(date.fromisoformat(end_date) - timedelta(weeks=self._RECOVERY_LOOKBACK_WEEKS))
+        try:
+            records: list[tuple] = await cot_repository.fetch_cot_reports_between(asset_codes, start_date, end_date)
+        except LookupError:
+            records = []
+        self.rebuild(COTReportPresenter.from_list(records))
+        for asset_code in asset_codes:
+            self._windows.setdefault(asset_code, RollingWindow(self._n_weeks))
+        self.save()
+        Logger.log(
+            name=self.__class__.__name__,
+            level=Logger.INFO,
+            message=f"Recovered the COT Index state of {len(asset_codes)} assets from {len(records)} stored reports."
+        )
+
+    @Tracer.traced("COTIndexState.load_or_recover")
+    async def load_or_recover(self, cot_repository: COTRepository, asset_codes: list[str], end_date: str) -> None:
+        """
+        Loads the state file once, the windows of assets missing from it are recovered from the repository.
+        """
+        if not self.is_loaded:
+            self.load()
+            self.is_loaded = True
+        missing_codes: list[str] = [code for code in asset_codes if code not in self._windows]
+        if missing_codes:
+            await self.recover(cot_repository, missing_codes, end_date)
+
+    def create_empty(self) -> "COTIndexState":
+        """
+        :return COTIndexState: An empty state saved to the same state file, e.g. to replay the whole history into
+        before it replaces this state, see replace.
+        """
+        return COTIndexState(self._state_file, self._n_weeks)
+
+    def replace(self, cot_index_state: "COTIndexState") -> None:
+        """
+        Takes over the windows of the given state, e.g. once the history replayed into it was written.
+
+        :param cot_index_state: The state to take the windows of.
+        :type cot_index_state: COTIndexState
+        """
+        self._windows = cot_index_state._windows
+        self.is_loaded = True
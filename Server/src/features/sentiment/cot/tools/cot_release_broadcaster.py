@@ -0,0 +1,228 @@
+import asyncio
+from collections import deque
+import json
+from typing import Final
+from features.sentiment.cot.core.models.cot_report import COTReport
+from shared.utils.logger import Logger
+from shared.utils.metrics import Counter, MetricsRegistry
+
+
+class COTSubscription:
+    """
+    The messages of new releases waiting to be delivered to one subscriber.
+
+    The buffer is bounded: once it is full, the oldest message is dropped for each new one, so a slow subscriber
+    misses old releases instead of holding an ever growing backlog.
+
+    Usage:
+    async for message in subscription:
+        ...
+    """
+    def __init__(self, asset_codes: frozenset[str] | None, max_pending: int):
+        """
+        :param asset_codes: The assets the subscriber is interested in, every asset if None.
+        :type asset_codes: frozenset[str]
+        :param max_pending: The maximum number of messages waiting to be delivered.
+        :type max_pending: int
+        """
+        self.asset_codes = asset_codes
+        self._messages: deque[bytes] = deque(maxlen=max_pending)
+        self._available: asyncio.Event = asyncio.Event()
+        self.is_closed: bool = False
+        self.dropped: int = 0
+
+    def offer(self, message: bytes) -> bool:
+        """
+        :param message: The serialized message.
+        :type message: bytes
+        :return bool: Whether the message was queued without dropping an older one.
+        """
+        if self.is_closed:
+            return False
+        is_full: bool = len(self._messages) == self._messages.maxlen
+        if is_full:
+            self.dropped += 1
+        self._messages.append(message)
+        self._available.set()
+        return not is_full
+
+    async def get(self) -> bytes | None:
+        """
+        :return bytes | None: The oldest waiting message, None once the subscription is closed.
+        """
+        while not self._messages:
+            if self.is_closed:
+                return None
+            self._available.clear()
+            await self._available.wait()
+        return self._messages.popleft()
+
+    def close(self) -> None:
+        self.is_closed = True
+        self._messages.clear()
+        self._available.set()
+
+    def __aiter__(self) -> "COTSubscription":
+        return self
+
+    async def __anext__(self) -> bytes:
+        message: bytes | None = await self.get()
+        if message is None:
+            raise StopAsyncIteration
+        return message
+
+
+class COTReleaseBroadcaster:
+    """
+    Pushes the reports of each new release to every subscriber, instead of subscribers polling for it.
+
+    Each report is serialized once per release. The message of a release is assembled once per distinct asset filter
+    from the serialized reports, so the cost of a release grows with the number of filters, not with the number of
+    subscribers. Reports that are not newer than the last published report of their asset are ignored, so publishing
+    the same release twice is harmless.
+
+    A new subscriber first receives the latest published release of its assets, if there is one.
+
+    Reports of the latest published release restated by the CFTC are pushed again with publish_restatements.
+
+    A message is a JSON object: {"release_date": "2024-01-02", "reports": [<COTReport.to_dict>, ...]}. The message of
+    restated reports also has "restated": true.
+    """
+    _DEFAULT_MAX_PENDING: Final[int] = 16
+    _MESSAGES: Final[Counter] = MetricsRegistry.get_instance().counter(
+        "cot_broadcast_messages_total", "Number of release messages queued for subscribers (queued) or dropped from "
+        "the full buffer of a slow subscriber (dropped)."
+    )
+
+    def __init__(self, max_pending: int = _DEFAULT_MAX_PENDING):
+        """
+        :param max_pending: The maximum number of messages waiting to be delivered to each subscriber.
+        :type max_pending: int
+        """
+        self._max_pending = max_pending
+        self._subscriptions: set[COTSubscription] = set()
+        self._latest: dict[str, tuple[str, bytes]] = {}
+        self.release_date: str | None = None
+
+    @property
+    def n_subscribers(self) -> int:
+        return len(self._subscriptions)
+
+    def subscribe(self, asset_codes: list[str] | None = None) -> COTSubscription:
+        """
+        :param asset_codes: The assets to receive the reports of, every asset if None.
+        :type asset_codes: list[str]
+        :return COTSubscription: The subscription, to be given to unsubscribe when done.
+        """
+        subscription: COTSubscription = COTSubscription(
+            frozenset(asset_codes) if asset_codes else None, self._max_pending
+        )
+        self._subscriptions.add(subscription)
+        if self.release_date is not None:
+            serialized: list[bytes] = [
+                report for asset_code, (release_date, report) in self._latest.items()
+                if release_date == self.release_date and self._matches(subscription, asset_code)
+            ]
+            if serialized:
+                subscription.offer(self._to_message(self.release_date, serialized))
+        return subscription
+
+    def unsubscribe(self, subscription: COTSubscription) -> None:
+        subscription.close()
+        self._subscriptions.discard(subscription)
+
+    def publish(self, cot_reports: list[COTReport]) -> int:
+        """
+        Pushes the reports newer than the last published report of their asset to the subscribers of their asset.
+
+        :param cot_reports: The reports of a release, e.g. as fetched from the Socrata API.
+        :type cot_reports: list[COTReport]
+        :return int: The number of new reports published.
+        """
+        by_release_date: dict[str, dict[str, bytes]] = {}
+        for report in cot_reports:
+            published: tuple[str, bytes] | None = self._latest.get(report.asset_code)
+            if published is not None and report.reported_date <= published[0]:
+                continue
+            by_release_date.setdefault(report.reported_date, {})[report.asset_code] = json.dumps(
+                report.to_dict(verbose=True, enhanced=True)
+            ).encode()
+        n_published: int = 0
+        for release_date in sorted(by_release_date):
+            serialized: dict[str, bytes] = by_release_date[release_date]
+            for asset_code, report in serialized.items():
+                self._latest[asset_code] = (release_date, report)
+            self.release_date = max(self.release_date or release_date, release_date)
+            self._fan_out(release_date, serialized)
+            n_published += len(serialized)
+        if n_published:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Published {n_published} reports to {len(self._subscriptions)} subscribers."
+            )
+        return n_published
+
+    def publish_restatements(self, cot_reports: list[COTReport]) -> int:
+        """
+        Pushes the reports of the latest published release of their asset again, e.g. once the CFTC restated them.
+        Reports of older releases are ignored, subscribers only hold the latest one.
+
+        :param cot_reports: The restated reports.
+        :type cot_reports: list[COTReport]
+        :return int: The number of restated reports published.
+        """
+        by_release_date: dict[str, dict[str, bytes]] = {}
+        for report in cot_reports:
+            published: tuple[str, bytes] | None = self._latest.get(report.asset_code)
+            if published is None or report.reported_date != published[0]:
+                continue
+            by_release_date.setdefault(report.reported_date, {})[report.asset_code] = json.dumps(
+                report.to_dict(verbose=True, enhanced=True)
+            ).encode()
+        for release_date, serialized in by_release_date.items():
+            for asset_code, report in serialized.items():
+                self._latest[asset_code] = (release_date, report)
+            self._fan_out(release_date, serialized, restated=True)
+        n_published: int = sum(len(serialized) for serialized in by_release_date.values())
+        if n_published:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Published {n_published} restated reports to {len(self._subscriptions)} subscribers."
+            )
+        return n_published
+
+    def close(self) -> None:
+        """
+        Closes every subscription, their subscribers stop waiting for messages.
+        """
+        for subscription in self._subscriptions:
+            subscription.close()
+        self._subscriptions.clear()
+
+    def _fan_out(self, release_date: str, serialized: dict[str, bytes], restated: bool = False) -> None:
+        messages: dict[frozenset[str] | None, bytes | None] = {}
+        for subscription in list(self._subscriptions):
+            if subscription.asset_codes not in messages:
+                reports: list[bytes] = [
+                    report for asset_code, report in serialized.items() if self._matches(subscription, asset_code)
+                ]
+                messages[subscription.asset_codes] = (
+                    self._to_message(release_date, reports, restated) if reports else None
+                )
+            message: bytes | None = messages[subscription.asset_codes]
+            if message is not None:
+                self._MESSAGES.inc(result="queued" if subscription.offer(message) else "dropped")
+
+    @staticmethod
+    def _matches(subscription: COTSubscription, asset_code: str) -> bool:
+        return subscription.asset_codes is None or asset_code in subscription.asset_codes
+
+    @staticmethod
+    def _to_message(release_date: str, reports: list[bytes], restated: bool = False) -> bytes:
+        return (
+            b'{"release_date": "' + release_date.encode() + b'", '
+            + (b'"restated": true, ' if restated else b"")
+            + b'"reports": [' + b", ".join(reports) + b"]}"
+        )
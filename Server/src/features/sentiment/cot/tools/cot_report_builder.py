@@ -1,11 +1,13 @@
 import asyncio
-import json
-from typing import Any
+import numpy as np
+from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
 from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
 from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
-import pandas as pd
+from features.sentiment.cot.tools.week_calendar import WeekAlignedSeries, WeekCalendar
 from shared.models.reported_assets import ReportedAssets
 from shared.utils.logger import Logger
+from shared.utils.profiler import Profiler
 from shared.utils.util import Util
 
 
@@ -17,6 +19,7 @@ class COTReportBuilder:
     def __init__(self):
         self._cot_report_presenter: COTReportPresenter = COTReportPresenter()
 
+    @Profiler.profiled("COTReportBuilder.build_from_files")
     async def build_from_files(self, cot_report_files: list[str]) -> list[COTReport]:
         """
         Builds COT reports from the given files.
@@ -25,6 +28,7 @@ class COTReportBuilder:
         :type cot_report_files: list[str]
         :returns list[COTReport]: A list of cot reports.
         """
+        import pandas as pd
         cot_reports: list[COTReport] = []
         for file in cot_report_files:
             if not (file.endswith(".txt") or file.endswith(".txt")):
@@ -33,77 +37,28 @@ class COTReportBuilder:
             cot_reports.extend(await self._cot_report_presenter.from_dataframe(data, suppress_error=True))
         return self.updated_multiple_cot_index(cot_reports)
     
-    def cache_historical_nets(self, cot_reports: list[COTReport]) -> None:
-        """
-        Caches the commercial historical net positions of a COTReport. This should be the latest report for each asset
-        in the reported assets.
-        
-        :param cot_reports: The latest COT reports of each asset in the reported assets.
-        :type cot_reports: list[COTReport]
-        :raises ValueError: If an assets report in the reported assets is missing in the set of COT reports.
-        :raises ValueError: If the reported dates of the COT reports in the list of COT reports are different.
-        """
-        reported_assets_codes: set[str] = set(map(lambda asset: asset.code, ReportedAssets.all))
-        asset_codes_in_the_report: set[str] = set(map(lambda report: report.asset_code, cot_reports))
-        for code in reported_assets_codes:
-            if code not in asset_codes_in_the_report:
-                raise ValueError("The latest COT report of the asset: {code} is missing in the list of COT reports.")
-        if len(set(map(lambda report: report.reported_date, cot_reports))) != 1:
-            raise ValueError("The reported dates of the COT reports in the list of COT reports are different.")
-        cache_file: str = f"{Util.get_root_dir()}/data/cot/cache.json"
-        data: dict[str, Any] = {}
-        with open(cache_file, "r") as cache:
-            try:
-                data = json.load(cache)
-            except json.JSONDecodeError as error:
-                Logger.log(
-                    name=self.__class__.__name__,
-                    level=Logger.ERROR,
-                    message=f"Couldn't load {cache_file} because: {error}. Overriding {cache_file} instead."
-                )    
-            for report in cot_reports:
-                jsonified_commercial_historical_nets: str = json.dumps(report.commercials.historical_net)
-                data["recent_commercial_historical_nets"][report.asset_code] = jsonified_commercial_historical_nets
-        with open(cache_file, "w") as cache:
-            json.dump(data, cache)
-    
     def updated_multiple_cot_index(self, cot_reports: list[COTReport]) -> list[COTReport]:
         """
-        Groups each cot_report to their various assets, updates their COT Index and caches the latest reports historical
-        net positions of their commercial traders locally (in a json cache file).
+        Groups each cot_report to their various assets and updates their COT Index.
 
         :param cot_reports: A list COT reports of different assets.
-        :type cot_reports:  
+        :type cot_reports: list[COTReport]
         """
         updated_reports: list[COTReport] = []
-        latest_reports: list[COTReport] = []
+        reports_by_asset: dict[str, list[COTReport]] = {asset.code: [] for asset in ReportedAssets.all}
+        for report in cot_reports:
+            reports_by_asset.setdefault(report.asset_code, []).append(report)
         for asset in ReportedAssets.all:
-            asset_historical_report: list[COTReport] = list(
-                filter(
-                    lambda report: report.asset_code == asset.code, cot_reports
-                    )
-                )
-            updated_group: list[COTReport] = self.update_cot_index_group(asset_historical_report)
-            updated_reports.extend(updated_group)
-            latest_reports.append(updated_group[0])
-        try:
-            self.cache_historical_nets(latest_reports)
-        except ValueError as error:
-            Logger.log(
-                name=self.__class__.__name__,
-                level=Logger.ERROR,
-                message=f"""
-                    Failed to cache the historical reports because: {error}
-                """
-            )
-            raise
+            updated_reports.extend(self.update_cot_index_group(reports_by_asset[asset.code]))
         return updated_reports
 
     
+    @COTIndexState.COT_INDEX_SECONDS.time(method="calendar_window")
     def update_cot_index_group(self, cot_reports: list[COTReport]) -> list[COTReport]:
         """
         Updates the COT Index of each reports in the group if there exists 155 historical reports after the current 
-        report.
+        report. The window of each report spans 156 calendar weeks, so a missing week shortens the window instead of
+        shifting it.
 
         Example:
         cot_reports: list[COTReport] = [COTReport(), COTReport(), COTReport(), ..., COTReport(), COTReport()]
@@ -118,37 +73,51 @@ class COTReportBuilder:
         cot_reports = sorted(cot_reports, key=lambda cot_report: cot_report.reported_date, reverse=True)
         report_group: str = cot_reports[0].asset_code
         n_weeks: int = 156
-        for i in range(len(cot_reports)):
-            latest_report: COTReport = cot_reports[i]
-            if latest_report.asset_code != report_group:
+        for report in cot_reports:
+            if report.asset_code != report_group:
                 raise TypeError(
                     f"""
-                    This report released on {latest_report.reported_date} does not belong to this 
-                    group: {report_group}. It should belong in {latest_report.asset_code} group.
+                    This report released on {report.reported_date} does not belong to this 
+                    group: {report_group}. It should belong in {report.asset_code} group.
                     """
                 )
-            historical_net: list[int] = list(
-                map(
-                    lambda cot_report: cot_report.commercials.do_net(), 
-                    cot_reports[i: i + n_weeks]
-                    )
-                )
-            try:
-                latest_report.commercials.historical_net = historical_net
-            except ValueError as error:
+        weeks: np.ndarray = WeekCalendar.to_weeks(cot_report.reported_date for cot_report in cot_reports)
+        nets: np.ndarray = np.fromiter(
+            (cot_report.commercials.do_net() for cot_report in cot_reports), dtype=np.int64, count=len(cot_reports)
+        )
+        gaps: list[tuple[int, int]] = WeekCalendar.find_gaps(weeks[::-1])
+        if gaps:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.WARNING,
+                message=f"The reports of {report_group} are missing "
+                        f"{', '.join(f'{n_missing} week(s) from {WeekCalendar.to_date(week)}' for week, n_missing in gaps)}."
+            )
+        # The extrema span n_weeks calendar weeks, so missing weeks shorten a window instead of pulling older weeks
+        # into it, and are NaN until the asset has n_weeks of history.
+        nets_by_week: WeekAlignedSeries = WeekCalendar.align(cot_reports)
+        minimums, maximums = nets_by_week.rolling_extrema(n_weeks)
+        columns: np.ndarray = weeks - nets_by_week.first_week
+        for i in range(len(cot_reports)):
+            latest_report: COTReport = cot_reports[i]
+            if np.isnan(minimums[0, columns[i]]):
                 Logger.log(
                     name=self.__class__.__name__,
                     level=Logger.ERROR,
                     message=f"""
                         Can't update the COT index of this group: {report_group} starting from report: 
-                        {cot_reports[i].reported_date}, due to error: {error}
+                        {latest_report.reported_date}, due to error: less than {n_weeks} weeks of history.
                     """
                 )
                 break
+            latest_report.commercials.cot_index = CommercialTraders.calculate_cot_index(
+                int(nets[i]), int(minimums[0, columns[i]]), int(maximums[0, columns[i]])
+            )
         return cot_reports
     
 
 async def main():
+        Profiler.configure_from_argv()
         cot_report_files: list[str] = []
         for i in range(4):
             cot_report_files.append(f"{Util.get_root_dir()}/data/cot/historical_reports/202{i + 1}_cot_reports.txt")
@@ -2,20 +2,28 @@ import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import datetime
 import json
-from typing import Any
-import pandas as pd
+from typing import TYPE_CHECKING, Any, AsyncIterable, Final
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
 from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
 from features.sentiment.cot.core.models.cot_report import COTReport
 from features.sentiment.cot.core.models.noncommercial_traders import NonCommercialTraders
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from shared.models.asset import Asset
 from shared.models.reported_assets import ReportedAssets
+from shared.utils.metrics import Counter, Histogram, MetricsRegistry
+from shared.utils.tracer import Tracer
 from shared.utils.util import Util
 
+if TYPE_CHECKING:
+    import pandas as pd
+
 
 class COTReportPresenter():
     """
     COT report presenter handles converting data formats that represents a COT report from and to a COTReport
     """
-    _REQUIRED_DATAFRAME_COLUMNS: pd.Index = pd.Index([
+    _REQUIRED_DATAFRAME_COLUMNS: Final[list[str]] = [
         "CFTC Contract Market Code",
         "As of Date in Form YYYY-MM-DD",
         "Open Interest (All)",
@@ -28,9 +36,17 @@ class COTReportPresenter():
         "Change in Noncommercial-Short (All)",
         "Change in Commercial-Long (All)",
         "Change in Commercial-Short (All)"
-    ])
+    ]
+    _CONVERSION_SECONDS: Final[Histogram] = MetricsRegistry.get_instance().histogram(
+        "cot_presenter_conversion_seconds", "Time taken to convert a batch of data into COT reports."
+    )
+    _CONVERTED_REPORTS: Final[Counter] = MetricsRegistry.get_instance().counter(
+        "cot_presenter_reports_total", "Number of COT reports converted from other data formats."
+    )
 
     @classmethod
+    @Tracer.traced("COTReportPresenter.from_list")
+    @_CONVERSION_SECONDS.time(conversion="from_list")
     def from_list(cls, data: list[tuple]) -> list[COTReport]:
         """
         Converts the given data into a list of COT reports.
@@ -64,64 +80,152 @@ class COTReportPresenter():
                 commercials=commercials,
                 noncommercials=noncommercials,
                 open_interest=report_data["open_interest"],
-                open_interest_change=report_data["open_interest_change"]
+                open_interest_change=report_data["open_interest_change"],
+                percentile_ranks=report_data.get("percentile_ranks"),
+                sentiment_threshold=SentimentThresholds.get_configured().for_asset(asset_code)
             )
             cot_reports.append(report)
+        cls._CONVERTED_REPORTS.inc(len(cot_reports), conversion="from_list")
         return cot_reports
     
-    @staticmethod
-    async def from_dicts(data: list[dict[str, Any]]) -> list[COTReport]:
+    @classmethod
+    @Tracer.traced("COTReportPresenter.from_dicts")
+    @_CONVERSION_SECONDS.time(conversion="from_dicts")
+    async def from_dicts(
+            cls,
+            data: list[dict[str, Any]],
+            cot_index_state: COTIndexState | None = None,
+            cot_repository: COTRepository | None = None
+        ) -> list[COTReport]:
         """
-        Converts the given list of data into a list of COT reports.
+        Converts the given list of data into a list of COT reports. The COT Index of each report is computed by
+        advancing its asset's rolling window in the COT Index state, which is saved afterwards.
         
         :param data: A dict of str that represents COT reports.
         :type data: list[dict[str, Any]]
+        :param cot_index_state: The COT Index state of the assets, loaded from its state file if not given.
+        :type cot_index_state: COTIndexState
+        :param cot_repository: The repository the windows missing from the state file are recovered from, when no COT
+        Index state is given.
+        :type cot_repository: COTRepository
+        :raises ValueError: If no COT Index state is given and the state of an asset can neither be loaded nor recovered.
         """
+        if cot_index_state is None:
+            cot_index_state = COTIndexState()
+            await cls._prepare_cot_index_state(data, cot_index_state, cot_repository)
         cot_reports: list[COTReport] = []
         for record in data:
-            reported_date: str = record["report_date_as_yyyy_mm_dd"].split("T")[0]
-            asset_code: str = ""
-            for asset in ReportedAssets.all:
-                if asset.cftc_code == record["cftc_contract_market_code"]:
-                    asset_code = asset.code
-                    break
-            commercials: CommercialTraders = CommercialTraders(
-                long=record["comm_positions_long_all"],
-                long_change=record["change_in_comm_long_all"],
-                short=record["comm_positions_short_all"],
-                short_change=record["change_in_comm_short_all"],
-                historical_net=None,
-            )
-            commercial_historical_net: list[int] = []
-            cache_file: str = f"{Util.get_root_dir()}/data/cot/cache.json"
-            cache_data: dict[str, Any] = dict()
-            with open(cache_file, "r") as cache:
-                cache_data = json.load(cache)
-                commercial_historical_net = json.loads(cache_data["recent_commercial_historical_nets"][asset_code])[: -1]
-                commercial_historical_net.insert(0, commercials.do_net())
-                cache_data["recent_commercial_historical_nets"][asset_code] = json.dumps(commercial_historical_net)
-            with open(cache_file, "w") as cache:
-                json.dump(cache_data, cache)
-            commercials.historical_net = commercial_historical_net
-            noncommercials: NonCommercialTraders = NonCommercialTraders(
-                long=record["noncomm_positions_long_all"],
-                long_change=record["change_in_noncomm_long_all"],
-                short=record["noncomm_positions_short_all"],
-                short_change=record["change_in_noncomm_short_all"],
-            )
-            report = COTReport(
-                reported_date=reported_date,
-                asset_code=asset_code,
-                commercials=commercials,
-                noncommercials=noncommercials,
-                open_interest=record["open_interest_all"],
-                open_interest_change=record["change_in_open_interest_all"]
+            report: COTReport = cls._build_from_dict(record)
+            report.commercials.cot_index = cot_index_state.advance(
+                report.asset_code, report.reported_date, report.commercials.do_net()
             )
             cot_reports.append(report)
+        cot_index_state.save()
+        cls._CONVERTED_REPORTS.inc(len(cot_reports), conversion="from_dicts")
         return cot_reports
+
+    @staticmethod
+    def _build_from_dict(record: dict[str, Any], suppress_error: bool = False) -> COTReport | None:
+        """
+        Builds a COT report, without its commercial historical net positions, from a single Socrata API record.
+
+        :param record: A record of the legacy COT reports dataset.
+        :type record: dict[str, Any]
+        :param suppress_error: Catches the thrown error when the CFTC code of the record doesn't belong to any asset in
+        the reported assets. Note: This will return None.
+        :type suppress_error: bool
+        :returns: A COT report.
+        """
+        asset: Asset | None = ReportedAssets.by_cftc_code.get(record["cftc_contract_market_code"])
+        if asset is None:
+            if suppress_error:
+                return None
+            raise ValueError(
+                f"The CFTC contract code: {record['cftc_contract_market_code']} does not belong to any asset in the "
+                f"reported assets"
+            )
+        commercials: CommercialTraders = CommercialTraders(
+            long=record["comm_positions_long_all"],
+            long_change=record["change_in_comm_long_all"],
+            short=record["comm_positions_short_all"],
+            short_change=record["change_in_comm_short_all"],
+            historical_net=None,
+        )
+        noncommercials: NonCommercialTraders = NonCommercialTraders(
+            long=record["noncomm_positions_long_all"],
+            long_change=record["change_in_noncomm_long_all"],
+            short=record["noncomm_positions_short_all"],
+            short_change=record["change_in_noncomm_short_all"],
+        )
+        return COTReport(
+            reported_date=record["report_date_as_yyyy_mm_dd"].split("T")[0],
+            asset_code=asset.code,
+            commercials=commercials,
+            noncommercials=noncommercials,
+            open_interest=record["open_interest_all"],
+            open_interest_change=record["change_in_open_interest_all"],
+            sentiment_threshold=SentimentThresholds.get_configured().for_asset(asset.code)
+        )
     
+    @classmethod
+    async def from_dict_stream(
+            cls,
+            batches: AsyncIterable[list[dict[str, Any]]],
+            cot_index_state: COTIndexState | None = None,
+            cot_repository: COTRepository | None = None
+        ) -> list[COTReport]:
+        """
+        Converts the given stream of data into a list of COT reports, each batch is converted as soon as it arrives.
+
+        :param batches: Batches of dicts that represents COT reports.
+        :type batches: AsyncIterable[list[dict[str, Any]]]
+        :param cot_index_state: The COT Index state of the assets, loaded from its state file if not given.
+        :type cot_index_state: COTIndexState
+        :param cot_repository: The repository the windows missing from the state file are recovered from, when no COT
+        Index state is given.
+        :type cot_repository: COTRepository
+        :raises ValueError: If no COT Index state is given and the state of an asset can neither be loaded nor recovered.
+        """
+        is_prepared: bool = cot_index_state is not None
+        cot_index_state = cot_index_state or COTIndexState()
+        cot_reports: list[COTReport] = []
+        async for batch in batches:
+            if not is_prepared:
+                await cls._prepare_cot_index_state(batch, cot_index_state, cot_repository)
+            cot_reports.extend(await cls.from_dicts(batch, cot_index_state))
+        return cot_reports
+
+    @staticmethod
+    async def _prepare_cot_index_state(
+            data: list[dict[str, Any]],
+            cot_index_state: COTIndexState,
+            cot_repository: COTRepository | None
+        ) -> None:
+        """
+        Loads the state file, and recovers the windows of the assets of the data missing from it from the repository.
+        Without a repository, a missing window is an error: the COT Index of its asset would silently be unknown.
+        """
+        asset_codes: list[str] = sorted({
+            asset.code for record in data
+            if (asset := ReportedAssets.by_cftc_code.get(record["cftc_contract_market_code"])) is not None
+        })
+        if not asset_codes:
+            return
+        if cot_repository is not None:
+            end_date: str = max(record["report_date_as_yyyy_mm_dd"].split("T")[0] for record in data)
+            await cot_index_state.load_or_recover(cot_repository, asset_codes, end_date)
+            return
+        if not cot_index_state.is_loaded:
+            cot_index_state.load()
+        missing_codes: list[str] = [code for code in asset_codes if cot_index_state.get_window(code) is None]
+        if missing_codes:
+            raise ValueError(
+                f"The COT Index state has no window for {', '.join(missing_codes)}, give a COT repository to recover "
+                f"it from or a COT Index state."
+            )
+
     @staticmethod
-    async def to_dataframe(cot_reports: list[COTReport]) -> pd.DataFrame:
+    async def to_dataframe(cot_reports: list[COTReport]) -> "pd.DataFrame":
         """
         Converts the given COT reports to a data frame.
         
@@ -131,7 +235,9 @@ class COTReportPresenter():
         raise NotImplementedError
     
     @classmethod
-    async def from_dataframe(cls, data: pd.DataFrame, suppress_error: bool = False) -> list[COTReport]:
+    @Tracer.traced("COTReportPresenter.from_dataframe")
+    @_CONVERSION_SECONDS.time(conversion="from_dataframe")
+    async def from_dataframe(cls, data: "pd.DataFrame", suppress_error: bool = False) -> list[COTReport]:
         """
         Converts the given data into a list of COT reports.
 
@@ -149,10 +255,12 @@ class COTReportPresenter():
                 for _, row in data.iterrows()
                 ]
             results: list[COTReport | None] = await asyncio.gather(*tasks)
-            return [result for result in results if result is not None]
+            cot_reports: list[COTReport] = [result for result in results if result is not None]
+            cls._CONVERTED_REPORTS.inc(len(cot_reports), conversion="from_dataframe")
+            return cot_reports
     
     @classmethod
-    def _build_from_dataframe_row(cls, row: pd.Series, suppress_error: bool = False) -> COTReport | None:
+    def _build_from_dataframe_row(cls, row: "pd.Series", suppress_error: bool = False) -> COTReport | None:
         """
         Builds a COT report from a single data frame row.
         :param row: A data frame row.
@@ -162,18 +270,15 @@ class COTReportPresenter():
         :type suppress_error: bool
         :returns: A COT report.
         """
-        columns: list[str] = cls._REQUIRED_DATAFRAME_COLUMNS.to_list()
-        asset_code: str = ""
+        columns: list[str] = cls._REQUIRED_DATAFRAME_COLUMNS
         cftc_code: str = str(row[columns[0]])
-        for asset in ReportedAssets.all:
-            if asset.cftc_code == cftc_code:
-                asset_code = asset.code
-                break
-        if asset_code == "":
+        asset: Asset | None = ReportedAssets.by_cftc_code.get(cftc_code)
+        if asset is None:
             if suppress_error:
                 return None
             raise ValueError(f"The CFTC contract code: {cftc_code} does not belong to any asset in the reported assets")
         
+        asset_code: str = asset.code
         reported_date: str = str(row[columns[1]])
         commercial_traders: CommercialTraders = CommercialTraders(
             long=int(row[columns[5]]),
@@ -196,11 +301,12 @@ class COTReportPresenter():
             commercials=commercial_traders,
             noncommercials=noncommercial_traders,
             open_interest=open_interest,
-            open_interest_change=open_interest_change
+            open_interest_change=open_interest_change,
+            sentiment_threshold=SentimentThresholds.get_configured().for_asset(asset_code)
         )
     
     @classmethod
-    def _verify_required_columns_exists(cls, data: pd.DataFrame) -> None:
+    def _verify_required_columns_exists(cls, data: "pd.DataFrame") -> None:
         """
         Verifies if the required data frame columns are present in the given COT reports data frame.
         
@@ -208,12 +314,13 @@ class COTReportPresenter():
         :type data: DataFrame
         :raises ValueError: If a required column is not found in the given data's column.
         """
-        difference: pd.Index[str] = cls._REQUIRED_DATAFRAME_COLUMNS.difference(data.columns)
-        if difference.size > 0: raise ValueError(f"Columns {difference.tolist()} not found in the given data.") 
+        difference: list[str] = [column for column in cls._REQUIRED_DATAFRAME_COLUMNS if column not in data.columns]
+        if difference: raise ValueError(f"Columns {difference} not found in the given data.") 
 
 
 if __name__ == "__main__":
     import time
+    import pandas as pd
     presenter = COTReportPresenter()
     async def main():
         start = time.time()
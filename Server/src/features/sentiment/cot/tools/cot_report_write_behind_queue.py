@@ -0,0 +1,236 @@
+import asyncio
+from collections import deque
+import time
+from typing import Callable, Final
+
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+from shared.utils.logger import Logger
+
+
+class COTReportWriteBehindQueue:
+    """
+    Persists COT reports in the background so callers don't wait for the database write.
+
+    Reports put in the queue are written to the COT repository in batches, a batch is flushed once it holds batch_size
+    reports or once flush_interval seconds have passed since its first report. When max_pending reports are waiting,
+    put() waits for room in the queue, which slows producers down to the speed of the database.
+
+    A failed write is retried with an exponential backoff. Reports still unwritten after the retries are kept and
+    written with the next batch, once max_pending of them are kept the writer retries them before taking new reports,
+    so producers wait instead of reports being dropped. Only reports that can't be written when the queue is closed
+    are lost, they are counted in failed.
+
+    put() can be given a callback that is called with its reports once they are all written, e.g. to publish them only
+    after they are stored. Reports are written in the order they were queued, kept reports first, so once a write
+    succeeds every report taken from the queue so far is stored.
+    """
+    _DEFAULT_BATCH_SIZE: Final[int] = 100
+    _DEFAULT_FLUSH_INTERVAL: Final[float] = 1.0
+    _DEFAULT_MAX_PENDING: Final[int] = 1_000
+    _DEFAULT_MAX_RETRIES: Final[int] = 3
+    _DEFAULT_RETRY_DELAY: Final[float] = 0.5
+    _MAX_RETRY_DELAY: Final[float] = 30.0
+
+    def __init__(
+            self,
+            cot_repository: COTRepository,
+            batch_size: int = _DEFAULT_BATCH_SIZE,
+            flush_interval: float = _DEFAULT_FLUSH_INTERVAL,
+            max_pending: int = _DEFAULT_MAX_PENDING,
+            max_retries: int = _DEFAULT_MAX_RETRIES,
+            retry_delay: float = _DEFAULT_RETRY_DELAY
+        ):
+        """
+        :param cot_repository: The repository the reports are written to.
+        :type cot_repository: COTRepository
+        :param batch_size: The maximum number of reports written at once.
+        :type batch_size: int
+        :param flush_interval: The maximum number of seconds a report waits before its batch is written.
+        :type flush_interval: float
+        :param max_pending: The maximum number of reports waiting to be written.
+        :type max_pending: int
+        :param max_retries: The number of times a failed write is retried before its reports are kept for the next
+        batch.
+        :type max_retries: int
+        :param retry_delay: The number of seconds before the first retry, doubled on each retry.
+        :type retry_delay: float
+        """
+        if batch_size <= 0 or max_pending <= 0:
+            raise ValueError("The batch size and the maximum number of pending reports must be greater than 0.")
+        self._cot_repository = cot_repository
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_pending = max_pending
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+        self._unwritten: list[COTReport] = []
+        self._is_closing: bool = False
+        self._queue: asyncio.Queue[COTReport | None] = asyncio.Queue(maxsize=max_pending)
+        self._worker: asyncio.Task | None = None
+        self._queued: int = 0
+        self._taken: int = 0
+        self._callbacks: deque[tuple[int, Callable[[list[COTReport]], None], list[COTReport]]] = deque()
+        self.persisted: int = 0
+        self.failed: int = 0
+
+    @property
+    def pending(self) -> int:
+        """
+        :return int: The number of reports waiting to be written.
+        """
+        return self._queue.qsize()
+
+    @property
+    def unwritten(self) -> int:
+        """
+        :return int: The number of reports whose write failed, kept to be written with the next batch.
+        """
+        return len(self._unwritten)
+
+    def start(self) -> None:
+        """
+        Starts the background writer, put() starts it if it isn't running yet.
+        """
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def put(
+            self,
+            cot_reports: list[COTReport],
+            on_written: Callable[[list[COTReport]], None] | None = None
+        ) -> None:
+        """
+        Queues the reports to be written, waits only while the queue is full.
+
+        :param cot_reports: The reports to write.
+        :type cot_reports: list[COTReport]
+        :param on_written: Called with the reports once they are all written, not called if they are dropped on close.
+        :type on_written: Callable[[list[COTReport]], None]
+        """
+        self.start()
+        for report in cot_reports:
+            await self._queue.put(report)
+            self._queued += 1
+        if on_written is not None:
+            # Nothing was awaited since the last report was queued, so the writer can't have taken it yet.
+            self._callbacks.append((self._queued, on_written, cot_reports))
+
+    async def flush(self) -> None:
+        """
+        Waits until every queued report has been written, or kept for the next batch after its write failed.
+        """
+        if self._worker is not None:
+            await self._queue.join()
+
+    async def close(self) -> None:
+        """
+        Writes every queued report, and the reports kept after a failed write, and stops the background writer.
+        """
+        if self._worker is None:
+            return
+        self._is_closing = True
+        await self._queue.put(None)
+        await self._worker
+        self._worker = None
+        self._is_closing = False
+
+    async def __aenter__(self) -> "COTReportWriteBehindQueue":
+        self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    async def _run(self) -> None:
+        """
+        Collects the queued reports into batches and writes them until the stop marker (None) is received.
+        """
+        stopping: bool = False
+        while not stopping:
+            first: COTReport | None = await self._queue.get()
+            batch: list[COTReport] = []
+            if first is None:
+                stopping = True
+            else:
+                batch.append(first)
+                self._taken += 1
+            deadline: float = time.monotonic() + self._flush_interval
+            while not stopping and len(batch) < self._batch_size:
+                remaining: float = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    report: COTReport | None = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+                if report is None:
+                    stopping = True
+                else:
+                    batch.append(report)
+                    self._taken += 1
+            await self._write(batch)
+            while not stopping and not self._is_closing and len(self._unwritten) >= self._max_pending:
+                await self._write([])
+            if stopping and self._unwritten:
+                self.failed += len(self._unwritten)
+                Logger.log(
+                    name=self.__class__.__name__,
+                    level=Logger.ERROR,
+                    message=f"Dropped {len(self._unwritten)} COT reports that could not be written before closing."
+                )
+                self._unwritten = []
+                while self._callbacks and self._callbacks[0][0] <= self._taken:
+                    self._callbacks.popleft()
+            for _ in range(len(batch) + int(stopping)):
+                self._queue.task_done()
+
+    async def _write(self, batch: list[COTReport]) -> None:
+        """
+        Writes the reports kept after a failed write, then the batch, retrying with a backoff. If every attempt fails
+        the reports are kept again.
+        """
+        # Kept reports go first, so a newer report of the same asset and week overwrites them.
+        cot_reports: list[COTReport] = self._unwritten + batch
+        if not cot_reports:
+            return
+        for attempt in range(self._max_retries + 1):
+            try:
+                await self._cot_repository.insert_cot_reports(cot_reports)
+                self.persisted += len(cot_reports)
+                self._unwritten = []
+                self._notify()
+                return
+            except Exception as error:
+                if attempt == self._max_retries:
+                    Logger.log(
+                        name=self.__class__.__name__,
+                        level=Logger.ERROR,
+                        message=f"Failed to write {len(cot_reports)} COT reports, keeping them for the next batch: "
+                                f"{error}"
+                    )
+                    break
+                delay: float = min(self._MAX_RETRY_DELAY, self._retry_delay * 2 ** attempt)
+                Logger.log(
+                    name=self.__class__.__name__,
+                    level=Logger.WARNING,
+                    message=f"Failed to write {len(cot_reports)} COT reports, retrying in {delay:.2f}s "
+                            f"(Attempt {attempt + 1}/{self._max_retries}): {error}"
+                )
+                await asyncio.sleep(delay)
+        self._unwritten = cot_reports
+
+    def _notify(self) -> None:
+        """
+        Calls the callbacks of the puts whose reports were all taken from the queue, and so written.
+        """
+        while self._callbacks and self._callbacks[0][0] <= self._taken:
+            _, on_written, cot_reports = self._callbacks.popleft()
+            try:
+                on_written(cot_reports)
+            except Exception as error:
+                Logger.log(
+                    name=self.__class__.__name__,
+                    level=Logger.ERROR,
+                    message=f"The callback of {len(cot_reports)} written COT reports failed: {error}"
+                )
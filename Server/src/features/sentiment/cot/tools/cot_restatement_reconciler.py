@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+from typing import Callable, Final
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState, RollingWindow
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.percentile_rank_index import PercentileRankIndex
+from shared.utils.logger import Logger
+
+
+class COTRestatementReconciler:
+    """
+    Picks up reports revised (restated) by the CFTC without re-ingesting the whole history.
+
+    The content hash of each incoming report is compared with the hash of the stored report of the same asset and week.
+    Only new and changed reports are written, together with the stored reports whose COT Index or percentile ranks
+    depend on them: the 156 weeks following a changed week. The rolling COT Index state is rebuilt for the assets whose
+    current window holds a changed week, and the percentile rank index drops them so it is built again.
+
+    Listeners are called with the written reports, e.g. to invalidate what was derived from the restated release.
+    """
+    _N_WEEKS: Final[int] = 156
+
+    def __init__(
+            self,
+            cot_repository: COTRepository,
+            cot_index_state: COTIndexState | None = None,
+            percentile_rank_index: PercentileRankIndex | None = None,
+            listeners: list[Callable[[list[COTReport]], None]] | None = None
+        ):
+        """
+        :param cot_repository: The repository holding the stored reports.
+        :type cot_repository: COTRepository
+        :param cot_index_state: The rolling COT Index state, defaults to the one of the state file.
+        :type cot_index_state: COTIndexState
+        :param percentile_rank_index: The percentile rank index kept by the service, if any.
+        :type percentile_rank_index: PercentileRankIndex
+        :param listeners: Called with the written reports once they are stored.
+        :type listeners: list[Callable[[list[COTReport]], None]]
+        """
+        self._cot_repository = cot_repository
+        self._cot_index_state: COTIndexState = cot_index_state or COTIndexState()
+        self._percentile_rank_index = percentile_rank_index
+        self._listeners: list[Callable[[list[COTReport]], None]] = listeners or []
+        self._cot_report_presenter: COTReportPresenter = COTReportPresenter()
+
+    async def reconcile(self, cot_reports: list[COTReport]) -> list[COTReport]:
+        """
+        Writes the new and restated reports among the given reports and recomputes the COT Index and percentile ranks
+        they affect.
+
+        :param cot_reports: The reports as currently published by the CFTC.
+        :type cot_reports: list[COTReport]
+        :return list[COTReport]: The reports that were written, new and restated reports first.
+        """
+        changed_reports: list[COTReport] = await self._find_changed_reports(cot_reports)
+        if not changed_reports:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"None of the {len(cot_reports)} reports changed."
+            )
+            return []
+        reports_by_asset: dict[str, dict[str, COTReport]] = await self._fetch_affected_reports(changed_reports)
+        for report in changed_reports:
+            reports_by_asset.setdefault(report.asset_code, {})[report.reported_date] = report
+
+        changed_keys: set[tuple[str, str]] = {(report.asset_code, report.reported_date) for report in changed_reports}
+        recomputed_reports: list[COTReport] = []
+        for asset_code, reports_by_date in reports_by_asset.items():
+            first_changed_date: str = min(changed_date for code, changed_date in changed_keys if code == asset_code)
+            window: RollingWindow = RollingWindow(self._N_WEEKS)
+            percentile_rank_index: PercentileRankIndex = PercentileRankIndex(self._N_WEEKS)
+            for reported_date in sorted(reports_by_date):
+                report: COTReport = reports_by_date[reported_date]
+                window.push(reported_date, report.commercials.do_net())
+                percentile_rank_index.add(report)
+                if reported_date < first_changed_date:
+                    continue
+                cot_index: int | None = CommercialTraders.calculate_cot_index(
+                    report.commercials.do_net(), window.minimum, window.maximum
+                ) if window.is_full else None
+                percentile_ranks: dict[str, float | None] = percentile_rank_index.percentile_ranks(report)
+                if (asset_code, reported_date) in changed_keys:
+                    report.commercials.cot_index = cot_index
+                    report.percentile_ranks = percentile_ranks
+                elif report.commercials.cot_index != cot_index or report.percentile_ranks != percentile_ranks:
+                    report.commercials.cot_index = cot_index
+                    report.percentile_ranks = percentile_ranks
+                    recomputed_reports.append(report)
+
+        await self._cot_repository.insert_cot_reports(changed_reports + recomputed_reports)
+        self._update_cot_index_state(changed_reports, reports_by_asset)
+        if self._percentile_rank_index is not None:
+            self._percentile_rank_index.discard(list(reports_by_asset))
+        Logger.log(
+            name=self.__class__.__name__,
+            level=Logger.INFO,
+            message=f"Wrote {len(changed_reports)} new or restated reports and recomputed the COT Index of "
+                    f"{len(recomputed_reports)} stored reports."
+        )
+        for listener in self._listeners:
+            listener(changed_reports + recomputed_reports)
+        return changed_reports + recomputed_reports
+
+    async def _find_changed_reports(self, cot_reports: list[COTReport]) -> list[COTReport]:
+        """
+        :return list[COTReport]: The reports that are not stored yet or whose content hash differs from the stored one.
+        """
+        if not cot_reports:
+            return []
+        try:
+            records: list[tuple] = await self._cot_repository.fetch_cot_reports_by(
+                asset_codes=list(dict.fromkeys(report.asset_code for report in cot_reports)),
+                released_dates=list(dict.fromkeys(report.reported_date for report in cot_reports))
+            )
+        except LookupError:
+            records = []
+        stored_hashes: dict[tuple[str, str], str] = {
+            (report.asset_code, report.reported_date): report.content_hash()
+            for report in self._cot_report_presenter.from_list(records)
+        }
+        return [
+            report for report in cot_reports
+            if stored_hashes.get((report.asset_code, report.reported_date)) != report.content_hash()
+        ]
+
+    async def _fetch_affected_reports(self, changed_reports: list[COTReport]) -> dict[str, dict[str, COTReport]]:
+        """
+        Fetches the stored reports needed to recompute the COT Index of the weeks that depend on the changed reports:
+        the 156 weeks before the first changed week, for the window, up to 156 weeks after the last one.
+
+        :return dict[str, dict[str, COTReport]]: The stored reports by asset code and reported date.
+        """
+        changed_dates: list[date] = [date.fromisoformat(report.reported_date) for report in changed_reports]
+        try:
+            records: list[tuple] = await self._cot_repository.fetch_cot_reports_between(
+                asset_codes=list(dict.fromkeys(report.asset_code for report in changed_reports)),
+                start_date=str(min(changed_dates) - timedelta(weeks=self._N_WEEKS)),
+                end_date=str(max(changed_dates) + timedelta(weeks=self._N_WEEKS))
+            )
+        except LookupError:
+            records = []
+        reports_by_asset: dict[str, dict[str, COTReport]] = {}
+        for report in self._cot_report_presenter.from_list(records):
+            reports_by_asset.setdefault(report.asset_code, {})[report.reported_date] = report
+        return reports_by_asset
+
+    def _update_cot_index_state(
+            self,
+            changed_reports: list[COTReport],
+            reports_by_asset: dict[str, dict[str, COTReport]]
+        ) -> None:
+        """
+        Rebuilds the rolling windows that hold a changed week or fall behind a new week, windows that moved past the
+        changed weeks are kept.
+        """
+        if not self._cot_index_state.is_loaded and not self._cot_index_state.load():
+            return
+        reports_to_rebuild: list[COTReport] = []
+        for asset_code, reports_by_date in reports_by_asset.items():
+            window: RollingWindow | None = self._cot_index_state.get_window(asset_code)
+            if window is None or window.latest_date is None:
+                continue
+            changed_dates: list[str] = [
+                report.reported_date for report in changed_reports if report.asset_code == asset_code
+            ]
+            latest_date: str = max(window.latest_date, *changed_dates)
+            oldest_date: str = str(date.fromisoformat(latest_date) - timedelta(weeks=self._N_WEEKS - 1))
+            if not any(oldest_date <= changed_date <= latest_date for changed_date in changed_dates):
+                continue
+            reports_to_rebuild.extend(
+                report for reported_date, report in reports_by_date.items() if reported_date <= latest_date
+            )
+        if reports_to_rebuild:
+            self._cot_index_state.rebuild(reports_to_rebuild)
+            self._cot_index_state.save()
@@ -0,0 +1,317 @@
+import asyncio
+from datetime import datetime, timezone
+import hashlib
+import json
+import os
+import time
+from typing import Any, Final
+from features.sentiment.cot.core.interfaces.cot_service import COTService
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from shared.models.asset import Asset
+from shared.models.reported_assets import ReportedAssets
+from shared.utils.logger import Logger
+from shared.utils.settings import Settings
+from shared.utils.util import Util
+
+
+class COTReleaseSnapshot:
+    """
+    The representations of the report of every asset of one release, computed once: the serialized JSON of
+    COTReport.to_dict and the text of COTReport.describe in each view. A snapshot doesn't change once built.
+
+    The views are default (positions), enhanced (COT Index, sentiment and percentile ranks) and full (both). The
+    sentiment depends on the configured thresholds, so a snapshot records the version of the thresholds it was built
+    with.
+    """
+    VIEWS: Final[dict[str, tuple[bool, bool]]] = {
+        "default": (True, False),
+        "enhanced": (False, True),
+        "full": (True, True)
+    }
+    _SNAPSHOT_VERSION: Final[int] = 2
+
+    def __init__(
+            self,
+            release_date: str,
+            representations: dict[str, dict[str, dict[str, str]]],
+            created_at: str,
+            thresholds_version: str
+        ):
+        """
+        :param release_date: The reported date of the release.
+        :type release_date: str
+        :param representations: The serialized JSON ("json") and text ("text") of each view, by asset code.
+        :type representations: dict[str, dict[str, dict[str, str]]]
+        :param created_at: When the snapshot was built, in ISO format.
+        :type created_at: str
+        :param thresholds_version: The version of the sentiment thresholds the snapshot was built with, see
+        get_thresholds_version.
+        :type thresholds_version: str
+        """
+        self.release_date = release_date
+        self.created_at = created_at
+        self.thresholds_version = thresholds_version
+        self._texts: dict[str, dict[str, str]] = {
+            asset_code: dict(representation["text"]) for asset_code, representation in representations.items()
+        }
+        self._json: dict[str, dict[str, bytes]] = {
+            asset_code: {view: body.encode() for view, body in representation["json"].items()}
+            for asset_code, representation in representations.items()
+        }
+
+    @classmethod
+    def from_reports(cls, release_date: str, cot_reports: list[COTReport]) -> "COTReleaseSnapshot":
+        """
+        :param release_date: The reported date of the release.
+        :type release_date: str
+        :param cot_reports: The reports of the release, one per asset.
+        :type cot_reports: list[COTReport]
+        :return COTReleaseSnapshot: The snapshot of the reports.
+        """
+        representations: dict[str, dict[str, dict[str, str]]] = {
+            report.asset_code: {
+                "json": {
+                    view: json.dumps(report.to_dict(verbose=verbose, enhanced=enhanced))
+                    for view, (verbose, enhanced) in cls.VIEWS.items()
+                },
+                "text": {
+                    view: report.describe(verbose=verbose, enhanced=enhanced)
+                    for view, (verbose, enhanced) in cls.VIEWS.items()
+                }
+            }
+            for report in cot_reports
+        }
+        return cls(
+            release_date,
+            representations,
+            datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            cls.get_thresholds_version()
+        )
+
+    @staticmethod
+    def get_thresholds_version() -> str:
+        """
+        :return str: The digest of the configured sentiment thresholds, it changes when the thresholds are edited.
+        """
+        thresholds: dict[str, Any] = SentimentThresholds.get_configured().to_dict()
+        return hashlib.sha256(json.dumps(thresholds, sort_keys=True).encode()).hexdigest()[:16]
+
+    @classmethod
+    def from_file(cls, snapshot_file: str) -> "COTReleaseSnapshot":
+        """
+        :param snapshot_file: A file written by to_file.
+        :type snapshot_file: str
+        :return COTReleaseSnapshot: The snapshot of the file.
+        :raises ValueError: If the file was written by an incompatible version.
+        """
+        with open(snapshot_file, "r") as file:
+            content: dict[str, Any] = json.load(file)
+        if content.get("version") != cls._SNAPSHOT_VERSION:
+            raise ValueError(f"The snapshot file {snapshot_file} has an unsupported version {content.get("version")}.")
+        return cls(content["release_date"], content["assets"], content["created_at"], content["thresholds_version"])
+
+    def to_file(self, snapshot_file: str) -> None:
+        """
+        Writes the snapshot atomically, a crash while writing leaves no partial file behind.
+        """
+        os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
+        temporary_file: str = f"{snapshot_file}.tmp"
+        with open(temporary_file, "w") as file:
+            json.dump(
+                {
+                    "version": self._SNAPSHOT_VERSION,
+                    "release_date": self.release_date,
+                    "created_at": self.created_at,
+                    "thresholds_version": self.thresholds_version,
+                    "assets": {
+                        asset_code: {
+                            "json": {view: body.decode() for view, body in self._json[asset_code].items()},
+                            "text": self._texts[asset_code]
+                        }
+                        for asset_code in self._json
+                    }
+                },
+                file
+            )
+        os.replace(temporary_file, snapshot_file)
+
+    @property
+    def asset_codes(self) -> list[str]:
+        return list(self._json)
+
+    def has_asset(self, asset_code: str) -> bool:
+        return asset_code in self._json
+
+    def to_json(self, asset_code: str, view: str = "full") -> bytes:
+        """
+        :return bytes: The serialized JSON of the report of the asset.
+        :raises KeyError: If the asset or the view is not in the snapshot.
+        """
+        return self._json[asset_code][view]
+
+    def to_json_array(self, asset_codes: list[str], view: str = "full") -> bytes:
+        """
+        :return bytes: The serialized JSON array of the reports of the assets in the snapshot, in the given order.
+        """
+        return b"[" + b", ".join(self._json[code][view] for code in asset_codes if code in self._json) + b"]"
+
+    def to_text(self, asset_code: str, view: str = "full") -> str:
+        """
+        :return str: The description of the report of the asset.
+        :raises KeyError: If the asset or the view is not in the snapshot.
+        """
+        return self._texts[asset_code][view]
+
+
+class COTSnapshotStore:
+    """
+    Materializes the snapshot of the latest release once and keeps it in memory and in
+    data/cot/snapshots/<release date>.json, so views serve the representations of reports without computing them
+    again. A process started later loads the snapshot file instead of fetching and rendering the reports.
+
+    A snapshot is built again once its release was restated and invalidated, see invalidate, or once the sentiment
+    thresholds changed. Only complete snapshots, with a report for every asset of the store, are written to a file. A
+    release still missing assets is logged and its partial snapshot kept in memory for a short while, so requests
+    don't fetch it again and again until the CFTC publishes the missing assets.
+    """
+    _DEFAULT_SNAPSHOT_DIR: Final[str] = f"{Util.get_root_dir()}/data/cot/snapshots"
+    _PARTIAL_SNAPSHOT_TTL: Final[float] = 60.0
+
+    def __init__(
+            self,
+            cot_service: COTService,
+            snapshot_dir: str | None = None,
+            assets: list[Asset] = ReportedAssets.all,
+            partial_snapshot_ttl: float = _PARTIAL_SNAPSHOT_TTL
+        ):
+        """
+        :param cot_service: The service the reports of the latest release are fetched from.
+        :type cot_service: COTService
+        :param snapshot_dir: The directory of the snapshot files, defaults to the COT_SNAPSHOT_DIR environment variable
+        or data/cot/snapshots.
+        :type snapshot_dir: str
+        :param assets: The assets of the snapshots.
+        :type assets: list[Asset]
+        :param partial_snapshot_ttl: The number of seconds a snapshot missing assets is kept in memory.
+        :type partial_snapshot_ttl: float
+        """
+        self._cot_service = cot_service
+        self._snapshot_dir: str = snapshot_dir or Settings.get_instance().cot_snapshot_dir or self._DEFAULT_SNAPSHOT_DIR
+        self._assets = assets
+        self._partial_snapshot_ttl = partial_snapshot_ttl
+        self._snapshot: COTReleaseSnapshot | None = None
+        self._expires_at: float | None = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+        self._generation: int = 0
+
+    async def get_latest(self) -> COTReleaseSnapshot:
+        """
+        :return COTReleaseSnapshot: The snapshot of the latest release.
+        """
+        release_date: str = self._cot_service.calculate_last_report_release_date()
+        if self._is_fresh(release_date):
+            return self._snapshot
+        async with self._lock:
+            if self._is_fresh(release_date):
+                return self._snapshot
+            generation: int = self._generation
+            snapshot_file: str = os.path.join(self._snapshot_dir, f"{release_date}.json")
+            snapshot: COTReleaseSnapshot | None = await asyncio.to_thread(self._load, snapshot_file)
+            if snapshot is None:
+                snapshot = await self._materialize(release_date, snapshot_file, generation)
+            # A snapshot built while its release was invalidated may hold the reports from before the restatement.
+            if generation == self._generation:
+                self._snapshot = snapshot
+                self._expires_at = (
+                    None if self.is_complete(snapshot) else time.monotonic() + self._partial_snapshot_ttl
+                )
+            return snapshot
+
+    def invalidate(self, release_dates: list[str]) -> None:
+        """
+        Drops the snapshots of the releases and deletes their files, e.g. once the CFTC restated their reports, so the
+        next request materializes them again.
+
+        :param release_dates: The reported dates of the releases.
+        :type release_dates: list[str]
+        """
+        self._generation += 1
+        if self._snapshot is not None and self._snapshot.release_date in release_dates:
+            self._snapshot = None
+            self._expires_at = None
+        for release_date in set(release_dates):
+            try:
+                os.remove(os.path.join(self._snapshot_dir, f"{release_date}.json"))
+            except FileNotFoundError:
+                continue
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Invalidated the snapshot of the release of {release_date}."
+            )
+
+    async def _materialize(self, release_date: str, snapshot_file: str, generation: int) -> COTReleaseSnapshot:
+        cot_reports: list[COTReport] = await self._cot_service.fetch_latest_report(self._assets)
+        snapshot: COTReleaseSnapshot = await asyncio.to_thread(
+            COTReleaseSnapshot.from_reports, release_date, cot_reports
+        )
+        if not self.is_complete(snapshot):
+            missing_codes: list[str] = [asset.code for asset in self._assets if not snapshot.has_asset(asset.code)]
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.WARNING,
+                message=f"The release of {release_date} is missing {', '.join(missing_codes)}, its snapshot is kept "
+                        f"for {self._partial_snapshot_ttl} seconds and not written."
+            )
+        elif generation == self._generation:
+            await asyncio.to_thread(snapshot.to_file, snapshot_file)
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Materialized the snapshot of {len(cot_reports)} assets for the release of {release_date}."
+            )
+        return snapshot
+
+    def _is_fresh(self, release_date: str) -> bool:
+        """
+        :return bool: Whether the snapshot in memory is of the release and the configured thresholds, and still within
+        its time to live if it is partial.
+        """
+        return (
+            self._snapshot is not None
+            and self._snapshot.release_date == release_date
+            and self._snapshot.thresholds_version == COTReleaseSnapshot.get_thresholds_version()
+            and (self._expires_at is None or time.monotonic() < self._expires_at)
+        )
+
+    def _load(self, snapshot_file: str) -> COTReleaseSnapshot | None:
+        if not os.path.exists(snapshot_file):
+            return None
+        try:
+            snapshot: COTReleaseSnapshot = COTReleaseSnapshot.from_file(snapshot_file)
+        except (OSError, ValueError, KeyError) as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.WARNING,
+                message=f"Ignored the unreadable snapshot file {snapshot_file}: {error}"
+            )
+            return None
+        if snapshot.thresholds_version != COTReleaseSnapshot.get_thresholds_version():
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Ignored the snapshot file {snapshot_file}, it was built with other sentiment thresholds."
+            )
+            return None
+        return snapshot
+
+    def is_complete(self, snapshot: COTReleaseSnapshot, assets: list[Asset] | None = None) -> bool:
+        """
+        :param snapshot: A snapshot returned by get_latest.
+        :type snapshot: COTReleaseSnapshot
+        :param assets: The assets to check, defaults to every asset of the store.
+        :type assets: list[Asset]
+        :return bool: Whether the snapshot has the report of every asset, an incomplete snapshot should not be cached.
+        """
+        return all(snapshot.has_asset(asset.code) for asset in (self._assets if assets is None else assets))
@@ -0,0 +1,180 @@
+import asyncio
+from typing import Any
+import numpy as np
+from features.sentiment.cot.core.interfaces.cot_service import COTService
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.sentiment_classifier import SentimentClassifier
+from shared.enums.reading import Reading
+from shared.interfaces.reading_provider import ReadingProvider
+from shared.models.asset import Asset
+from shared.models.pair import Pair
+from shared.models.reported_assets import ReportedAssets
+from shared.models.reported_pairs import ReportedPairs
+from shared.utils.logger import Logger
+
+
+class PairReadingMatrix(ReadingProvider):
+    """
+    The readings of every pair of assets of one COT release, computed at once from the positioning of each asset.
+
+    Each cell compares the base asset of its row with the quote asset of its column:
+    - relative COT Index: the COT Index of commercials of the base minus the one of the quote, from -100 to 100. It is
+    None when either asset has less than 156 weeks of history, so it has no COT Index.
+    - relative percentage net: the noncommercial percentage net of the base minus the one of the quote.
+    - reading: bullish when noncommercials are more bullish on the base than on the quote, bearish when less.
+
+    Looking up an asset missing from the release raises a LookupError.
+    """
+    def __init__(
+            self,
+            cot_reports: list[COTReport],
+            release_date: str,
+            sentiment_classifier: SentimentClassifier | None = None
+        ):
+        """
+        :param cot_reports: The reports of the release.
+        :type cot_reports: list[COTReport]
+        :param release_date: The reported date of the release.
+        :type release_date: str
+        :param sentiment_classifier: Classifies the sentiment of each asset, defaults to the thresholds file.
+        :type sentiment_classifier: SentimentClassifier
+        """
+        self.release_date = release_date
+        self.asset_codes: list[str] = [report.asset_code for report in cot_reports]
+        self._index: dict[str, int] = {asset_code: row for row, asset_code in enumerate(self.asset_codes)}
+        classifier: SentimentClassifier = sentiment_classifier or SentimentClassifier()
+        n_assets: int = len(cot_reports)
+        # An unknown COT Index is NaN, so the relative COT Index of its pairs is NaN instead of relative to 0.
+        cot_indices: np.ndarray = np.fromiter(
+            (
+                np.nan if report.commercials.cot_index is None and report.commercials.historical_net is None
+                else report.commercials.get_cot_index()
+                for report in cot_reports
+            ),
+            dtype=np.float64,
+            count=n_assets
+        )
+        percentage_nets: np.ndarray = np.fromiter(
+            (report.noncommercials.do_percentage_net() for report in cot_reports), dtype=np.float64, count=n_assets
+        )
+        self.sentiments: np.ndarray = classifier.classify(self.asset_codes, percentage_nets)
+        self.relative_cot_index: np.ndarray = cot_indices[:, None] - cot_indices[None, :]
+        self.relative_percentage_net: np.ndarray = np.round(percentage_nets[:, None] - percentage_nets[None, :], 1)
+        self.readings: np.ndarray = np.sign(
+            self.sentiments[:, None].astype(np.int16) - self.sentiments[None, :]
+        ).astype(np.int8)
+        self._pair_dicts: dict[str, dict[str, Any]] = {}
+
+    def has_pair(self, pair: Pair) -> bool:
+        return pair.base.code in self._index and pair.quote.code in self._index
+
+    def get_asset_reading(self, asset_code: str) -> Reading:
+        return Reading(int(self.sentiments[self._row_of(asset_code)]))
+
+    def get_pair_reading(self, base_code: str, quote_code: str) -> Reading:
+        return Reading(int(self.readings[self._row_of(base_code), self._row_of(quote_code)]))
+
+    def pair_to_dict(self, pair: Pair) -> dict[str, Any]:
+        """
+        :param pair: A pair of assets of the release.
+        :type pair: Pair
+        :raises LookupError: If either asset of the pair is not in the release.
+        :return dict[str, Any]: The readings of the pair.
+        """
+        if pair.code not in self._pair_dicts:
+            base, quote = self._row_of(pair.base.code), self._row_of(pair.quote.code)
+            relative_cot_index: float = float(self.relative_cot_index[base, quote])
+            self._pair_dicts[pair.code] = {
+                "pair": pair.code,
+                "reported_date": self.release_date,
+                "relative_cot_index": None if np.isnan(relative_cot_index) else relative_cot_index,
+                "relative_percentage_net": float(self.relative_percentage_net[base, quote]),
+                "reading": Reading(int(self.readings[base, quote])).name
+            }
+        return self._pair_dicts[pair.code]
+
+    def to_dicts(self, pairs: list[Pair] = ReportedPairs.all) -> list[dict[str, Any]]:
+        """
+        :param pairs: The pairs to include, pairs with an asset missing from the release are left out.
+        :type pairs: list[Pair]
+        :return list[dict[str, Any]]: The readings of each pair.
+        """
+        return [self.pair_to_dict(pair) for pair in pairs if self.has_pair(pair)]
+
+    def describe(self, pair: Pair) -> str:
+        pair_dict: dict[str, Any] = self.pair_to_dict(pair)
+        relative_cot_index: float | None = pair_dict["relative_cot_index"]
+        return "\n".join([
+            f"PAIR: {pair.code} ({pair.name})",
+            f"REPORTED DATE: {self.release_date}",
+            f"RELATIVE COT INDEX: {"N/A" if relative_cot_index is None else f"{relative_cot_index:+.0f}"}",
+            f"RELATIVE PERCENTAGE NET OF TREND FOLLOWERS: {pair_dict["relative_percentage_net"]:+.1f}%",
+            f"READING: {pair_dict["reading"].upper()}"
+        ])
+
+    def _row_of(self, asset_code: str) -> int:
+        try:
+            return self._index[asset_code]
+        except KeyError:
+            raise LookupError(f"{asset_code} is not in the COT release of {self.release_date}.") from None
+
+
+class PairReadingCache:
+    """
+    Keeps the pair reading matrix of the latest COT release, it is only rebuilt once a new release is due, so the
+    readings of every pair cost one fetch of the latest reports per release.
+
+    A matrix missing assets, e.g. while the release is not (fully) published yet, is returned but not kept, so the
+    next request fetches the release again.
+    """
+    def __init__(
+            self,
+            cot_service: COTService,
+            assets: list[Asset] = ReportedAssets.all,
+            sentiment_classifier: SentimentClassifier | None = None
+        ):
+        """
+        :param cot_service: The service the latest reports are fetched from.
+        :type cot_service: COTService
+        :param assets: The assets of the matrix.
+        :type assets: list[Asset]
+        :param sentiment_classifier: Classifies the sentiment of each asset, defaults to the thresholds file.
+        :type sentiment_classifier: SentimentClassifier
+        """
+        self._cot_service = cot_service
+        self._assets = assets
+        self._sentiment_classifier: SentimentClassifier = sentiment_classifier or SentimentClassifier()
+        self._matrix: PairReadingMatrix | None = None
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+    async def get(self) -> PairReadingMatrix:
+        """
+        :return PairReadingMatrix: The pair reading matrix of the latest release.
+        """
+        release_date: str = self._cot_service.calculate_last_report_release_date()
+        if self._matrix is not None and self._matrix.release_date == release_date:
+            return self._matrix
+        async with self._lock:
+            if self._matrix is not None and self._matrix.release_date == release_date:
+                return self._matrix
+            cot_reports: list[COTReport] = await self._cot_service.fetch_latest_report(self._assets)
+            matrix: PairReadingMatrix = PairReadingMatrix(cot_reports, release_date, self._sentiment_classifier)
+            missing_codes: list[str] = [asset.code for asset in self._assets if asset.code not in matrix.asset_codes]
+            if missing_codes:
+                Logger.log(
+                    name=self.__class__.__name__,
+                    level=Logger.WARNING,
+                    message=f"The release of {release_date} is missing {', '.join(missing_codes)}, its pair reading "
+                            f"matrix is not kept."
+                )
+                return matrix
+            self._matrix = matrix
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.INFO,
+                message=f"Built the pair reading matrix of {len(cot_reports)} assets for the release of {release_date}."
+            )
+        return self._matrix
+
+    def invalidate(self) -> None:
+        self._matrix = None
@@ -0,0 +1,167 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+from datetime import date, timedelta
+from typing import Callable, Final
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.week_calendar import WeekCalendar
+from shared.utils.logger import Logger
+from shared.utils.tracer import Tracer
+
+
+class PercentileRankIndex:
+    """
+    Ranks the positioning of each week within the history of its asset, e.g. where this week's noncommercial
+    percentage net ranks within the last 3 years.
+
+    Every asset keeps the values of each metric over the lookback window in a sorted list. A new week is inserted and
+    the weeks leaving the window are removed with a binary search, and a percentile rank is two binary searches, so
+    nothing is rescanned.
+    """
+    METRICS: Final[dict[str, Callable[[COTReport], float]]] = {
+        "commercial_net": lambda report: report.commercials.do_net(),
+        "commercial_percentage_net": lambda report: report.commercials.do_percentage_net(),
+        "noncommercial_net": lambda report: report.noncommercials.do_net(),
+        "noncommercial_percentage_net": lambda report: report.noncommercials.do_percentage_net(),
+        "open_interest": lambda report: report.open_interest
+    }
+    _DEFAULT_LOOKBACK_WEEKS: Final[int] = 156
+
+    def __init__(self, lookback_weeks: int = _DEFAULT_LOOKBACK_WEEKS):
+        """
+        :param lookback_weeks: The number of calendar weeks a week is ranked against, itself included.
+        :type lookback_weeks: int
+        """
+        self._lookback_weeks = lookback_weeks
+        self._sorted_values: dict[str, dict[str, list[float]]] = {}
+        self._history: dict[str, deque[tuple[int, dict[str, float]]]] = {}
+
+    def has_asset(self, asset_code: str) -> bool:
+        return asset_code in self._history
+
+    def create_empty(self) -> "PercentileRankIndex":
+        """
+        :return PercentileRankIndex: An empty index with the same lookback, e.g. to replay the whole history into before
+        it replaces this index, see replace.
+        """
+        return PercentileRankIndex(self._lookback_weeks)
+
+    def replace(self, percentile_rank_index: "PercentileRankIndex") -> None:
+        """
+        Takes over the windows of the given index, e.g. once the history replayed into it was written.
+
+        :param percentile_rank_index: The index to take the windows of.
+        :type percentile_rank_index: PercentileRankIndex
+        """
+        self._sorted_values = percentile_rank_index._sorted_values
+        self._history = percentile_rank_index._history
+
+    def discard(self, asset_codes: list[str]) -> None:
+        """
+        Drops the windows of the assets, e.g. after their stored reports were restated, build reads them again.
+        """
+        for asset_code in asset_codes:
+            self._sorted_values.pop(asset_code, None)
+            self._history.pop(asset_code, None)
+
+    def add(self, cot_report: COTReport) -> bool:
+        """
+        Adds the week of the report to its asset's window. A report of the newest week in the window replaces it.
+
+        :param cot_report: The report of the week.
+        :type cot_report: COTReport
+        :return bool: False if the report is older than the newest week in the window and was left out.
+        """
+        asset_code: str = cot_report.asset_code
+        week: int = WeekCalendar.to_week(cot_report.reported_date)
+        history: deque[tuple[int, dict[str, float]]] = self._history.setdefault(asset_code, deque())
+        sorted_values: dict[str, list[float]] = self._sorted_values.setdefault(
+            asset_code, {metric: [] for metric in self.METRICS}
+        )
+        if history and week < history[-1][0]:
+            return False
+        if history and week == history[-1][0]:
+            self._remove(sorted_values, history.pop()[1])
+        values: dict[str, float] = {metric: value(cot_report) for metric, value in self.METRICS.items()}
+        history.append((week, values))
+        for metric, value in values.items():
+            insort(sorted_values[metric], value)
+        while history[0][0] <= week - self._lookback_weeks:
+            self._remove(sorted_values, history.popleft()[1])
+        return True
+
+    def percentile_rank(self, asset_code: str, metric: str, value: float) -> float | None:
+        """
+        :param asset_code: The code of the asset.
+        :type asset_code: str
+        :param metric: One of the METRICS.
+        :type metric: str
+        :param value: The value to rank.
+        :type value: float
+        :return float | None: The percentage of weeks in the window below the value, ties counting half, None if the
+        asset has no history.
+        """
+        values: list[float] = self._sorted_values.get(asset_code, {}).get(metric, [])
+        if not values:
+            return None
+        below: int = bisect_left(values, value)
+        equal: int = bisect_right(values, value) - below
+        return round((below + equal / 2) / len(values) * 100, 1)
+
+    def percentile_ranks(self, cot_report: COTReport) -> dict[str, float | None]:
+        """
+        :return dict[str, float | None]: The percentile rank of each metric of the report within its asset's window.
+        """
+        return {
+            metric: self.percentile_rank(cot_report.asset_code, metric, value(cot_report))
+            for metric, value in self.METRICS.items()
+        }
+
+    def rank(self, cot_reports: list[COTReport]) -> None:
+        """
+        Adds the reports to the index, oldest first, and sets their percentile ranks.
+
+        :param cot_reports: The reports to rank.
+        :type cot_reports: list[COTReport]
+        """
+        for report in sorted(cot_reports, key=lambda report: report.reported_date):
+            if self.add(report):
+                report.percentile_ranks = self.percentile_ranks(report)
+
+    @Tracer.traced("PercentileRankIndex.build")
+    async def build(self, cot_repository: COTRepository, asset_codes: list[str], end_date: str) -> None:
+        """
+        Builds the windows of the given assets from the reports stored in the repository, assets that already have a
+        window are skipped.
+
+        :param cot_repository: The repository holding the reports.
+        :type cot_repository: COTRepository
+        :param asset_codes: The codes of the assets.
+        :type asset_codes: list[str]
+        :param end_date: The reported date of the newest report to include.
+        :type end_date: str
+        """
+        missing_codes: list[str] = [code for code in asset_codes if not self.has_asset(code)]
+        if not missing_codes:
+            return
+        start_date: str = str(date.fromisoformat(end_date) - timedelta(weeks=self._lookback_weeks))
+        try:
+            records: list[tuple] = await cot_repository.fetch_cot_reports_between(missing_codes, start_date, end_date)
+        except LookupError:
+            records = []
+        for report in sorted(COTReportPresenter.from_list(records), key=lambda report: report.reported_date):
+            self.add(report)
+        for asset_code in missing_codes:
+            self._history.setdefault(asset_code, deque())
+            self._sorted_values.setdefault(asset_code, {metric: [] for metric in self.METRICS})
+        Logger.log(
+            name=self.__class__.__name__,
+            level=Logger.INFO,
+            message=f"Built the percentile rank index of {len(missing_codes)} assets from {len(records)} stored reports."
+        )
+
+    @staticmethod
+    def _remove(sorted_values: dict[str, list[float]], values: dict[str, float]) -> None:
+        for metric, value in values.items():
+            del sorted_values[metric][bisect_left(sorted_values[metric], value)]
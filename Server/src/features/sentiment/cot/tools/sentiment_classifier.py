@@ -0,0 +1,125 @@
+import time
+import numpy as np
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from features.sentiment.cot.tools.week_calendar import WeekAlignedSeries
+from shared.enums.reading import Reading
+from shared.models.reported_assets import ReportedAssets
+
+
+class SentimentClassifier:
+    """
+    Classifies the sentiment of noncommercial traders of many reports at once.
+
+    The thresholds are resolved once per distinct asset and broadcast over the percentage nets, so reclassifying the
+    stored history of every asset under new thresholds is a couple of array comparisons, see reclassify_history. The
+    readings match NonCommercialTraders.get_sentiment: 1 for bullish, -1 for bearish and 0 for neutral.
+    """
+    def __init__(self, thresholds: SentimentThresholds | None = None):
+        """
+        :param thresholds: The thresholds to classify with, defaults to the configured ones.
+        :type thresholds: SentimentThresholds
+        """
+        self.thresholds: SentimentThresholds = thresholds or SentimentThresholds.get_configured()
+
+    def classify(self, asset_codes: list[str] | np.ndarray, percentage_nets: np.ndarray) -> np.ndarray:
+        """
+        :param asset_codes: The asset code of each percentage net.
+        :type asset_codes: list[str] | np.ndarray
+        :param percentage_nets: The noncommercial percentage nets.
+        :type percentage_nets: np.ndarray
+        :return np.ndarray: The reading value of each percentage net.
+        """
+        percentage_nets = np.asarray(percentage_nets, dtype=np.float64)
+        if percentage_nets.size == 0:
+            return np.zeros(0, dtype=np.int8)
+        unique_codes, inverse = np.unique(np.asarray(asset_codes), return_inverse=True)
+        thresholds: np.ndarray = self.thresholds.for_assets(unique_codes.tolist())[inverse]
+        return self._classify(percentage_nets, thresholds)
+
+    def classify_aligned(self, percentage_nets: WeekAlignedSeries) -> np.ndarray:
+        """
+        :param percentage_nets: The noncommercial percentage nets of each asset on a shared week axis, see
+        WeekCalendar.align.
+        :type percentage_nets: WeekAlignedSeries
+        :return np.ndarray: The reading value of each asset and week, weeks without a report are neutral.
+        """
+        thresholds: np.ndarray = self.thresholds.for_assets(percentage_nets.asset_codes)
+        return self._classify(percentage_nets.values, thresholds[:, None])
+
+    def classify_reports(self, cot_reports: list[COTReport]) -> list[Reading]:
+        """
+        :param cot_reports: The reports to classify.
+        :type cot_reports: list[COTReport]
+        :return list[Reading]: The sentiment reading of each report.
+        """
+        percentage_nets: np.ndarray = np.fromiter(
+            (report.noncommercials.do_percentage_net() for report in cot_reports),
+            dtype=np.float64,
+            count=len(cot_reports)
+        )
+        readings: np.ndarray = self.classify([report.asset_code for report in cot_reports], percentage_nets)
+        return [Reading(reading) for reading in readings.tolist()]
+
+    async def reclassify_history(
+            self,
+            cot_repository: COTRepository,
+            asset_codes: list[str],
+            start_date: str,
+            end_date: str
+        ) -> dict[str, dict[str, Reading]]:
+        """
+        Reads the stored reports of the assets again with the thresholds of this classifier, e.g. to preview edited
+        thresholds before configuring them. The stored reports are left as they are.
+
+        :param cot_repository: The repository the reports are stored in.
+        :type cot_repository: COTRepository
+        :param asset_codes: The codes of the assets to reclassify.
+        :type asset_codes: list[str]
+        :param start_date: The released date of the oldest report to reclassify.
+        :type start_date: str
+        :param end_date: The released date of the newest report to reclassify.
+        :type end_date: str
+        :return dict[str, dict[str, Reading]]: The sentiment reading of each asset by reported date.
+        :raises LookupError: If no report was found.
+        """
+        rows: list[tuple] = await cot_repository.fetch_cot_reports_between(asset_codes, start_date, end_date)
+        cot_reports: list[COTReport] = COTReportPresenter.from_list(rows)
+        readings: dict[str, dict[str, Reading]] = {}
+        for report, reading in zip(cot_reports, self.classify_reports(cot_reports)):
+            readings.setdefault(report.asset_code, {})[report.reported_date] = reading
+        return readings
+
+    @staticmethod
+    def _classify(percentage_nets: np.ndarray, thresholds: np.ndarray) -> np.ndarray:
+        # NaN compares False both ways, so weeks without a report end up neutral.
+        bullish: np.ndarray = (percentage_nets >= thresholds).view(np.int8)
+        bearish: np.ndarray = (percentage_nets <= -thresholds).view(np.int8)
+        return bullish - bearish
+
+
+def main():
+    rng: np.random.Generator = np.random.default_rng(0)
+    asset_codes: list[str] = [asset.code for asset in ReportedAssets.all]
+    n_weeks: int = 52 * 40
+    percentage_nets: WeekAlignedSeries = WeekAlignedSeries(
+        asset_codes=asset_codes,
+        first_week=0,
+        values=np.round(rng.normal(0, 20, size=(len(asset_codes), n_weeks)), 1)
+    )
+    for threshold in (2.5, 5, 10, 20):
+        classifier: SentimentClassifier = SentimentClassifier(SentimentThresholds(default=threshold, by_asset_class={}))
+        start: float = time.perf_counter()
+        readings: np.ndarray = classifier.classify_aligned(percentage_nets)
+        elapsed: float = time.perf_counter() - start
+        print(
+            f"threshold {threshold}: {np.count_nonzero(readings == Reading.bullish.value)} bullish, "
+            f"{np.count_nonzero(readings == Reading.bearish.value)} bearish out of {readings.size} weeks "
+            f"in {elapsed * 1000:.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import json
+import os
+from typing import Any, Final
+import numpy as np
+from features.sentiment.cot.core.models.constants import Thresholds
+from shared.models.reported_assets import ReportedAssets
+from shared.utils.logger import Logger
+from shared.utils.settings import Settings
+from shared.utils.util import Util
+
+
+class SentimentThresholds:
+    """
+    The noncommercial percentage net from which the sentiment of each asset is bullish or bearish.
+
+    A threshold is resolved from the asset code, then from the asset's class, then from the default. The configured
+    thresholds are read from the thresholds file once and passed into the reports as they are built, see
+    COTReport.sentiment_threshold.
+    """
+    _DEFAULT_THRESHOLDS_FILE: Final[str] = f"{Util.get_root_dir()}/data/cot/sentiment_thresholds.json"
+    _configured: "SentimentThresholds | None" = None
+
+    def __init__(
+            self,
+            default: float = Thresholds.sentiment,
+            by_asset_class: dict[str, float] | None = None,
+            by_asset: dict[str, float] | None = None
+        ):
+        """
+        :param default: The threshold of assets without an override.
+        :type default: float
+        :param by_asset_class: The thresholds by asset class name, defaults to Thresholds.sentiment_by_asset_class.
+        :type by_asset_class: dict[str, float]
+        :param by_asset: The thresholds by asset code, defaults to Thresholds.sentiment_by_asset.
+        :type by_asset: dict[str, float]
+        """
+        self.default: float = default
+        self.by_asset_class: dict[str, float] = dict(
+            Thresholds.sentiment_by_asset_class if by_asset_class is None else by_asset_class
+        )
+        self.by_asset: dict[str, float] = dict(Thresholds.sentiment_by_asset if by_asset is None else by_asset)
+
+    @classmethod
+    def from_file(cls, thresholds_file: str | None = None) -> "SentimentThresholds":
+        """
+        Reads the thresholds from a JSON file with the keys "default", "by_asset_class" and "by_asset", keys left out
+        keep the values of Thresholds. The file defaults to the COT_SENTIMENT_THRESHOLDS_FILE environment variable or
+        data/cot/sentiment_thresholds.json, without a file the values of Thresholds are used.
+
+        :param thresholds_file: The path of the thresholds file.
+        :type thresholds_file: str
+        :return SentimentThresholds: The thresholds.
+        """
+        thresholds_file = (
+            thresholds_file
+            or Settings.get_instance().cot_sentiment_thresholds_file
+            or cls._DEFAULT_THRESHOLDS_FILE
+        )
+        data: dict[str, Any] = {}
+        if os.path.exists(thresholds_file):
+            try:
+                with open(thresholds_file) as file:
+                    data = dict(json.load(file))
+            except (OSError, ValueError, TypeError) as error:
+                Logger.log(
+                    name=cls.__name__,
+                    level=Logger.ERROR,
+                    message=f"Sentiment thresholds file {thresholds_file} could not be read, using the defaults. "
+                            f"Error: {error}"
+                )
+        return cls(
+            default=data.get("default", Thresholds.sentiment),
+            by_asset_class=data.get("by_asset_class"),
+            by_asset=data.get("by_asset")
+        )
+
+    @classmethod
+    def get_configured(cls) -> "SentimentThresholds":
+        """
+        :return SentimentThresholds: The thresholds every report is built with, read from the thresholds file once.
+        """
+        if cls._configured is None:
+            cls._configured = cls.from_file()
+        return cls._configured
+
+    @classmethod
+    def configure(cls, thresholds: "SentimentThresholds | None" = None) -> None:
+        """
+        Replaces the configured thresholds, reports built afterwards are read with them.
+
+        :param thresholds: The new thresholds, read from the thresholds file again if not given.
+        :type thresholds: SentimentThresholds
+        """
+        cls._configured = thresholds or cls.from_file()
+
+    def for_asset(self, asset_code: str) -> float:
+        """
+        :param asset_code: The code of the asset.
+        :type asset_code: str
+        :return float: The noncommercial percentage net from which the sentiment of the asset is bullish or bearish.
+        """
+        if asset_code in self.by_asset:
+            return self.by_asset[asset_code]
+        asset = ReportedAssets.by_code.get(asset_code)
+        if asset is not None:
+            for asset_class in type(asset).__mro__:
+                if asset_class.__name__ in self.by_asset_class:
+                    return self.by_asset_class[asset_class.__name__]
+        return self.default
+
+    def for_assets(self, asset_codes: list[str]) -> np.ndarray:
+        """
+        :param asset_codes: The codes of the assets.
+        :type asset_codes: list[str]
+        :return np.ndarray: The threshold of each asset.
+        """
+        return np.fromiter(map(self.for_asset, asset_codes), dtype=np.float64, count=len(asset_codes))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"default": self.default, "by_asset_class": self.by_asset_class, "by_asset": self.by_asset}
@@ -0,0 +1,145 @@
+from datetime import date, timedelta
+from typing import Callable, Final, Iterable
+import warnings
+import numpy as np
+from features.sentiment.cot.core.models.cot_report import COTReport
+
+
+class WeekAlignedSeries:
+    """
+    A value of every asset on a shared axis of consecutive weeks, as a matrix of one row per asset and one column per
+    week. Weeks an asset wasn't reported are NaN.
+    """
+    def __init__(self, asset_codes: list[str], first_week: int, values: np.ndarray):
+        """
+        :param asset_codes: The asset code of each row.
+        :type asset_codes: list[str]
+        :param first_week: The week ordinal of the first column.
+        :type first_week: int
+        :param values: The matrix of values, assets by weeks.
+        :type values: np.ndarray
+        """
+        self.asset_codes = asset_codes
+        self.first_week = first_week
+        self.values = values
+        self._rows: dict[str, int] = {asset_code: row for row, asset_code in enumerate(asset_codes)}
+
+    @property
+    def weeks(self) -> np.ndarray:
+        """
+        :return np.ndarray: The week ordinal of each column.
+        """
+        return np.arange(self.first_week, self.first_week + self.values.shape[1])
+
+    def row_of(self, asset_code: str) -> np.ndarray:
+        return self.values[self._rows[asset_code]]
+
+    def column_of(self, week: int) -> int:
+        return week - self.first_week
+
+    def rolling_extrema(self, n_weeks: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The minimum and maximum of each asset over the n calendar weeks ending at each week. Missing weeks are skipped
+        instead of pulling older weeks into the window. Windows that start before an asset's first reported week are
+        NaN.
+
+        :param n_weeks: The number of calendar weeks in the window.
+        :type n_weeks: int
+        :return tuple[np.ndarray, np.ndarray]: The rolling minimums and maximums, shaped like the values.
+        """
+        n_assets, n_columns = self.values.shape
+        minimums: np.ndarray = np.full((n_assets, n_columns), np.nan)
+        maximums: np.ndarray = np.full((n_assets, n_columns), np.nan)
+        if n_columns < n_weeks:
+            return minimums, maximums
+        windows: np.ndarray = np.lib.stride_tricks.sliding_window_view(self.values, n_weeks, axis=1)
+        with warnings.catch_warnings():
+            # Windows without any reported week are left NaN.
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            minimums[:, n_weeks - 1:] = np.nanmin(windows, axis=2)
+            maximums[:, n_weeks - 1:] = np.nanmax(windows, axis=2)
+        first_columns: np.ndarray = np.argmax(~np.isnan(self.values), axis=1)
+        columns: np.ndarray = np.arange(n_columns)
+        too_recent: np.ndarray = columns[None, :] - (n_weeks - 1) < first_columns[:, None]
+        minimums[too_recent] = np.nan
+        maximums[too_recent] = np.nan
+        return minimums, maximums
+
+
+class WeekCalendar:
+    """
+    Maps COT report dates to integer week ordinals.
+
+    COT reports are as of Tuesday, a report shifted by a holiday still maps to its week since dates are rounded to the
+    nearest Tuesday. Week ordinals turn cross-asset joins and windows into array indexing: consecutive weeks have
+    consecutive ordinals, so gaps are differences greater than one.
+    """
+    _EPOCH: Final[date] = date(1970, 1, 6)
+    _EPOCH_DAYS: Final[int] = (date(1970, 1, 6) - date(1970, 1, 1)).days
+
+    @classmethod
+    def to_week(cls, reported_date: str | date) -> int:
+        """
+        :param reported_date: The reported date, as YYYY-MM-DD or a date.
+        :type reported_date: str | date
+        :return int: The ordinal of the week of the date.
+        """
+        if isinstance(reported_date, str):
+            reported_date = date.fromisoformat(reported_date)
+        return ((reported_date - cls._EPOCH).days + 3) // 7
+
+    @classmethod
+    def to_weeks(cls, reported_dates: Iterable[str | date]) -> np.ndarray:
+        """
+        :param reported_dates: The reported dates, as YYYY-MM-DD or dates.
+        :type reported_dates: Iterable[str | date]
+        :return np.ndarray: The week ordinal of each date.
+        """
+        days: np.ndarray = np.array(list(map(str, reported_dates)), dtype="datetime64[D]").astype(np.int64)
+        return (days - cls._EPOCH_DAYS + 3) // 7
+
+    @classmethod
+    def to_date(cls, week: int) -> str:
+        """
+        :param week: A week ordinal.
+        :type week: int
+        :return str: The Tuesday of the week, as YYYY-MM-DD.
+        """
+        return str(cls._EPOCH + timedelta(weeks=int(week)))
+
+    @staticmethod
+    def find_gaps(weeks: np.ndarray) -> list[tuple[int, int]]:
+        """
+        :param weeks: Week ordinals in ascending order.
+        :type weeks: np.ndarray
+        :return list[tuple[int, int]]: The first missing week and the number of missing weeks of each gap.
+        """
+        differences: np.ndarray = np.diff(weeks)
+        gaps: np.ndarray = np.flatnonzero(differences > 1)
+        return [(int(weeks[gap] + 1), int(differences[gap] - 1)) for gap in gaps]
+
+    @classmethod
+    def align(
+            cls,
+            cot_reports: list[COTReport],
+            value: Callable[[COTReport], float] = lambda report: report.commercials.do_net()
+        ) -> WeekAlignedSeries:
+        """
+        Places a value of every report on a shared week axis spanning the oldest to the newest report.
+
+        :param cot_reports: The reports of one or more assets.
+        :type cot_reports: list[COTReport]
+        :param value: The value of a report to align, the commercial net position by default.
+        :type value: Callable[[COTReport], float]
+        :return WeekAlignedSeries: The aligned values.
+        """
+        asset_codes: list[str] = list(dict.fromkeys(report.asset_code for report in cot_reports))
+        if not cot_reports:
+            return WeekAlignedSeries(asset_codes, 0, np.empty((0, 0)))
+        rows_by_code: dict[str, int] = {asset_code: row for row, asset_code in enumerate(asset_codes)}
+        weeks: np.ndarray = cls.to_weeks(report.reported_date for report in cot_reports)
+        first_week: int = int(weeks.min())
+        values: np.ndarray = np.full((len(asset_codes), int(weeks.max()) - first_week + 1), np.nan)
+        rows: np.ndarray = np.fromiter((rows_by_code[report.asset_code] for report in cot_reports), dtype=np.int64)
+        values[rows, weeks - first_week] = np.fromiter(map(value, cot_reports), dtype=np.float64)
+        return WeekAlignedSeries(asset_codes, first_week, values)
@@ -0,0 +1,82 @@
+from typing import Any
+
+
+class AssetIndex:
+    """
+    In-memory index of the rows of the assets table.
+
+    Each row is a (code, name, cftc_code) tuple and is indexed by its code, name and CFTC code so asset lookups don't
+    need a round trip to the database.
+    """
+    def __init__(self):
+        self._by_code: dict[str, tuple[Any, ...]] = {}
+        self._by_name: dict[str, tuple[Any, ...]] = {}
+        self._by_cftc_code: dict[str, tuple[Any, ...]] = {}
+        self._is_loaded: bool = False
+
+    @property
+    def is_loaded(self) -> bool:
+        """
+        :return bool: Whether the index has been loaded from the assets table.
+        """
+        return self._is_loaded
+
+    def load(self, rows: list[tuple[Any, ...]]) -> None:
+        """
+        Replaces the content of the index with the given rows.
+
+        :param rows: The (code, name, cftc_code) rows of the assets table.
+        :type rows: list[tuple[Any, ...]]
+        """
+        self._by_code.clear()
+        self._by_name.clear()
+        self._by_cftc_code.clear()
+        self.add(rows)
+        self._is_loaded = True
+
+    def add(self, rows: list[tuple[Any, ...]]) -> None:
+        """
+        Adds the given rows to the index, replacing the rows with the same code.
+
+        :param rows: The (code, name, cftc_code) rows of the assets table.
+        :type rows: list[tuple[Any, ...]]
+        """
+        for row in rows:
+            code, name, cftc_code = row[0], row[1], row[2]
+            previous: tuple[Any, ...] | None = self._by_code.get(code)
+            if previous is not None:
+                self._by_name.pop(previous[1], None)
+                self._by_cftc_code.pop(str(previous[2]), None)
+            self._by_code[code] = row
+            self._by_name[name] = row
+            self._by_cftc_code[str(cftc_code)] = row
+
+    def get_by(
+            self,
+            codes: list[str] | None = None,
+            names: list[str] | None = None,
+            cftc_codes: list[Any] | None = None
+        ) -> list[tuple[Any, ...]]:
+        """
+        Looks up the rows matching any of the given codes, names or CFTC codes.
+
+        :param codes: The asset codes.
+        :type codes: list[str]
+        :param names: The asset names.
+        :type names: list[str]
+        :param cftc_codes: The CFTC codes of the assets.
+        :type cftc_codes: list[Any]
+        :return list[tuple[Any, ...]]: The matching rows, without duplicates, in the order they were requested.
+        """
+        matches: dict[str, tuple[Any, ...]] = {}
+        lookups: list[tuple[dict[str, tuple[Any, ...]], list[Any]]] = [
+            (self._by_code, codes or []),
+            (self._by_name, names or []),
+            (self._by_cftc_code, cftc_codes or [])
+        ]
+        for index, keys in lookups:
+            for key in keys:
+                row: tuple[Any, ...] | None = index.get(str(key))
+                if row is not None:
+                    matches.setdefault(row[0], row)
+        return list(matches.values())
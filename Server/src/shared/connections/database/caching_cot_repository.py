@@ -0,0 +1,216 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from typing import Any, Final
+
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+
+
+class CachingCOTRepository(COTRepository):
+    """
+    Read-through cache that can wrap any COT repository.
+
+    Fetched reports are kept per (asset_code, report_date) in a bounded least-recently-used cache. A request for
+    several reports only reaches the wrapped repository for the reports that are not cached yet, and a range of
+    reports is served from the cache once the same range, or a wider one, was fetched for its asset.
+
+    Reports change when a new release is stored or the CFTC restates a report, so writes must go through this
+    repository: they go to the wrapped repository and invalidate the written reports and the cached ranges of their
+    assets. A read that was in flight while reports were invalidated returns its results without caching them.
+    """
+    _DEFAULT_MAX_SIZE: Final[int] = 10_000
+
+    def __init__(self, cot_repository: COTRepository, max_size: int = _DEFAULT_MAX_SIZE):
+        """
+        :param cot_repository: The repository to cache.
+        :type cot_repository: COTRepository
+        :param max_size: The maximum number of reports held in the cache.
+        :type max_size: int
+        """
+        if max_size <= 0:
+            raise ValueError("The cache size must be greater than 0.")
+        self._cot_repository = cot_repository
+        self._max_size = max_size
+        self._cache: OrderedDict[tuple[str, str], tuple] = OrderedDict()
+        self._dates: dict[str, list[str]] = {}
+        self._ranges: dict[str, list[tuple[str, str]]] = {}
+        self._generation: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+
+    @property
+    def cot_repository(self) -> COTRepository:
+        """
+        :return COTRepository: The wrapped repository.
+        """
+        return self._cot_repository
+
+    @property
+    def generation(self) -> int:
+        """
+        :return int: The version of the stored reports, it changes with every write, e.g. to key responses built from
+        them.
+        """
+        return self._generation
+
+    async def build_cot_report_table(self, cot_reports: list[COTReport]) -> None:
+        await self._cot_repository.build_cot_report_table(cot_reports)
+        self.invalidate(cot_reports)
+
+    async def insert_cot_reports(self, cot_reports: list[COTReport]) -> None:
+        await self._cot_repository.insert_cot_reports(cot_reports)
+        self.invalidate(cot_reports)
+
+    async def fetch_cot_reports_by(
+            self,
+            asset_codes: list[str] | None = None,
+            released_dates: list[str] | None = None
+        ) -> list[tuple]:
+        """
+        Requests that name both the asset codes and the released dates are served from the cache, only the missing
+        reports are fetched from the wrapped repository. Other requests are passed through and their results cached.
+        """
+        generation: int = self._generation
+        if not asset_codes or not released_dates:
+            results: list[tuple] = await self._cot_repository.fetch_cot_reports_by(asset_codes, released_dates)
+            self._put(results, generation)
+            return results
+
+        keys: list[tuple[str, str]] = [(code, str(date)) for date in released_dates for code in asset_codes]
+        found: dict[tuple[str, str], tuple] = {}
+        for key in keys:
+            if key in self._cache:
+                found[key] = self._cache[key]
+                self._cache.move_to_end(key)
+        missing: list[tuple[str, str]] = [key for key in keys if key not in found]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            missing_codes: list[str] = list(dict.fromkeys(code for code, _ in missing))
+            missing_dates: list[str] = list(dict.fromkeys(date for _, date in missing))
+            try:
+                records: list[tuple] = await self._cot_repository.fetch_cot_reports_by(missing_codes, missing_dates)
+            except LookupError:
+                records = []
+            self._put(records, generation)
+            found.update((self._key_of(record), record) for record in records)
+
+        results = [found[key] for key in keys if key in found]
+        if len(results) == 0:
+            raise LookupError("No report was found.")
+        return results
+
+    async def fetch_cot_reports_between(
+            self,
+            asset_codes: list[str],
+            start_date: str,
+            end_date: str
+        ) -> list[tuple]:
+        """
+        Assets whose range is covered by a range fetched before are served from the cache, the range of the other
+        assets is fetched from the wrapped repository and cached.
+        """
+        generation: int = self._generation
+        missing_codes: list[str] = [code for code in asset_codes if not self._covers(code, start_date, end_date)]
+        results: list[tuple] = [
+            record for code in asset_codes if code not in missing_codes
+            for record in self._get_between(code, start_date, end_date)
+        ]
+        self.hits += len(results)
+        if missing_codes:
+            try:
+                records: list[tuple] = await self._cot_repository.fetch_cot_reports_between(
+                    missing_codes, start_date, end_date
+                )
+            except LookupError:
+                records = []
+            self.misses += len(records)
+            if generation == self._generation:
+                for code in missing_codes:
+                    self._add_range(code, start_date, end_date)
+            self._put(records, generation)
+            results.extend(records)
+        if len(results) == 0:
+            raise LookupError("No report was found.")
+        return sorted(results, key=lambda record: str(record[2]))
+
+    def invalidate(self, cot_reports: list[COTReport] | None = None) -> None:
+        """
+        Removes the given reports and the cached ranges of their assets from the cache, or clears the whole cache if no
+        report is given.
+
+        :param cot_reports: The reports to remove.
+        :type cot_reports: list[COTReport]
+        """
+        self._generation += 1
+        if cot_reports is None:
+            self._cache.clear()
+            self._dates.clear()
+            self._ranges.clear()
+            return
+        for report in cot_reports:
+            self._remove((report.asset_code, report.reported_date))
+            self._ranges.pop(report.asset_code, None)
+
+    async def disconnect(self) -> None:
+        """
+        Clears the cache and closes the wrapped repository's connection, if it has one.
+        """
+        self.invalidate()
+        disconnect: Any = getattr(self._cot_repository, "disconnect", None)
+        if disconnect is not None:
+            await disconnect()
+
+    def _put(self, records: list[tuple], generation: int) -> None:
+        """
+        Caches the records, unless reports were invalidated since they were fetched: they may be outdated.
+        """
+        if generation != self._generation:
+            return
+        for record in records:
+            key: tuple[str, str] = self._key_of(record)
+            if key not in self._cache:
+                insort(self._dates.setdefault(key[0], []), key[1])
+            self._cache[key] = record
+            self._cache.move_to_end(key)
+        while len(self._cache) > self._max_size:
+            key, _ = self._cache.popitem(last=False)
+            self._remove(key)
+            # The range no longer holds every report of the asset.
+            self._ranges.pop(key[0], None)
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        self._cache.pop(key, None)
+        dates: list[str] = self._dates.get(key[0], [])
+        position: int = bisect_left(dates, key[1])
+        if position < len(dates) and dates[position] == key[1]:
+            del dates[position]
+
+    def _get_between(self, asset_code: str, start_date: str, end_date: str) -> list[tuple]:
+        dates: list[str] = self._dates.get(asset_code, [])
+        records: list[tuple] = []
+        for date in dates[bisect_left(dates, start_date): bisect_right(dates, end_date)]:
+            self._cache.move_to_end((asset_code, date))
+            records.append(self._cache[(asset_code, date)])
+        return records
+
+    def _covers(self, asset_code: str, start_date: str, end_date: str) -> bool:
+        return any(start <= start_date and end_date <= end for start, end in self._ranges.get(asset_code, []))
+
+    def _add_range(self, asset_code: str, start_date: str, end_date: str) -> None:
+        merged: list[tuple[str, str]] = []
+        for start, end in sorted([*self._ranges.get(asset_code, []), (start_date, end_date)]):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        self._ranges[asset_code] = merged
+
+    @staticmethod
+    def _key_of(record: tuple) -> tuple[str, str]:
+        """
+        :param record: A COT report record: (report_id, asset_code, report_date, report_data).
+        :type record: tuple
+        :return tuple[str, str]: The (asset_code, report_date) key of the record.
+        """
+        return record[1], str(record[2])
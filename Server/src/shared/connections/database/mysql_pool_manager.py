@@ -0,0 +1,260 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Final
+
+from shared.utils.logger import Logger
+from shared.utils.settings import Settings
+
+if TYPE_CHECKING:
+    import aiomysql
+
+
+class PoolMetrics:
+    """
+    Holds the metrics of a connection pool: how long acquisitions waited, how many connections are in use and how many
+    connections were held for too long (leaked).
+    """
+    def __init__(self):
+        self.acquisitions: int = 0
+        self.total_wait_time: float = 0.0
+        self.max_wait_time: float = 0.0
+        self.in_use: int = 0
+        self.peak_in_use: int = 0
+        self.leaks: int = 0
+
+    def record_acquisition(self, wait_time: float) -> None:
+        """
+        Records a successful acquisition of a connection from the pool.
+
+        :param wait_time: The time in seconds spent waiting for the connection.
+        :type wait_time: float
+        """
+        self.acquisitions += 1
+        self.total_wait_time += wait_time
+        self.max_wait_time = max(self.max_wait_time, wait_time)
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def record_release(self) -> None:
+        """
+        Records the release of a connection back to the pool.
+        """
+        self.in_use -= 1
+
+    @property
+    def average_wait_time(self) -> float:
+        """
+        :return float: The average time in seconds spent waiting for a connection.
+        """
+        return self.total_wait_time / self.acquisitions if self.acquisitions else 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        """
+        Represents the pool metrics in a JSON serialisable format.
+
+        :return dict[str, float]:
+        """
+        return {
+            "acquisitions": self.acquisitions,
+            "average_wait_time": round(self.average_wait_time, 6),
+            "max_wait_time": round(self.max_wait_time, 6),
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "leaks": self.leaks
+        }
+
+
+class MySQLPoolManager:
+    """
+    Manages the process-wide connection pool to the MySQL database.
+
+    Every MySQL repository in the process acquires its connections through the same pool manager so the number of
+    open connections stays bounded by the configured pool size, no matter how many repositories are created.
+
+    Users of the pool hold a reference to it with retain and give it back with release, the pool is closed once the
+    last reference is released so one user closing does not close the pool under the others.
+    """
+    _DEFAULT_MIN_SIZE: Final[int] = 1
+    _DEFAULT_MAX_SIZE: Final[int] = 20
+    _DEFAULT_LEAK_THRESHOLD: Final[float] = 60.0
+    _instance: "MySQLPoolManager | None" = None
+
+    def __init__(self, min_size: int | None = None, max_size: int | None = None, leak_threshold: float | None = None):
+        """
+        Unless given, the pool sizes are read from the MYSQL_POOL_MIN_SIZE and MYSQL_POOL_MAX_SIZE environment
+        variables.
+
+        :param min_size: The number of connections opened when the pool is warmed up and kept open afterwards.
+        :type min_size: int
+        :param max_size: The maximum number of connections the pool can open.
+        :type max_size: int
+        :param leak_threshold: The number of seconds a connection can be held before it is reported as leaked.
+        :type leak_threshold: float
+        """
+        settings: Settings = Settings.get_instance()
+        if min_size is None:
+            min_size = self._DEFAULT_MIN_SIZE if settings.mysql_pool_min_size is None else settings.mysql_pool_min_size
+        if max_size is None:
+            max_size = self._DEFAULT_MAX_SIZE if settings.mysql_pool_max_size is None else settings.mysql_pool_max_size
+        self._min_size: int = min_size
+        self._max_size: int = max_size
+        if not 0 <= self._min_size <= self._max_size:
+            raise ValueError(f"Invalid pool size: min size {self._min_size}, max size {self._max_size}.")
+        self._leak_threshold: float = leak_threshold if leak_threshold is not None else self._DEFAULT_LEAK_THRESHOLD
+        self._pool: aiomysql.Pool | None = None
+        self._pool_lock: asyncio.Lock | None = None
+        self._checked_out: dict[int, tuple[float, str]] = {}
+        self._metrics: PoolMetrics = PoolMetrics()
+        self._n_references: int = 0
+
+    @classmethod
+    def get_instance(cls) -> "MySQLPoolManager":
+        """
+        :return MySQLPoolManager: The pool manager shared by the whole process.
+        """
+        if cls._instance is None:
+            cls._instance = MySQLPoolManager()
+        return cls._instance
+
+    @property
+    def metrics(self) -> PoolMetrics:
+        """
+        :return PoolMetrics: The metrics of the connection pool.
+        """
+        return self._metrics
+
+    @property
+    def n_references(self) -> int:
+        """
+        :return int: The number of users currently holding a reference to the pool.
+        """
+        return self._n_references
+
+    @property
+    def min_size(self) -> int:
+        return self._min_size
+
+    @property
+    def max_size(self) -> int:
+        return self._max_size
+
+    async def warm_up(self) -> None:
+        """
+        Creates the connection pool and opens the minimum number of connections so the first queries don't pay for
+        the connection handshakes.
+        """
+        await self._get_pool()
+
+    async def _get_pool(self) -> "aiomysql.Pool":
+        """
+        :return aiomysql.Pool: The connection pool, it is created on first use.
+        """
+        if self._pool is not None:
+            return self._pool
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+        async with self._pool_lock:
+            if self._pool is None:
+                try:
+                    import aiomysql
+                    host, port, user, password, database = Settings.get_instance().require(
+                        "mysql_host", "mysql_port", "mysql_user", "mysql_password", "mysql_database"
+                    )
+                    self._pool = await aiomysql.create_pool(
+                        host=host,
+                        port=port,
+                        user=user,
+                        password=password,
+                        db=database,
+                        minsize=self._min_size,
+                        maxsize=self._max_size
+                    )
+                except Exception as e:
+                    Logger.log(
+                        name=self.__class__.__name__,
+                        level=Logger.CRITICAL,
+                        message=f"Failed to initialize database connection pool: {e}"
+                    )
+                    raise
+        return self._pool
+
+    @asynccontextmanager
+    async def acquire(self, holder: str = "") -> AsyncIterator["aiomysql.Connection"]:
+        """
+        Acquires a connection from the pool and releases it back once the context is exited.
+
+        Usage:
+        async with pool_manager.acquire() as connection:
+            ...
+
+        :param holder: A name for whoever is holding the connection, it is used when reporting leaks.
+        :type holder: str
+        """
+        pool: aiomysql.Pool = await self._get_pool()
+        started: float = time.perf_counter()
+        connection: aiomysql.Connection = await pool.acquire()
+        acquired: float = time.perf_counter()
+        self._metrics.record_acquisition(acquired - started)
+        self._checked_out[id(connection)] = (acquired, holder)
+        try:
+            yield connection
+        finally:
+            self._checked_out.pop(id(connection), None)
+            self._metrics.record_release()
+            held_for: float = time.perf_counter() - acquired
+            if held_for > self._leak_threshold:
+                self._report_leak(holder, held_for)
+            pool.release(connection)
+
+    def find_leaks(self) -> list[tuple[str, float]]:
+        """
+        :return list[tuple[str, float]]: The holders and holding time in seconds of the connections that are
+        currently held for longer than the leak threshold.
+        """
+        now: float = time.perf_counter()
+        return [
+            (holder, now - acquired)
+            for acquired, holder in self._checked_out.values()
+            if now - acquired > self._leak_threshold
+        ]
+
+    def _report_leak(self, holder: str, held_for: float) -> None:
+        self._metrics.leaks += 1
+        Logger.log(
+            name=self.__class__.__name__,
+            level=Logger.WARNING,
+            message=f"Connection held by {holder or 'unknown'} for {held_for:.1f}s, over the leak threshold of "
+                    f"{self._leak_threshold}s."
+        )
+
+    def retain(self) -> None:
+        """
+        Registers a user of the pool, the pool stays open until every user has called release.
+        """
+        self._n_references += 1
+
+    async def release(self) -> None:
+        """
+        Gives back a reference taken with retain, the pool is closed when it was the last one.
+        """
+        if self._n_references == 0:
+            return
+        self._n_references -= 1
+        if self._n_references == 0:
+            await self.close()
+
+    async def close(self) -> None:
+        """
+        Closes the connection pool whatever the references held to it, for the entry point of the process. Connections that are still checked out are reported as leaked.
+        """
+        if self._pool is None:
+            return
+        now: float = time.perf_counter()
+        for acquired, holder in self._checked_out.values():
+            self._report_leak(holder, now - acquired)
+        self._pool.close()
+        await self._pool.wait_closed()
+        self._pool = None
+        self._pool_lock = None
+        self._checked_out.clear()
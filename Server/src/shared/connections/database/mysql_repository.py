@@ -1,18 +1,23 @@
 import asyncio  
+from contextlib import asynccontextmanager
 import json  
-from typing import Any, Coroutine, Final  
-import aiomysql  
+from typing import TYPE_CHECKING, Any, AsyncIterator, Coroutine, Final  
 from features.sentiment.cot.core.interfaces.cot_repository import COTRepository  
 from features.sentiment.cot.core.models.cot_report import COTReport  
-from features.sentiment.cot.tools.cot_report_builder import COTReportBuilder  
-import pymysql
+from shared.connections.database.asset_index import AssetIndex
+from shared.connections.database.mysql_pool_manager import MySQLPoolManager
 from shared.interfaces.assets_repository import AssetRepository  
 from shared.models.asset import Asset  
 from shared.models.currency import ReportedCurrencies
 from shared.models.reported_assets import ReportedAssets  
 from shared.utils.logger import Logger  
+from shared.utils.metrics import Counter, Histogram, MetricsRegistry
+from shared.utils.tracer import Tracer
 from shared.utils.util import Util  
 
+if TYPE_CHECKING:
+    import aiomysql
+
 
 class MySQLRepository(AssetRepository, COTRepository):  
     """  
@@ -36,74 +41,65 @@ class MySQLRepository(AssetRepository, COTRepository):
             UNIQUE (asset_code, report_date)  
         )  
     """    
+    _QUERY_SECONDS: Final[Histogram] = MetricsRegistry.get_instance().histogram(
+        "mysql_query_seconds", "Time taken by each repository operation, waiting for a pooled connection included."
+    )
+    _QUERY_ERRORS: Final[Counter] = MetricsRegistry.get_instance().counter(
+        "mysql_query_errors_total", "Number of repository operations that raised an error."
+    )
 
-    def __init__(self):  
+    def __init__(self, pool_manager: MySQLPoolManager | None = None):  
         """  
-        Initializes the MySQLRepository with a database connection.
+        Initializes the MySQLRepository with the connection pool it acquires its connections from.
+
+        :param pool_manager: The connection pool manager, the process-wide pool manager is used if none is given.
+        :type pool_manager: MySQLPoolManager
 
-        Make sure to close the database connection when done with all operations by calling disconnect(). 
+        Make sure to release the database connection pool when done with all operations by calling disconnect(). 
         """  
         super().__init__()  
-        self._pool: aiomysql.Pool | None = None  
+        self._pool_manager: MySQLPoolManager = pool_manager or MySQLPoolManager.get_instance()
+        self._asset_index: AssetIndex = AssetIndex()
+        self._holds_pool: bool = False
 
-    async def _initialize_pool(self):  
-        """  
-        Initializes the connection pool to the MySQL database.  
-        """  
-        if self._pool is None:  
-            try:  
-                config: list[Any] = Util.get_env_variables(  
-                    ["MYSQL_HOST", "MYSQL_PORT", "MYSQL_USER", "MYSQL_PASSWORD", "MYSQL_DATABASE"]  
-                )  
-                self._pool = await aiomysql.create_pool(  
-                    host=config[0],  
-                    port=int(config[1]),  
-                    user=config[2],  
-                    password=config[3],  
-                    db=config[4],  
-                    maxsize=100  
-                )  
-            except Exception as e:  
-                Logger.log(  
-                    name=self.__class__.__name__,  
-                    level=Logger.CRITICAL,  
-                    message=f"Failed to initialize database connection pool: {e}"  
-                )  
-                raise 
-    async def _connect(self) -> aiomysql.Connection:  
-        """  
-        Establishes a connection to the MySQL database.  
-        """  
-        if self._pool is None:  
-            await self._initialize_pool()  
-        if self._pool is None:  
-            raise RuntimeError("Connection pool is not initialized.")  
-        return await self._pool.acquire()  
-    
-    async def _release(self, connection: aiomysql.Connection):  
+    @asynccontextmanager
+    async def _connect(self, holder: str = "") -> AsyncIterator["aiomysql.Connection"]:  
         """  
-        Releases the database connection back to the pool.  
+        Acquires a connection from the pool, the connection is released back to the pool when the context is exited.
+        The time the operation held the context is recorded, and traced, under its name.
+
+        :param holder: The name of the operation holding the connection.
+        :type holder: str
         """  
-        if self._pool:  
-            self._pool.release(connection)  
+        if not self._holds_pool:
+            self._pool_manager.retain()
+            self._holds_pool = True
+        async with Tracer.span(f"{self.__class__.__name__}.{holder}"), self._QUERY_SECONDS.time(query=holder):
+            try:
+                async with self._pool_manager.acquire(holder=f"{self.__class__.__name__}.{holder}") as connection:
+                    yield connection
+            except LookupError:
+                raise
+            except Exception:
+                self._QUERY_ERRORS.inc(query=holder)
+                raise
 
     async def disconnect(self):  
         """  
-        Closes the database connection pool.  
+        Releases the reference of this repository to the shared connection pool, the pool itself is closed once no
+        repository holds it anymore.
         """  
-        if self._pool:  
-            self._pool.close()  
-            await self._pool.wait_closed()  
+        if self._holds_pool:
+            self._holds_pool = False
+            await self._pool_manager.release()
 
     async def build_assets_table(self, assets: list[Asset]) -> None:  
-        connection: aiomysql.Connection = await self._connect()  
         try:  
-            async with connection.cursor() as cursor:  
-                await cursor.execute(self._CREATE_ASSET_TABLE_QUERY)  
-                await connection.commit()  
-                
-            tasks: list[Coroutine] = [self._put_asset(asset) for asset in assets]  
-            await asyncio.gather(*tasks)  
+            async with self._connect("build_assets_table") as connection:
+                async with connection.cursor() as cursor:  
+                    await cursor.execute(self._CREATE_ASSET_TABLE_QUERY)  
+                    await connection.commit()  
+            await self.insert_assets(assets)
         except Exception as error:  
             Logger.log(  
                 name=self.__class__.__name__,  
@@ -111,47 +107,13 @@ class MySQLRepository(AssetRepository, COTRepository):
                 message=f"Error while building assets table: Error Type: {type(error)}"  
             )  
             raise  
-        finally:  
-            await self._release(connection)  
-    
-    async def _put_asset(self, asset: Asset) -> None:  
-        """  
-        Puts a single asset into the database.  
-        """  
-        connection: aiomysql.Connection = await self._connect()  
-        try:  
-            async with connection.cursor() as cursor:  
-                await cursor.execute(  
-                    f"""  
-                        INSERT INTO {self._ASSETS_TABLE_NAME} (code, name, cftc_code)  
-                        VALUES (%s, %s, %s)  
-                    """,  
-                    (asset.code, asset.name, asset.cftc_code)  
-                )  
-                await connection.commit()  
-        except aiomysql.IntegrityError:  
-            message: str = f"Asset with code {asset.code} already exists. Skipping insertion of this asset."  
-            Logger.log(  
-                name=self.__class__.__name__,  
-                level=Logger.WARNING,  
-                message=message  
-            )  
-        except Exception as error:  
-            Logger.log(  
-                name=self.__class__.__name__,  
-                level=Logger.ERROR,  
-                message=f"Failed to insert asset {asset.code}: Error Type: {type(error)}"  
-            )  
-            raise  
-        finally:  
-            await self._release(connection)  
 
     async def build_cot_report_table(self, cot_reports: list[COTReport]) -> None:  
-        connection: aiomysql.Connection = await self._connect()  
         try:  
-            async with connection.cursor() as cursor:  
-                await cursor.execute(self._CREATE_COT_REPORTS_TABLE_QUERY)  
-                await connection.commit()  
+            async with self._connect("build_cot_report_table") as connection:
+                async with connection.cursor() as cursor:  
+                    await cursor.execute(self._CREATE_COT_REPORTS_TABLE_QUERY)  
+                    await connection.commit()  
             
             tasks: list[Coroutine] = [self._put_cot_report(report) for report in cot_reports]  
             await asyncio.gather(*tasks)  
@@ -162,74 +124,79 @@ class MySQLRepository(AssetRepository, COTRepository):
                 message=f"Failed to build COT report table: Error Type: {type(error)}"  
             )  
             raise  
-        finally:  
-            await self._release(connection)  
 
     async def _put_cot_report(self, report: COTReport) -> None:  
-        connection: aiomysql.Connection = await self._connect()  
+        import pymysql
         retries = 3
-        for attempt in range(retries):  
-            try:  
-                async with connection.cursor() as cursor:  
-                    # Check if the report already exists  
-                    await cursor.execute(  
-                        f"""  
-                            SELECT COUNT(*) FROM {COTRepository._COT_REPORTS_TABLE_NAME}  
-                            WHERE asset_code = %s AND report_date = %s  
-                        """,  
-                        (report.asset_code, report.reported_date)  
-                    )  
-                    exists = await cursor.fetchone()  
-                    if exists[0] > 0:  
+        async with self._connect("_put_cot_report") as connection:
+            for attempt in range(retries):  
+                try:  
+                    async with connection.cursor() as cursor:  
+                        # Check if the report already exists  
+                        await cursor.execute(  
+                            f"""  
+                                SELECT COUNT(*) FROM {COTRepository._COT_REPORTS_TABLE_NAME}  
+                                WHERE asset_code = %s AND report_date = %s  
+                            """,  
+                            (report.asset_code, report.reported_date)  
+                        )  
+                        exists = await cursor.fetchone()  
+                        if exists[0] > 0:  
+                            Logger.log(  
+                                name=self.__class__.__name__,  
+                                level=Logger.INFO,  
+                                message="COT report for asset %s on date %s already exists. Skipping insertion.",
+                                args=(report.asset_code, report.reported_date)
+                            )  
+                            return  # Skip insertion if it already exists  
+
+                        # Proceed to insert if it does not exist  
+                        report_data = json.dumps(report.to_dict(verbose=True, enhanced=True))  
+                        await cursor.execute(  
+                            f"""  
+                                INSERT INTO {COTRepository._COT_REPORTS_TABLE_NAME} (asset_code, report_date, report_data)  
+                                VALUES (%s, %s, %s)  
+                            """,  
+                            (report.asset_code, report.reported_date, report_data)  
+                        )  
+                        await connection.commit()  
+                    break  # Exit loop if successful  
+                except pymysql.err.OperationalError as e:  
+                    if e.args[0] == 1213 and attempt + 1 < retries:  # Deadlock error code  
                         Logger.log(  
                             name=self.__class__.__name__,  
-                            level=Logger.INFO,  
-                            message=f"COT report for asset {report.asset_code} on date {report.reported_date} already exists. Skipping insertion."  
+                            level=Logger.WARNING,  
+                            message=f"Deadlock detected. Retrying... (Attempt {attempt + 1}/{retries})"  
                         )  
-                        return  # Skip insertion if it already exists  
-
-                    # Proceed to insert if it does not exist  
-                    report_data = json.dumps(report.to_dict(verbose=True, enhanced=True))  
-                    await cursor.execute(  
-                        f"""  
-                            INSERT INTO {COTRepository._COT_REPORTS_TABLE_NAME} (asset_code, report_date, report_data)  
-                            VALUES (%s, %s, %s)  
-                        """,  
-                        (report.asset_code, report.reported_date, report_data)  
-                    )  
-                    await connection.commit()  
-                break  # Exit loop if successful  
-            except pymysql.err.OperationalError as e:  
-                if e.args[0] == 1213:  # Deadlock error code  
-                    Logger.log(  
-                        name=self.__class__.__name__,  
-                        level=Logger.WARNING,  
-                        message=f"Deadlock detected. Retrying... (Attempt {attempt + 1}/{retries})"  
-                    )  
-                    await asyncio.sleep(1)  # Wait before retrying  
-                    continue  # Retry the operation  
-                else:  
-                    Logger.log(  
-                        name=self.__class__.__name__,  
-                        level=Logger.ERROR,  
-                        message=f"Failed to insert COT report for asset {report.asset_code}: Error Type: {e}"  
-                    )  
-                    raise  
-            finally:  
-                await self._release(connection)  
+                        await connection.rollback()
+                        await asyncio.sleep(1)  # Wait before retrying  
+                        continue  # Retry the operation  
+                    else:  
+                        Logger.log(  
+                            name=self.__class__.__name__,  
+                            level=Logger.ERROR,  
+                            message=f"Failed to insert COT report for asset {report.asset_code}: Error Type: {e}"  
+                        )  
+                        raise  
 
     async def insert_cot_reports(self, cot_reports: list[COTReport]) -> None:  
-        connection: aiomysql.Connection = await self._connect() 
+        """
+        Upserts the reports with a single statement and commit, the data of reports that already exist is replaced.
+        """
         try:
-            cursor: aiomysql.Cursor
-            async with connection.cursor() as cursor:
-                for report in cot_reports:
-                    await cursor.execute(
+            async with self._connect("insert_cot_reports") as connection:
+                cursor: aiomysql.Cursor
+                async with connection.cursor() as cursor:
+                    await cursor.executemany(
                         f"""
                             INSERT INTO {COTRepository._COT_REPORTS_TABLE_NAME} (asset_code, report_date, report_data)
                             VALUES (%s, %s, %s)
+                            ON DUPLICATE KEY UPDATE report_data = VALUES(report_data)
                         """,
-                        (report.asset_code, report.reported_date, json.dumps(report.to_dict()))
+                        [
+                            (report.asset_code, report.reported_date, json.dumps(report.to_dict()))
+                            for report in cot_reports
+                        ]
                     )
                     await connection.commit()
         except Exception as error:
@@ -239,16 +206,13 @@ class MySQLRepository(AssetRepository, COTRepository):
                 message=f"Failed to insert COT reports: Error Type: {error}"  
             )  
             raise error
-        finally:
-            await self._release(connection) 
 
     async def fetch_cot_reports_by(
             self, asset_codes: list[str] | None = None, 
             released_dates: list[str] | None = None
         ) -> list[tuple]:
         results: list[tuple] = []  
-        connection: aiomysql.Connection = await self._connect()
-        try:
+        async with self._connect("fetch_cot_reports_by") as connection:
             cursor: aiomysql.Cursor
             async with connection.cursor() as cursor:
                 if released_dates:
@@ -262,23 +226,90 @@ class MySQLRepository(AssetRepository, COTRepository):
                     results = await cursor.fetchall()
                 if asset_codes:
                     results = list(filter(lambda record: record[1] in asset_codes, results))
-            if len(results) == 0:
-                raise LookupError("No report was found.")
-            return results
-        except Exception as error:
-            raise error
-        finally:
-            await self._release(connection)
+        if len(results) == 0:
+            raise LookupError("No report was found.")
+        return results
+
+    async def fetch_cot_reports_between(
+            self,
+            asset_codes: list[str],
+            start_date: str,
+            end_date: str
+        ) -> list[tuple]:
+        results: list[tuple] = []
+        async with self._connect("fetch_cot_reports_between") as connection:
+            cursor: aiomysql.Cursor
+            async with connection.cursor() as cursor:
+                await cursor.execute(
+                    f"""
+                    SELECT * FROM {COTRepository._COT_REPORTS_TABLE_NAME}
+                    WHERE asset_code IN ({", ".join(["%s"] * len(asset_codes))}) AND report_date BETWEEN %s AND %s
+                    ORDER BY report_date
+                    """,
+                    [*asset_codes, start_date, end_date]
+                )
+                results = await cursor.fetchall()
+        if len(results) == 0:
+            raise LookupError("No report was found.")
+        return list(results)
 
     async def insert_assets(self, assets: list[Asset]) -> None:  
-        raise NotImplementedError  
+        """
+        Inserts the assets in a single statement, assets whose code already exists are skipped. The in-memory asset
+        index is refreshed afterwards.
+        """
+        try:
+            async with self._connect("insert_assets") as connection:
+                cursor: aiomysql.Cursor
+                async with connection.cursor() as cursor:
+                    await cursor.executemany(
+                        f"""
+                            INSERT INTO {self._ASSETS_TABLE_NAME} (code, name, cftc_code)
+                            VALUES (%s, %s, %s)
+                            ON DUPLICATE KEY UPDATE code = code
+                        """,
+                        [(asset.code, asset.name, asset.cftc_code) for asset in assets]
+                    )
+                    await connection.commit()
+                await self._load_asset_index(connection)
+        except Exception as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.ERROR,
+                message=f"Failed to insert assets: Error Type: {error}"
+            )
+            raise
+
+    async def get_assets_by(
+            self, 
+            codes: list[str] | None = None, 
+            names: list[str] | None = None, 
+            cftc_code: list[int] | None = None
+        ) -> list[tuple[Any]]:  
+        """
+        Looks the assets up in the in-memory asset index, the index is loaded from the assets table on first use.
+        """
+        if not self._asset_index.is_loaded:
+            async with self._connect("get_assets_by") as connection:
+                await self._load_asset_index(connection)
+        results: list[tuple[Any]] = self._asset_index.get_by(codes=codes, names=names, cftc_codes=cftc_code)
+        if len(results) == 0:
+            raise LookupError("No asset was found.")
+        return results
 
-    async def get_assets_by(self, codes: list[str] | None = None, names: list[str] | None = None, cftc_code: list[int] | None = None) -> list[tuple[Any]]:  
-        raise NotImplementedError  
+    async def _load_asset_index(self, connection: "aiomysql.Connection") -> None:
+        """
+        Loads the in-memory asset index from the assets table.
+        """
+        cursor: aiomysql.Cursor
+        async with connection.cursor() as cursor:
+            await cursor.execute(f"SELECT code, name, cftc_code FROM {self._ASSETS_TABLE_NAME}")
+            self._asset_index.load(list(await cursor.fetchall()))
 
 
 async def main():  
     repo: MySQLRepository = MySQLRepository()  
+    await MySQLPoolManager.get_instance().warm_up()
     
     async def build_assets():  
         start = time.time()  
@@ -287,22 +318,13 @@ async def main():
         print(f"Finished building assets in: {finish_time}")  
 
     async def build_cot_reports():  
+        # The backfill pipeline reads the files with pandas, only this example needs it.
+        from features.sentiment.cot.tools.cot_backfill_pipeline import COTBackfillPipeline
         start = time.time()  
-        """ presenter = COTReportPresenter() 
-        cot_reports: list[COTReport] = []  
-        tasks = [  
-            presenter.from_dataframe(  
-                data=pd.read_csv(f"{Util.get_root_dir()}/data/cot/historical_reports/202{4-i}_cot_reports.txt"),  
-                suppress_error=True  
-            )   
-            for i in range(4)  
-        ]  
-        for cot_report in await asyncio.gather(*tasks):  
-            cot_reports.extend(cot_report) """
-        cot_reports: list[COTReport] = await COTReportBuilder().build_from_files(
-            [f"{Util.get_root_dir()}/data/202{4 - i}_cot_reports.txt" for i in range(4)]
-        ) 
-        await repo.build_cot_report_table(cot_reports)  
+        statistics = await COTBackfillPipeline(cot_repository=repo).run_from_files(
+            [f"{Util.get_root_dir()}/data/cot/historical_reports/202{i + 1}_cot_reports.txt" for i in range(4)]
+        )
+        print({name: stage.to_dict() for name, stage in statistics.items()})
         finish_time = time.time() - start  
         print(f"Finished building reports in: {finish_time}")  
     
@@ -314,6 +336,8 @@ async def main():
         finish_time = time.time() - start 
         print(fetched_results)
         print(f"Finished fetching reports in: {finish_time}")
+        print(f"Connection pool metrics: {MySQLPoolManager.get_instance().metrics.to_dict()}")
+        print(f"Query metrics: {MySQLRepository._QUERY_SECONDS.to_dict()}")
 
     #await build_assets()  
     #await build_cot_reports()
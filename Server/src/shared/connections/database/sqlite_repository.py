@@ -0,0 +1,299 @@
+import asyncio
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Final, TypeVar
+
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+from shared.connections.database.asset_index import AssetIndex
+from shared.interfaces.assets_repository import AssetRepository
+from shared.models.asset import Asset
+from shared.models.currency import ReportedCurrencies
+from shared.models.reported_assets import ReportedAssets
+from shared.utils.logger import Logger
+from shared.utils.settings import Settings
+from shared.utils.util import Util
+
+T = TypeVar("T")
+
+
+class SQLiteRepository(AssetRepository, COTRepository):
+    """
+    Handles storing and fetching COT reports in an embedded SQLite database.
+
+    It has the same query surface as the MySQLRepository but needs no database server, which makes it suited for
+    single-node analysis and benchmarks. All statements run on a single worker thread that owns the connection, so
+    the event loop is never blocked by disk I/O.
+    """
+    _CREATE_ASSET_TABLE_QUERY: Final[str] = f"""
+        CREATE TABLE IF NOT EXISTS {AssetRepository._ASSETS_TABLE_NAME} (
+            code TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            cftc_code TEXT NOT NULL,
+            UNIQUE (code, cftc_code)
+        )
+    """
+    _CREATE_COT_REPORTS_TABLE_QUERY: Final[str] = f"""
+        CREATE TABLE IF NOT EXISTS {COTRepository._COT_REPORTS_TABLE_NAME} (
+            report_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            asset_code TEXT,
+            report_date TEXT,
+            report_data TEXT,
+            FOREIGN KEY (asset_code) REFERENCES {AssetRepository._ASSETS_TABLE_NAME}(code),
+            UNIQUE (asset_code, report_date)
+        )
+    """
+    _UPSERT_COT_REPORT_QUERY: Final[str] = f"""
+        INSERT INTO {COTRepository._COT_REPORTS_TABLE_NAME} (asset_code, report_date, report_data)
+        VALUES (?, ?, ?)
+        ON CONFLICT (asset_code, report_date) DO UPDATE SET report_data = excluded.report_data
+    """
+    _INSERT_NEW_COT_REPORT_QUERY: Final[str] = f"""
+        INSERT INTO {COTRepository._COT_REPORTS_TABLE_NAME} (asset_code, report_date, report_data)
+        VALUES (?, ?, ?)
+        ON CONFLICT (asset_code, report_date) DO NOTHING
+    """
+    _IN_MEMORY_DATABASE: Final[str] = ":memory:"
+
+    def __init__(self, database: str | None = None):
+        """
+        Initializes the SQLiteRepository, the database file is opened on first use.
+
+        Make sure to close the database connection when done with all operations by calling disconnect().
+
+        :param database: The path to the database file or ":memory:" for an in-memory database. Defaults to the
+        SQLITE_DATABASE environment variable or data/cot/cot_reports.sqlite3.
+        :type database: str
+        """
+        super().__init__()
+        self._database: str = (
+            database or Settings.get_instance().sqlite_database or f"{Util.get_root_dir()}/data/cot/cot_reports.sqlite3"
+        )
+        self._connection: sqlite3.Connection | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self._asset_index: AssetIndex = AssetIndex()
+
+    async def _run(self, operation: Callable[[sqlite3.Connection], T]) -> T:
+        """
+        Runs the operation on the worker thread that owns the database connection.
+
+        :param operation: A function that receives the connection.
+        :type operation: Callable[[sqlite3.Connection], T]
+        """
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=self.__class__.__name__)
+        loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: operation(self._get_connection()))
+
+    def _get_connection(self) -> sqlite3.Connection:
+        """
+        :return sqlite3.Connection: The database connection, it is opened and configured on first use.
+        """
+        if self._connection is None:
+            try:
+                self._connection = sqlite3.connect(self._database, check_same_thread=False)
+                if self._database != self._IN_MEMORY_DATABASE:
+                    self._connection.execute("PRAGMA journal_mode = WAL")
+                    self._connection.execute("PRAGMA synchronous = NORMAL")
+                self._connection.execute("PRAGMA foreign_keys = ON")
+            except sqlite3.Error as e:
+                Logger.log(
+                    name=self.__class__.__name__,
+                    level=Logger.CRITICAL,
+                    message=f"Failed to open database {self._database}: {e}"
+                )
+                raise
+        return self._connection
+
+    async def disconnect(self) -> None:
+        """
+        Closes the database connection.
+        """
+        if self._executor is None:
+            return
+        def close(connection: sqlite3.Connection) -> None:
+            connection.close()
+        await self._run(close)
+        self._connection = None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def build_assets_table(self, assets: list[Asset]) -> None:
+        try:
+            def create_table(connection: sqlite3.Connection) -> None:
+                with connection:
+                    connection.execute(self._CREATE_ASSET_TABLE_QUERY)
+            await self._run(create_table)
+            await self.insert_assets(assets)
+        except Exception as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.CRITICAL,
+                message=f"Error while building assets table: Error Type: {type(error)}"
+            )
+            raise
+
+    async def insert_assets(self, assets: list[Asset]) -> None:
+        """
+        Inserts the assets in a single transaction, assets whose code already exists are skipped. The in-memory asset
+        index is refreshed afterwards.
+        """
+        rows: list[tuple[str, str, str]] = [(asset.code, asset.name, asset.cftc_code) for asset in assets]
+        def insert(connection: sqlite3.Connection) -> list[tuple[Any, ...]]:
+            with connection:
+                connection.executemany(
+                    f"""
+                        INSERT INTO {self._ASSETS_TABLE_NAME} (code, name, cftc_code)
+                        VALUES (?, ?, ?)
+                        ON CONFLICT (code) DO NOTHING
+                    """,
+                    rows
+                )
+            return self._select_assets(connection)
+        try:
+            self._asset_index.load(await self._run(insert))
+        except Exception as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.ERROR,
+                message=f"Failed to insert assets: Error Type: {error}"
+            )
+            raise
+
+    async def get_assets_by(
+            self,
+            codes: list[str] | None = None,
+            names: list[str] | None = None,
+            cftc_code: list[int] | None = None
+        ) -> list[tuple[Any]]:
+        """
+        Looks the assets up in the in-memory asset index, the index is loaded from the assets table on first use.
+        """
+        if not self._asset_index.is_loaded:
+            self._asset_index.load(await self._run(self._select_assets))
+        results: list[tuple[Any]] = self._asset_index.get_by(codes=codes, names=names, cftc_codes=cftc_code)
+        if len(results) == 0:
+            raise LookupError("No asset was found.")
+        return results
+
+    def _select_assets(self, connection: sqlite3.Connection) -> list[tuple[Any, ...]]:
+        return connection.execute(f"SELECT code, name, cftc_code FROM {self._ASSETS_TABLE_NAME}").fetchall()
+
+    async def build_cot_report_table(self, cot_reports: list[COTReport]) -> None:
+        """
+        Creates the COT report table and inserts the reports in a single transaction, reports that already exist are
+        skipped.
+        """
+        rows: list[tuple[str, str, str]] = self._to_rows(cot_reports)
+        def build(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.execute(self._CREATE_COT_REPORTS_TABLE_QUERY)
+                connection.executemany(self._INSERT_NEW_COT_REPORT_QUERY, rows)
+        try:
+            await self._run(build)
+        except Exception as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.CRITICAL,
+                message=f"Failed to build COT report table: Error Type: {type(error)}"
+            )
+            raise
+
+    async def insert_cot_reports(self, cot_reports: list[COTReport]) -> None:
+        """
+        Upserts the reports in a single transaction, the data of reports that already exist is replaced.
+        """
+        rows: list[tuple[str, str, str]] = self._to_rows(cot_reports)
+        def upsert(connection: sqlite3.Connection) -> None:
+            with connection:
+                connection.executemany(self._UPSERT_COT_REPORT_QUERY, rows)
+        try:
+            await self._run(upsert)
+        except Exception as error:
+            Logger.log(
+                name=self.__class__.__name__,
+                level=Logger.ERROR,
+                message=f"Failed to insert COT reports: Error Type: {error}"
+            )
+            raise
+
+    async def fetch_cot_reports_by(
+            self,
+            asset_codes: list[str] | None = None,
+            released_dates: list[str] | None = None
+        ) -> list[tuple]:
+        conditions: list[str] = []
+        parameters: list[str] = []
+        if released_dates:
+            conditions.append(f"report_date IN ({', '.join(['?'] * len(released_dates))})")
+            parameters.extend(released_dates)
+        if asset_codes:
+            conditions.append(f"asset_code IN ({', '.join(['?'] * len(asset_codes))})")
+            parameters.extend(asset_codes)
+        query: str = f"SELECT * FROM {COTRepository._COT_REPORTS_TABLE_NAME}"
+        if conditions:
+            query += f" WHERE {' AND '.join(conditions)}"
+        def fetch(connection: sqlite3.Connection) -> list[tuple]:
+            return connection.execute(query, parameters).fetchall()
+        results: list[tuple] = await self._run(fetch)
+        if len(results) == 0:
+            raise LookupError("No report was found.")
+        return results
+
+    async def fetch_cot_reports_between(
+            self,
+            asset_codes: list[str],
+            start_date: str,
+            end_date: str
+        ) -> list[tuple]:
+        query: str = f"""
+            SELECT * FROM {COTRepository._COT_REPORTS_TABLE_NAME}
+            WHERE asset_code IN ({', '.join(['?'] * len(asset_codes))}) AND report_date BETWEEN ? AND ?
+            ORDER BY report_date
+        """
+        def fetch(connection: sqlite3.Connection) -> list[tuple]:
+            return connection.execute(query, [*asset_codes, start_date, end_date]).fetchall()
+        results: list[tuple] = await self._run(fetch)
+        if len(results) == 0:
+            raise LookupError("No report was found.")
+        return results
+
+    @staticmethod
+    def _to_rows(cot_reports: list[COTReport]) -> list[tuple[str, str, str]]:
+        return [
+            (report.asset_code, report.reported_date, json.dumps(report.to_dict(verbose=True, enhanced=True)))
+            for report in cot_reports
+        ]
+
+
+async def main():
+    repo: SQLiteRepository = SQLiteRepository()
+
+    async def build_assets():
+        start = time.time()
+        await repo.build_assets_table(ReportedAssets.all)
+        finish_time = time.time() - start
+        print(f"Finished building assets in: {finish_time}")
+
+    async def fetch_cot_reports():
+        start = time.time()
+        asset_codes: list[str] = list(map(lambda asset: asset.code, [ReportedCurrencies.aud]))
+        dates: list[str] = ["2024-11-12"]
+        fetched_results: list[tuple] = await repo.fetch_cot_reports_by(asset_codes=asset_codes, released_dates=dates)
+        finish_time = time.time() - start
+        print(fetched_results)
+        print(f"Finished fetching reports in: {finish_time}")
+
+    try:
+        await build_assets()
+        await repo.build_cot_report_table([])
+        await fetch_cot_reports()
+    except LookupError as error:
+        print(error)
+    finally:
+        await repo.disconnect()
+
+if __name__ == "__main__":
+    asyncio.run(main())
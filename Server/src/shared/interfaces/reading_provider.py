@@ -0,0 +1,34 @@
+from abc import ABC, abstractmethod
+
+from shared.enums.reading import Reading
+
+
+class ReadingProvider(ABC):
+    """
+    Interface for any source of readings.
+
+    A reading provider gives the reading of a single asset and of a pair of assets, e.g. from the positioning of
+    traders in the latest COT report.
+    """
+
+    @abstractmethod
+    def get_asset_reading(self, asset_code: str) -> Reading:
+        """
+        :param asset_code: The code of the asset.
+        :type asset_code: str
+        :raises LookupError: If the provider has no reading of the asset.
+        :return Reading: The reading of the asset.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_pair_reading(self, base_code: str, quote_code: str) -> Reading:
+        """
+        :param base_code: The code of the base asset.
+        :type base_code: str
+        :param quote_code: The code of the quote asset.
+        :type quote_code: str
+        :raises LookupError: If the provider has no reading of either asset.
+        :return Reading: The reading of the base asset relative to the quote asset.
+        """
+        raise NotImplementedError
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
 
 from shared.enums.reading import Reading
+from shared.interfaces.reading_provider import ReadingProvider
 
 
 class Tradable(ABC):
@@ -11,8 +12,10 @@ class Tradable(ABC):
     """
 
     @abstractmethod
-    def get_reading(self) -> Reading:
+    def get_reading(self, reading_provider: ReadingProvider) -> Reading:
         """
+        :param reading_provider: The source of the reading, e.g. the pair reading matrix of the latest COT report.
+        :type reading_provider: ReadingProvider
         :return Reading: The reading of this tradable asset.
         """
         raise NotImplementedError
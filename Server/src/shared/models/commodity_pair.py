@@ -1,7 +1,6 @@
 from shared.models.commodity import Commodity
 from shared.models.currency import Currency
 from shared.models.pair import Pair
-from shared.enums.reading import Reading
 
 
 class CommodityPair(Pair):
@@ -10,18 +9,13 @@ class CommodityPair(Pair):
 
     A commodity pair is a pair where its base asset is a commodity and its quote asset is a currency.
     """
-    def __init__(self, base: Commodity, quote: Currency, name: str):
-        super().__init__(base, quote)
+    def __init__(self, base: Commodity, quote: Currency, name: str | None = None):
+        super().__init__(base, quote, name)
     
     @property
     def base(self) -> Commodity:
-        return self.base
+        return self._base
     
     @property
     def quote(self) -> Currency:
-        return self.quote
-
-    def get_reading(self) -> Reading:
-        raise NotImplementedError
-
-    
\ No newline at end of file
+        return self._quote
@@ -9,9 +9,9 @@ class CryptoCurrencyPair(CurrencyPair):
 
     A cryptocurrency pair is a currency pair where is base asset is a cryptocurrency and its quote asset is a currency.
     """
-    def __init__(self, base: CryptoCurrency, quote: Currency, name: str):
+    def __init__(self, base: CryptoCurrency, quote: Currency, name: str | None = None):
         super().__init__(base, quote, name)
 
     @property
     def base(self) -> CryptoCurrency:
-        return self.base
\ No newline at end of file
+        return self._base
\ No newline at end of file
@@ -1,6 +1,5 @@
 from shared.models.currency import Currency
 from shared.models.pair import Pair
-from shared.enums.reading import Reading
 
 
 class CurrencyPair(Pair):
@@ -9,17 +8,13 @@ class CurrencyPair(Pair):
 
     A currency pair is a pair where both its base asset and quote asset are currencies.
     """
-    def __init__(self, base: Currency, quote: Currency, name: str):
-        super().__init__(base, quote)
+    def __init__(self, base: Currency, quote: Currency, name: str | None = None):
+        super().__init__(base, quote, name)
     
     @property
     def base(self) -> Currency:
-        return self.base
+        return self._base
     
     @property
     def quote(self) -> Currency:
-        return self.quote
-
-    def get_reading(self) -> Reading:
-        raise NotImplementedError
-
+        return self._quote
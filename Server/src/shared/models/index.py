@@ -1,6 +1,7 @@
 from typing import Final
 from shared.models.asset import Asset
 from shared.enums.reading import Reading
+from shared.interfaces.reading_provider import ReadingProvider
 from shared.interfaces.tradable import Tradable
 
 
@@ -13,8 +14,8 @@ class Index(Asset, Tradable):
     def __init__(self, code: str, name: str, cftc_code: str):
         super().__init__(code, name, cftc_code)
 
-    def get_reading(self) -> Reading:
-        raise NotImplementedError
+    def get_reading(self, reading_provider: ReadingProvider) -> Reading:
+        return reading_provider.get_asset_reading(self._code)
 
 
 class ReportedIndecies:
@@ -2,6 +2,7 @@ from abc import ABC
 
 from shared.models.asset import Asset
 from shared.enums.reading import Reading
+from shared.interfaces.reading_provider import ReadingProvider
 from shared.interfaces.tradable import Tradable
 
 
@@ -11,20 +12,34 @@ class Pair(Tradable, ABC):
 
     An pair represents the value of one asset (base asset) relative to another (quote asset).
     """
-    def __init__(self, base: Asset, quote: Asset):
+    def __init__(self, base: Asset, quote: Asset, name: str | None = None):
         """
         :param base: The base asset.
         :type base: Asset 
         :param quote: The quote asset.
         :type quote: Asset 
-        :param name: The name of this pair.
+        :param name: The name of this pair, defaults to the names of its assets, e.g. Euro/US Dollar.
         :type name: str 
         """
         self._code = f"{base.code}/{quote.code}"
-        self._name = f"{base.name}/{quote.name}"
+        self._name = name or f"{base.name}/{quote.name}"
         self._base = base
         self._quote = quote
 
+    @property
+    def code(self) -> str:
+        """
+        :return str: The code of the pair, e.g. EUR/USD.
+        """
+        return self._code
+
+    @property
+    def name(self) -> str:
+        """
+        :return str: The name of the pair.
+        """
+        return self._name
+
     @property
     def base(self) -> Asset:
         """
@@ -39,5 +54,5 @@ class Pair(Tradable, ABC):
         """
         return self._quote
 
-    def get_reading(self) -> Reading:
-        raise NotImplementedError
+    def get_reading(self, reading_provider: ReadingProvider) -> Reading:
+        return reading_provider.get_pair_reading(self._base.code, self._quote.code)
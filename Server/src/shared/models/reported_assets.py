@@ -14,4 +14,6 @@ class ReportedAssets:
     all: Final[list[Asset | Any]] = ReportedCurrencies.all \
         + ReportedCryptoCurrencies.all \
         + ReportedIndecies.all \
-        + ReportedCommodities.all
\ No newline at end of file
+        + ReportedCommodities.all
+    by_code: Final[dict[str, Asset | Any]] = {asset.code: asset for asset in all}
+    by_cftc_code: Final[dict[str, Asset | Any]] = {asset.cftc_code: asset for asset in all}
@@ -0,0 +1,45 @@
+from itertools import combinations
+from typing import Final
+
+from shared.models.commodity import ReportedCommodities
+from shared.models.commodity_pair import CommodityPair
+from shared.models.cryptocurrency import ReportedCryptoCurrencies
+from shared.models.cryptocurrency_pair import CryptoCurrencyPair
+from shared.models.currency import Currency, ReportedCurrencies
+from shared.models.currency_pair import CurrencyPair
+from shared.models.pair import Pair
+
+
+def _by_base_priority(currencies: list[Currency]) -> list[Currency]:
+    """
+    :return list[Currency]: The currencies in the order the market quotes them in, the first one of a pair being its
+    base, e.g. EUR/USD and USD/JPY.
+    """
+    priority: list[str] = ["EUR", "GBP", "AUD", "NZD", "USD", "CAD", "CHF", "JPY"]
+    return sorted(
+        currencies,
+        key=lambda currency: priority.index(currency.code) if currency.code in priority else len(priority)
+    )
+
+
+class ReportedPairs:
+    """
+    Holds pre-defined pairs of reported assets: every pair of reported currencies, and every reported cryptocurrency and
+    commodity quoted in each reported currency.
+    """
+    currency_pairs: Final[list[CurrencyPair]] = [
+        CurrencyPair(base, quote)
+        for base, quote in combinations(_by_base_priority(ReportedCurrencies.all), 2)
+    ]
+    cryptocurrency_pairs: Final[list[CryptoCurrencyPair]] = [
+        CryptoCurrencyPair(base, quote)
+        for base in ReportedCryptoCurrencies.all
+        for quote in _by_base_priority(ReportedCurrencies.all)
+    ]
+    commodity_pairs: Final[list[CommodityPair]] = [
+        CommodityPair(base, quote)
+        for base in ReportedCommodities.all
+        for quote in _by_base_priority(ReportedCurrencies.all)
+    ]
+    all: Final[list[Pair]] = currency_pairs + cryptocurrency_pairs + commodity_pairs
+    by_code: Final[dict[str, Pair]] = {pair.code: pair for pair in all}
@@ -1,71 +1,198 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
-from typing import Final
+import queue
+import threading
+from typing import Any, Final
 
+from shared.utils.settings import Settings
 from shared.utils.util import Util
 
 
+class _JSONFormatter(logging.Formatter):
+    """
+    Formats a record as one JSON object per line, along with the structured fields given to Logger.log.
+    """
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict[str, Any] = {
+            "time": self.formatTime(record),
+            "name": record.name,
+            "level": record.levelname,
+            "message": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry.update(exception=self.formatException(record.exc_info))
+        return json.dumps(entry, default=str)
+
+
+class _DestinationFilter(logging.Filter):
+    """
+    Lets through the records that were logged to the destination of its handler, see to_file and to_console of
+    Logger.log.
+    """
+    def __init__(self, destination: str):
+        super().__init__()
+        self._destination = destination
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return getattr(record, self._destination, True)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Queues records as they are, the message is formatted by the thread writing the logs instead of the caller.
+    """
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
 class Logger:
     """
     Utility class for logging to help with debugging and monitoring the application's behaviour.
+
+    Records are put on a queue by the caller and written to the log file and the console by a dedicated thread, so
+    logging doesn't block the event loop on file or console I/O. Messages below the configured level are dropped before
+    they are formatted.
     """
     _LOG_DIR: Final[str] = f"{Util.get_root_dir()}/logs"
     _LOG_FORMAT: Final[str] = "From: %(name)s, time: %(asctime)s, level: %(levelname)s, message: %(message)s"
+    DEBUG: Final[int] = logging.DEBUG
     INFO: Final[int] = logging.INFO
     WARNING: Final[int] = logging.WARNING
     ERROR: Final[int] = logging.ERROR
     CRITICAL: Final[int] = logging.CRITICAL
+    _LEVELS: Final[frozenset[int]] = frozenset({DEBUG, INFO, WARNING, ERROR, CRITICAL})
+    _loggers: dict[str, logging.Logger] = {}
+    _queue_handler: _QueueHandler | None = None
+    _listener: logging.handlers.QueueListener | None = None
+    _level: int = logging.INFO
+    _lock: threading.Lock = threading.Lock()
 
     @classmethod
-    def configure(cls) -> None:
+    def configure(cls, level: int | str | None = None, json_output: bool | None = None) -> None:
         """
-        Configures the loggin setting.
+        Configures the loggin setting and starts the thread writing the logs. It is called on the first log, calling it
+        again replaces the previous setting.
+
+        :param level: The minimum level logged, defaults to the LOG_LEVEL environment variable or INFO.
+        :type level: int | str
+        :param json_output: Specify whether to write one JSON object per line instead of text, defaults to whether the
+        LOG_FORMAT environment variable is json.
+        :type json_output: bool
         """
-        if not os.path.exists(cls._LOG_DIR): os.makedirs(cls._LOG_DIR)
-        logging.basicConfig(
-            level=logging.INFO,
-            format=cls._LOG_FORMAT,
-            handlers=[
-                logging.FileHandler(f"{cls._LOG_DIR}/logs.log"),
-                logging.StreamHandler()
-            ]
-        )
+        with cls._lock:
+            cls._stop_listener()
+            settings: Settings = Settings.get_instance()
+            if level is None:
+                level = settings.log_level or "INFO"
+            if json_output is None:
+                json_output = (settings.log_format or "text").lower() == "json"
+            cls._level = logging.getLevelName(level.upper()) if isinstance(level, str) else level
+            if not isinstance(cls._level, int):
+                cls._level = logging.INFO
+            formatter: logging.Formatter = _JSONFormatter() if json_output else logging.Formatter(cls._LOG_FORMAT)
+
+            if not os.path.exists(cls._LOG_DIR): os.makedirs(cls._LOG_DIR)
+            file_handler: logging.Handler = logging.FileHandler(f"{cls._LOG_DIR}/logs.log")
+            file_handler.addFilter(_DestinationFilter("to_file"))
+            console_handler: logging.Handler = logging.StreamHandler()
+            console_handler.addFilter(_DestinationFilter("to_console"))
+            for handler in (file_handler, console_handler):
+                handler.setFormatter(formatter)
+
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            cls._queue_handler = _QueueHandler(log_queue)
+            cls._listener = logging.handlers.QueueListener(
+                log_queue, file_handler, console_handler, respect_handler_level=True
+            )
+            cls._listener.start()
+            for logger in cls._loggers.values():
+                cls._attach(logger)
 
     @classmethod
-    def log(cls, name: str, level: int, message: str, to_file: bool = True, to_console: bool = True) -> None:
+    def log(
+            cls,
+            name: str,
+            level: int,
+            message: str,
+            to_file: bool = True,
+            to_console: bool = True,
+            args: tuple[Any, ...] = (),
+            **fields: Any
+        ) -> None:
         """
         Logs a message.
-        
+
         :param name: The name of the object trying to log a message.
         :type name: str
-        :param level: Loggin level: INFO, WARNING, ERROR, CRITICAL.
-        :type level: int 
-        :param message: The log message.
-        :type message: str 
+        :param level: Loggin level: DEBUG, INFO, WARNING, ERROR, CRITICAL.
+        :type level: int
+        :param message: The log message, %-style placeholders are filled with the args by the thread writing the logs
+        and only if the level is logged, so args must not be changed after the call.
+        :type message: str
         :param to_file: Specify whether to log the message to the file.
         :type to_file: bool
         :param to_console: specify whether to display the message to the file.
         :type to_console: bool
+        :param args: The values of the placeholders of the message.
+        :type args: tuple[Any, ...]
+        :param fields: Structured data of the message, written as keys of the JSON output.
+        :type fields: Any
+        """
+        if cls._listener is None:
+            cls.configure()
+        if level not in cls._LEVELS:
+            message, args, level = "Invalid logging level provided: %s", (level,), logging.ERROR
+        if level < cls._level:
+            return
+        logger: logging.Logger = cls._loggers.get(name) or cls._get_logger(name)
+        logger.log(level, message, *args, extra={"to_file": to_file, "to_console": to_console, "fields": fields})
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Writes the queued records and stops the thread writing the logs.
         """
-        logger: logging.Logger = logging.getLogger(name)
-        if not logger.hasHandlers():
-            if to_file: logger.addHandler(logging.FileHandler(f"{cls._LOG_DIR}/logs.log"))
-            if to_console: logger.addHandler(logging.StreamHandler())
-
-        match level:
-            case logging.INFO:
-                logger.info(message)
-            case logging.WARNING:
-                logger.warning(message)
-            case logging.ERROR:
-                logger.error(message)
-            case logging.CRITICAL:
-                logger.critical(message)
-            case _:
-                logger.error(f"Invalid logging level provided: {level}")
-
-
-if __name__ == "__main__":  
-    Logger.configure()  
-    Logger.log(Logger.__name__, logging.INFO, "This is an informational message.")  
-    Logger.log(Logger.__name__, logging.ERROR, "This is an error message.") 
+        with cls._lock:
+            cls._stop_listener()
+
+    @classmethod
+    def _get_logger(cls, name: str) -> logging.Logger:
+        with cls._lock:
+            if name not in cls._loggers:
+                logger: logging.Logger = logging.getLogger(name)
+                logger.setLevel(logging.DEBUG)
+                logger.propagate = False
+                cls._attach(logger)
+                cls._loggers[name] = logger
+            return cls._loggers[name]
+
+    @classmethod
+    def _attach(cls, logger: logging.Logger) -> None:
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logger.removeHandler(handler)
+        logger.addHandler(cls._queue_handler)
+
+    @classmethod
+    def _stop_listener(cls) -> None:
+        if cls._listener is not None:
+            cls._listener.stop()
+            for handler in cls._listener.handlers:
+                handler.close()
+            cls._listener = None
+
+
+atexit.register(Logger.shutdown)
+
+
+if __name__ == "__main__":
+    Logger.configure()
+    Logger.log(Logger.__name__, logging.INFO, "This is an informational message.")
+    Logger.log(Logger.__name__, logging.ERROR, "This is an error message.")
+    Logger.log(
+        Logger.__name__, logging.INFO, "Stored %d reports of %s.", args=(156, "EUR"), asset_code="EUR", n_reports=156
+    )
@@ -0,0 +1,352 @@
+from bisect import bisect_left
+from collections import deque
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Callable, Final
+
+from shared.utils.settings import Settings
+from shared.utils.util import Util
+
+
+class Counter:
+    """
+    A count that only goes up, e.g. the number of requests sent, kept for each set of labels.
+    """
+    TYPE: Final[str] = "counter"
+
+    def __init__(self, name: str, description: str):
+        """
+        :param name: The name of the metric, e.g. socrata_requests_total.
+        :type name: str
+        :param description: What the metric counts.
+        :type description: str
+        """
+        self.name = name
+        self.description = description
+        self._values: dict[tuple[tuple[str, str], ...], float] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key: tuple[tuple[str, str], ...] = _to_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(_to_key(labels), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def to_prometheus(self) -> list[str]:
+        with self._lock:
+            values: dict[tuple[tuple[str, str], ...], float] = dict(self._values)
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in values.items()]
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            return {_format_labels(key) or "{}": value for key, value in self._values.items()}
+
+
+class _HistogramSeries:
+    """
+    The observations of a histogram for one set of labels: cumulative bucket counts for the exposition, and a window of
+    the latest observations for percentiles.
+    """
+    def __init__(self, n_buckets: int, window_size: int):
+        self.bucket_counts: list[int] = [0] * n_buckets
+        self.count: int = 0
+        self.sum: float = 0.0
+        self.latest: deque[float] = deque(maxlen=window_size)
+
+
+class Histogram:
+    """
+    The distribution of observed values, e.g. the latency of requests in seconds, kept for each set of labels.
+
+    Values are counted in buckets like a Prometheus histogram. The latest observations are also kept in a bounded window
+    so p50 and p99 can be read locally.
+    """
+    TYPE: Final[str] = "histogram"
+    DEFAULT_BUCKETS: Final[tuple[float, ...]] = (
+        0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+    )
+    _DEFAULT_WINDOW_SIZE: Final[int] = 2048
+
+    def __init__(
+            self,
+            name: str,
+            description: str,
+            buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+            window_size: int = _DEFAULT_WINDOW_SIZE
+        ):
+        """
+        :param name: The name of the metric, e.g. socrata_request_seconds.
+        :type name: str
+        :param description: What the metric measures.
+        :type description: str
+        :param buckets: The upper bounds of the buckets, in ascending order.
+        :type buckets: tuple[float, ...]
+        :param window_size: The number of latest observations kept for percentiles.
+        :type window_size: int
+        """
+        self.name = name
+        self.description = description
+        self.buckets: tuple[float, ...] = tuple(sorted(buckets))
+        self._window_size = window_size
+        self._series: dict[tuple[tuple[str, str], ...], _HistogramSeries] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key: tuple[tuple[str, str], ...] = _to_key(labels)
+        bucket: int = bisect_left(self.buckets, value)
+        with self._lock:
+            series: _HistogramSeries | None = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets), self._window_size)
+            if bucket < len(self.buckets):
+                series.bucket_counts[bucket] += 1
+            series.count += 1
+            series.sum += value
+            series.latest.append(value)
+
+    def time(self, **labels: Any) -> "Timer":
+        """
+        :return Timer: Times a block or a function into this histogram, see Timer.
+        """
+        return Timer(self, **labels)
+
+    def count(self, **labels: Any) -> int:
+        series: _HistogramSeries | None = self._series.get(_to_key(labels))
+        return series.count if series else 0
+
+    def percentile(self, percentile: float, **labels: Any) -> float | None:
+        """
+        :param percentile: The percentile, from 0 to 100.
+        :type percentile: float
+        :return float | None: The nearest-rank percentile of the latest observations, None if nothing was observed.
+        """
+        series: _HistogramSeries | None = self._series.get(_to_key(labels))
+        if series is None or not series.latest:
+            return None
+        with self._lock:
+            latest: list[float] = sorted(series.latest)
+        rank: int = max(math.ceil(percentile / 100 * len(latest)) - 1, 0)
+        return latest[rank]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def to_prometheus(self) -> list[str]:
+        lines: list[str] = []
+        with self._lock:
+            series_by_key: list[tuple[tuple[tuple[str, str], ...], list[int], int, float]] = [
+                (key, list(series.bucket_counts), series.count, series.sum) for key, series in self._series.items()
+            ]
+        for key, bucket_counts, count, total in series_by_key:
+            cumulative: int = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key + (("le", _format_value(bound)),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_bucket{_format_labels(key + (("le", "+Inf"),))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+    def to_dict(self) -> dict[str, Any]:
+        with self._lock:
+            keys: list[tuple[tuple[str, str], ...]] = list(self._series)
+        result: dict[str, Any] = {}
+        for key in keys:
+            labels: dict[str, str] = dict(key)
+            series: _HistogramSeries = self._series[key]
+            result[_format_labels(key) or "{}"] = {
+                "count": series.count,
+                "sum": round(series.sum, 6),
+                "p50": self.percentile(50, **labels),
+                "p99": self.percentile(99, **labels)
+            }
+        return result
+
+
+class Timer:
+    """
+    Times a block or a function into a histogram, in seconds.
+
+    Usage:
+    with Timer(histogram, query="fetch"):
+        ...
+
+    async with Timer(histogram, query="fetch"):
+        ...
+
+    @Timer(histogram, conversion="from_list")
+    def from_list(...):
+        ...
+
+    Functions can be sync or async, the time of an async function is the time until its result is returned. A timer
+    used as a context manager should not be shared between tasks, create one per block, e.g. with histogram.time().
+    """
+    def __init__(self, histogram: Histogram, **labels: Any):
+        self._histogram = histogram
+        self._labels = labels
+        self._starts: list[float] = []
+
+    def __enter__(self) -> "Timer":
+        self._starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._starts.pop(), **self._labels)
+
+    async def __aenter__(self) -> "Timer":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.__exit__(*exc_info)
+
+    def __call__(self, function: Callable) -> Callable:
+        histogram, labels = self._histogram, self._labels
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_coroutine(*args: Any, **kwargs: Any) -> Any:
+                start: float = time.perf_counter()
+                try:
+                    return await function(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - start, **labels)
+            return timed_coroutine
+
+        @functools.wraps(function)
+        def timed_function(*args: Any, **kwargs: Any) -> Any:
+            start: float = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return timed_function
+
+
+class MetricsRegistry:
+    """
+    Holds the process-wide metrics and renders them in the Prometheus text exposition format.
+
+    Metrics are registered once by name, asking for a registered name returns the same metric.
+    """
+    _DEFAULT_DUMP_FILE: Final[str] = f"{Util.get_root_dir()}/logs/metrics.prom"
+    _instance: "MetricsRegistry | None" = None
+
+    def __init__(self):
+        self._metrics: dict[str, Counter | Histogram] = {}
+        self._lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> "MetricsRegistry":
+        """
+        :return MetricsRegistry: The process-wide registry.
+        """
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def counter(self, name: str, description: str) -> Counter:
+        return self._register(name, lambda: Counter(name, description), Counter)
+
+    def histogram(self, name: str, description: str, buckets: tuple[float, ...] = Histogram.DEFAULT_BUCKETS) -> Histogram:
+        return self._register(name, lambda: Histogram(name, description, buckets), Histogram)
+
+    def get(self, name: str) -> Counter | Histogram | None:
+        return self._metrics.get(name)
+
+    def reset(self) -> None:
+        """
+        Clears the values of every metric, the metrics stay registered.
+        """
+        for metric in list(self._metrics.values()):
+            metric.reset()
+
+    def to_prometheus(self) -> str:
+        """
+        :return str: The metrics in the Prometheus text exposition format.
+        """
+        lines: list[str] = []
+        for metric in list(self._metrics.values()):
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            lines.extend(metric.to_prometheus())
+        return "\n".join(lines) + "\n"
+
+    def to_dict(self) -> dict[str, Any]:
+        """
+        :return dict[str, Any]: The value of each counter and the count, sum, p50 and p99 of each histogram.
+        """
+        return {name: metric.to_dict() for name, metric in list(self._metrics.items())}
+
+    def dump(self, dump_file: str | None = None) -> str:
+        """
+        Writes the metrics in the Prometheus text exposition format, e.g. for a node exporter textfile collector.
+
+        :param dump_file: The file to write to, defaults to the METRICS_DUMP_FILE environment variable or
+        logs/metrics.prom.
+        :type dump_file: str
+        :return str: The path of the written file.
+        """
+        dump_file = dump_file or Settings.get_instance().metrics_dump_file or self._DEFAULT_DUMP_FILE
+        os.makedirs(os.path.dirname(dump_file), exist_ok=True)
+        temporary_file: str = f"{dump_file}.tmp"
+        with open(temporary_file, "w") as file:
+            file.write(self.to_prometheus())
+        os.replace(temporary_file, dump_file)
+        return dump_file
+
+    def _register(self, name: str, create: Callable[[], Any], metric_type: type) -> Any:
+        with self._lock:
+            metric: Counter | Histogram | None = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = create()
+            if not isinstance(metric, metric_type):
+                raise ValueError(f"The metric {name} is already registered as a {metric.TYPE}.")
+            return metric
+
+
+def _to_key(labels: dict[str, Any]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: tuple[tuple[str, str], ...]) -> str:
+    if not key:
+        return ""
+    escaped: list[str] = [
+        f'{name}="{value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")}"' for name, value in key
+    ]
+    return "{" + ",".join(escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def main():
+    registry: MetricsRegistry = MetricsRegistry.get_instance()
+    latency: Histogram = registry.histogram("example_seconds", "Latency of the example.")
+    calls: Counter = registry.counter("example_calls_total", "Calls of the example.")
+    for _ in range(1000):
+        with Timer(latency, stage="sum"):
+            sum(range(1000))
+        calls.inc(stage="sum")
+    print(registry.to_prometheus())
+    print(json.dumps(registry.to_dict(), indent=4))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import cProfile
+from contextlib import contextmanager
+from datetime import datetime
+import functools
+import inspect
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, Final, Iterator
+
+from shared.utils.logger import Logger
+from shared.utils.settings import Settings
+from shared.utils.util import Util
+
+
+class Profiler:
+    """
+    On-demand CPU and memory profiling of entry points, e.g. the execute method of events, to investigate a slowdown
+    without editing code.
+
+    Each profiled run writes to logs/profiles:
+    - <name>-<time>-<pid>.prof: the cProfile stats, e.g. for python -m pstats or snakeviz.
+    - <name>-<time>-<pid>.snapshot: the tracemalloc snapshot, e.g. to compare runs with Snapshot.compare_to.
+    - <name>-<time>-<pid>.txt: the hot functions and the top allocations.
+
+    Profiling is disabled unless the PROFILING_ENABLED environment variable is true or it is enabled with configure, a
+    disabled profiled function costs one check.
+
+    Usage:
+    @Profiler.profiled("ViewDefaultLatestCOTReportsEvent.execute")
+    async def execute(...):
+        ...
+    """
+    _DEFAULT_PROFILE_DIR: Final[str] = f"{Util.get_root_dir()}/logs/profiles"
+    _DEFAULT_N_TOP: Final[int] = 20
+    _N_TRACEBACK_FRAMES: Final[int] = 10
+    _N_LOGGED: Final[int] = 5
+    _enabled: bool | None = None
+    _profile_dir: str | None = None
+    _n_top: int = _DEFAULT_N_TOP
+    _active: bool = False
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, enabled: bool | None = None, profile_dir: str | None = None, n_top: int | None = None) -> None:
+        """
+        :param enabled: Specify whether profiled functions are profiled, defaults to the PROFILING_ENABLED environment
+        variable.
+        :type enabled: bool
+        :param profile_dir: The directory profiles are written to, defaults to the PROFILE_DIR environment variable or
+        logs/profiles.
+        :type profile_dir: str
+        :param n_top: The number of hot functions and allocations summarized, defaults to the PROFILE_TOP_N environment
+        variable or 20.
+        :type n_top: int
+        """
+        settings: Settings = Settings.get_instance()
+        cls._enabled = enabled if enabled is not None else bool(settings.profiling_enabled)
+        cls._profile_dir = profile_dir or settings.profile_dir or cls._DEFAULT_PROFILE_DIR
+        cls._n_top = n_top or settings.profile_top_n or cls._DEFAULT_N_TOP
+
+    @classmethod
+    def configure_from_argv(cls, argv: list[str] | None = None) -> None:
+        """
+        Enables profiling if the command line has the --profile flag, otherwise the environment decides.
+
+        :param argv: The command line arguments, defaults to sys.argv.
+        :type argv: list[str]
+        """
+        argv = sys.argv[1:] if argv is None else argv
+        cls.configure(enabled=True if "--profile" in argv else None)
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        if cls._enabled is None:
+            cls.configure()
+        return cls._enabled
+
+    @classmethod
+    @contextmanager
+    def profile(cls, name: str) -> Iterator[None]:
+        """
+        Profiles the block if profiling is enabled. Profiles don't nest, a block entered while another one is profiled
+        is only part of the outer profile.
+
+        :param name: The name of the profiled run, used in the names of its files.
+        :type name: str
+        """
+        if not cls.is_enabled():
+            yield
+            return
+        with cls._lock:
+            is_outermost: bool = not cls._active
+            cls._active = True
+        if not is_outermost:
+            yield
+            return
+        was_tracing: bool = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start(cls._N_TRACEBACK_FRAMES)
+        profile: cProfile.Profile = cProfile.Profile()
+        start: float = time.perf_counter()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            elapsed: float = time.perf_counter() - start
+            snapshot: tracemalloc.Snapshot = tracemalloc.take_snapshot()
+            peak: int = tracemalloc.get_traced_memory()[1]
+            if not was_tracing:
+                tracemalloc.stop()
+            with cls._lock:
+                cls._active = False
+            cls._write(name, profile, snapshot, elapsed, peak)
+
+    @classmethod
+    def profiled(cls, name: str | None = None) -> Callable[[Callable], Callable]:
+        """
+        Profiles each call of the decorated function, sync and async functions are supported. The profile of an async
+        function covers everything the event loop runs until its result is returned.
+
+        :param name: The name of the profiled runs, defaults to the qualified name of the function.
+        :type name: str
+        """
+        def decorator(function: Callable) -> Callable:
+            run_name: str = name or function.__qualname__
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def profiled_coroutine(*args: Any, **kwargs: Any) -> Any:
+                    if not cls.is_enabled():
+                        return await function(*args, **kwargs)
+                    with cls.profile(run_name):
+                        return await function(*args, **kwargs)
+                return profiled_coroutine
+
+            @functools.wraps(function)
+            def profiled_function(*args: Any, **kwargs: Any) -> Any:
+                if not cls.is_enabled():
+                    return function(*args, **kwargs)
+                with cls.profile(run_name):
+                    return function(*args, **kwargs)
+            return profiled_function
+        return decorator
+
+    @staticmethod
+    def summarize_stats(stats: pstats.Stats, n_top: int = _DEFAULT_N_TOP) -> list[str]:
+        """
+        :param stats: The stats of a profile.
+        :type stats: pstats.Stats
+        :param n_top: The number of functions summarized.
+        :type n_top: int
+        :return list[str]: The functions that took the most time themselves, excluding the functions they called.
+        """
+        functions: list[tuple[tuple[str, int, str], tuple]] = sorted(
+            stats.stats.items(), key=lambda item: item[1][2], reverse=True
+        )
+        lines: list[str] = []
+        for (file, line, function), (_, n_calls, own_time, cumulative_time, _) in functions[: n_top]:
+            if file.startswith(Util.get_root_dir()):
+                file = os.path.relpath(file, Util.get_root_dir())
+            location: str = f"{file}:{line}" if line else file
+            lines.append(
+                f"{own_time * 1000:10.3f} ms own {cumulative_time * 1000:10.3f} ms cumulative {n_calls:8d} calls  "
+                f"{function} ({location})"
+            )
+        return lines
+
+    @staticmethod
+    def summarize_snapshot(snapshot: tracemalloc.Snapshot, n_top: int = _DEFAULT_N_TOP) -> list[str]:
+        """
+        :param snapshot: The memory snapshot of a profile.
+        :type snapshot: tracemalloc.Snapshot
+        :param n_top: The number of lines summarized.
+        :type n_top: int
+        :return list[str]: The lines of code holding the most memory at the end of the profile.
+        """
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>")
+        ))
+        return [
+            f"{statistic.size / 1024:10.1f} KiB {statistic.count:8d} blocks  {statistic.traceback[0]}"
+            for statistic in snapshot.statistics("lineno")[: n_top]
+        ]
+
+    @classmethod
+    def _write(
+            cls,
+            name: str,
+            profile: cProfile.Profile,
+            snapshot: tracemalloc.Snapshot,
+            elapsed: float,
+            peak: int
+        ) -> None:
+        os.makedirs(cls._profile_dir, exist_ok=True)
+        path: str = os.path.join(
+            cls._profile_dir, f"{name}-{datetime.now().strftime('%Y%m%dT%H%M%S')}-{os.getpid()}"
+        )
+        stats: pstats.Stats = pstats.Stats(profile)
+        stats.dump_stats(f"{path}.prof")
+        snapshot.dump(f"{path}.snapshot")
+        hot_functions: list[str] = cls.summarize_stats(stats, cls._n_top)
+        allocations: list[str] = cls.summarize_snapshot(snapshot, cls._n_top)
+        cumulative: io.StringIO = io.StringIO()
+        pstats.Stats(profile, stream=cumulative).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(cls._n_top)
+        with open(f"{path}.txt", "w") as summary:
+            summary.write(f"Profile of {name}: {elapsed * 1000:.3f} ms, peak traced memory {peak / 1024:.1f} KiB\n")
+            summary.write("\nHot functions:\n" + "\n".join(hot_functions) + "\n")
+            summary.write("\nTop allocations:\n" + "\n".join(allocations) + "\n")
+            summary.write("\nBy cumulative time:\n" + cumulative.getvalue())
+        Logger.log(
+            name=cls.__name__,
+            level=Logger.INFO,
+            message="Profiled %s in %.3f ms, peak traced memory %.1f KiB, wrote %s.*. Hot functions:\n%s",
+            args=(name, elapsed * 1000, peak / 1024, path, "\n".join(hot_functions[: cls._N_LOGGED])),
+            profile=path
+        )
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(f"Usage: python {os.path.basename(__file__)} <file.prof> [n_top]")
+        sys.exit(2)
+    n_top: int = int(sys.argv[2]) if len(sys.argv) > 2 else Profiler._DEFAULT_N_TOP
+    print("\n".join(Profiler.summarize_stats(pstats.Stats(sys.argv[1]), n_top)))
+
+
+if __name__ == "__main__":
+    main()
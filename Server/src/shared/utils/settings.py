@@ -0,0 +1,135 @@
+from dataclasses import Field, dataclass, field, fields
+import logging
+import os
+from typing import Any, Callable, ClassVar
+
+from shared.utils.util import Util
+
+
+def _to_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _setting(variable: str, convert: Callable[[str], Any] = str) -> Any:
+    """
+    :param variable: The environment variable the setting is read from.
+    :type variable: str
+    :param convert: Converts the value of the environment variable to the type of the setting.
+    :type convert: Callable[[str], Any]
+    """
+    return field(default=None, metadata={"variable": variable, "convert": convert})
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    The configuration of the server, read from the environment and secrets/.env once.
+
+    A setting is None if its environment variable is unset, empty or invalid, the component using it falls back to its
+    own default. An invalid value is reported as a warning when read and as an error by require, so a wrong variable
+    only breaks the components that need it. Call reload to read the environment again, e.g. after changing it in a
+    test.
+    """
+    log_level: str | None = _setting("LOG_LEVEL")
+    log_format: str | None = _setting("LOG_FORMAT")
+    tracing_enabled: bool | None = _setting("TRACING_ENABLED", _to_bool)
+    trace_file: str | None = _setting("TRACE_FILE")
+    metrics_dump_file: str | None = _setting("METRICS_DUMP_FILE")
+    profiling_enabled: bool | None = _setting("PROFILING_ENABLED", _to_bool)
+    profile_dir: str | None = _setting("PROFILE_DIR")
+    profile_top_n: int | None = _setting("PROFILE_TOP_N", int)
+    cot_index_state_file: str | None = _setting("COT_INDEX_STATE_FILE")
+    cot_sentiment_thresholds_file: str | None = _setting("COT_SENTIMENT_THRESHOLDS_FILE")
+    cot_snapshot_dir: str | None = _setting("COT_SNAPSHOT_DIR")
+    sqlite_database: str | None = _setting("SQLITE_DATABASE")
+    cot_daemon_socket: str | None = _setting("COT_DAEMON_SOCKET")
+    cot_api_host: str | None = _setting("COT_API_HOST")
+    cot_api_port: int | None = _setting("COT_API_PORT", int)
+    cot_release_poll_interval: float | None = _setting("COT_RELEASE_POLL_INTERVAL", float)
+    socrata_app_token: str | None = _setting("SOCRATA_APP_TOKEN")
+    socrata_base_url: str | None = _setting("SOCRATA_BASE_URL")
+    socrata_requests_per_second: float | None = _setting("SOCRATA_REQUESTS_PER_SECOND", float)
+    socrata_burst: int | None = _setting("SOCRATA_BURST", int)
+    socrata_max_concurrency: int | None = _setting("SOCRATA_MAX_CONCURRENCY", int)
+    mysql_host: str | None = _setting("MYSQL_HOST")
+    mysql_port: int | None = _setting("MYSQL_PORT", int)
+    mysql_user: str | None = _setting("MYSQL_USER")
+    mysql_password: str | None = _setting("MYSQL_PASSWORD")
+    mysql_database: str | None = _setting("MYSQL_DATABASE")
+    mysql_pool_min_size: int | None = _setting("MYSQL_POOL_MIN_SIZE", int)
+    mysql_pool_max_size: int | None = _setting("MYSQL_POOL_MAX_SIZE", int)
+    _errors: dict[str, str] = field(default_factory=dict, repr=False, compare=False)
+    _instance: ClassVar["Settings | None"] = None
+
+    @classmethod
+    def get_instance(cls) -> "Settings":
+        """
+        :return Settings: The settings, read on first use.
+        """
+        if cls._instance is None:
+            cls._instance = cls.from_env()
+        return cls._instance
+
+    @classmethod
+    def reload(cls) -> "Settings":
+        """
+        :return Settings: The settings, read again from the environment.
+        """
+        cls._instance = cls.from_env()
+        return cls._instance
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        :return Settings: The settings in the environment, secrets/.env doesn't override variables already set. A
+        value that can't be converted to the type of its setting is left out with a warning.
+        """
+        Util.load_env()
+        values: dict[str, Any] = {}
+        errors: dict[str, str] = {}
+        for setting in cls._settings():
+            variable: str = setting.metadata["variable"]
+            value: str | None = os.getenv(variable)
+            if value is None or value == "":
+                continue
+            try:
+                values[setting.name] = setting.metadata["convert"](value)
+            except ValueError as error:
+                errors[setting.name] = f"The environment variable {variable} is invalid: {error}"
+                # The logger is configured from the settings, so the warning goes through the standard logging module.
+                logging.getLogger(cls.__name__).warning(f"{errors[setting.name]}, it is ignored.")
+        return cls(**values, _errors=errors)
+
+    @classmethod
+    def _settings(cls) -> list[Field]:
+        return [setting for setting in fields(cls) if "variable" in setting.metadata]
+
+    def require(self, *names: str) -> list[Any]:
+        """
+        :param names: The names of the settings, e.g. mysql_host.
+        :type names: str
+        :return list[Any]: The values of the settings.
+        :raises ValueError: If a setting is not set or its value is invalid.
+        """
+        variables: dict[str, str] = {setting.name: setting.metadata["variable"] for setting in self._settings()}
+        values: list[Any] = []
+        for name in names:
+            value: Any = getattr(self, name)
+            if name in self._errors:
+                raise ValueError(self._errors[name])
+            if value is None:
+                raise ValueError(f"The environment variable {variables[name]} does not exist.")
+            values.append(value)
+        return values
+
+
+def main():
+    settings: Settings = Settings.get_instance()
+    for setting in settings._settings():
+        value: Any = getattr(settings, setting.name)
+        shown: Any = "***" if value is not None and ("password" in setting.name or "token" in setting.name) else value
+        print(f"{setting.metadata["variable"]}: {shown}")
+
+
+if __name__ == "__main__":
+    main()
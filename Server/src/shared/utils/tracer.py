@@ -0,0 +1,277 @@
+import atexit
+from contextvars import ContextVar, Token
+import functools
+import inspect
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from typing import Any, Callable, Final
+
+from shared.utils.settings import Settings
+from shared.utils.util import Util
+
+
+class Span:
+    """
+    A timed operation within a trace. Spans started while another span is current become its children, the current
+    span is held in a context variable so it follows awaits, tasks and threads started with asyncio.to_thread.
+    """
+    def __init__(self, name: str, parent: "Span | None", attributes: dict[str, Any]):
+        """
+        :param name: The name of the operation, e.g. MySQLRepository.fetch_cot_reports_by.
+        :type name: str
+        :param parent: The span this span was started in, None for the root span of a trace.
+        :type parent: Span
+        :param attributes: Details of the operation, e.g. the number of assets requested.
+        :type attributes: dict[str, Any]
+        """
+        self.name = name
+        self.trace_id: str = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id: str = uuid.uuid4().hex[:16]
+        self.parent_id: str | None = parent.span_id if parent else None
+        self.attributes = attributes
+        self.start_time: float = time.time()
+        self.duration: float | None = None
+        self.error: str | None = None
+        self._started: float = time.perf_counter()
+        self._token: Token | None = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def __enter__(self) -> "Span":
+        self._token = Tracer._current_span.set(self)
+        return self
+
+    def __exit__(self, exception_type: type | None, exception: BaseException | None, traceback: Any) -> None:
+        self.duration = time.perf_counter() - self._started
+        if exception is not None:
+            self.error = f"{exception_type.__name__}: {exception}"
+        Tracer._current_span.reset(self._token)
+        Tracer._export(self)
+
+    async def __aenter__(self) -> "Span":
+        return self.__enter__()
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self.__exit__(*exc_info)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start_time": round(self.start_time, 6),
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class _NoSpan:
+    """
+    Stands in for a span while tracing is disabled, it records nothing.
+    """
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def __aenter__(self) -> "_NoSpan":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+
+class Tracer:
+    """
+    Lightweight tracing of where the time of a request goes, e.g. MySQL lookups, Socrata calls and COT Index state file
+    I/O within a fetch of the latest report.
+
+    Finished spans are written as JSON lines to logs/traces.jsonl by a dedicated thread. Tracing is disabled unless the
+    TRACING_ENABLED environment variable is true or it is enabled with configure, a disabled span costs one check.
+
+    Usage:
+    async with Tracer.span("SocrataService.fetch_latest_report", n_assets=len(assets)):
+        ...
+
+    @Tracer.traced("COTReportPresenter.from_dicts")
+    async def from_dicts(...):
+        ...
+    """
+    _DEFAULT_TRACE_FILE: Final[str] = f"{Util.get_root_dir()}/logs/traces.jsonl"
+    _NO_SPAN: Final[_NoSpan] = _NoSpan()
+    _current_span: ContextVar[Span | None] = ContextVar("current_span", default=None)
+    _enabled: bool | None = None
+    _trace_file: str | None = None
+    _queue: queue.SimpleQueue | None = None
+    _writer: threading.Thread | None = None
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def configure(cls, enabled: bool | None = None, trace_file: str | None = None) -> None:
+        """
+        :param enabled: Specify whether spans are recorded, defaults to the TRACING_ENABLED environment variable.
+        :type enabled: bool
+        :param trace_file: The JSON lines file spans are written to, defaults to the TRACE_FILE environment variable or
+        logs/traces.jsonl.
+        :type trace_file: str
+        """
+        cls.shutdown()
+        settings: Settings = Settings.get_instance()
+        cls._enabled = enabled if enabled is not None else bool(settings.tracing_enabled)
+        cls._trace_file = trace_file or settings.trace_file or cls._DEFAULT_TRACE_FILE
+
+    @classmethod
+    def is_enabled(cls) -> bool:
+        if cls._enabled is None:
+            cls.configure()
+        return cls._enabled
+
+    @classmethod
+    def span(cls, name: str, **attributes: Any) -> Span | _NoSpan:
+        """
+        :param name: The name of the operation.
+        :type name: str
+        :param attributes: Details of the operation.
+        :type attributes: Any
+        :return Span | _NoSpan: A span to enter with with or async with, it is a child of the current span.
+        """
+        if not cls.is_enabled():
+            return cls._NO_SPAN
+        return Span(name, cls._current_span.get(), attributes)
+
+    @classmethod
+    def current_span(cls) -> Span | _NoSpan:
+        """
+        :return Span | _NoSpan: The innermost span entered in the current context, e.g. to add attributes to it.
+        """
+        return cls._current_span.get() or cls._NO_SPAN
+
+    @classmethod
+    def traced(cls, name: str | None = None) -> Callable[[Callable], Callable]:
+        """
+        Records each call of the decorated function in a span, sync and async functions are supported.
+
+        :param name: The name of the span, defaults to the qualified name of the function.
+        :type name: str
+        """
+        def decorator(function: Callable) -> Callable:
+            span_name: str = name or function.__qualname__
+            if inspect.iscoroutinefunction(function):
+                @functools.wraps(function)
+                async def traced_coroutine(*args: Any, **kwargs: Any) -> Any:
+                    if not cls.is_enabled():
+                        return await function(*args, **kwargs)
+                    with cls.span(span_name):
+                        return await function(*args, **kwargs)
+                return traced_coroutine
+
+            @functools.wraps(function)
+            def traced_function(*args: Any, **kwargs: Any) -> Any:
+                if not cls.is_enabled():
+                    return function(*args, **kwargs)
+                with cls.span(span_name):
+                    return function(*args, **kwargs)
+            return traced_function
+        return decorator
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """
+        Writes the finished spans and stops the thread writing them.
+        """
+        with cls._lock:
+            if cls._writer is not None:
+                cls._queue.put(None)
+                cls._writer.join()
+                cls._writer = None
+                cls._queue = None
+
+    @classmethod
+    def _export(cls, span: Span) -> None:
+        if cls._writer is None:
+            with cls._lock:
+                if cls._writer is None:
+                    cls._queue = queue.SimpleQueue()
+                    cls._writer = threading.Thread(
+                        target=cls._write, args=(cls._queue, cls._trace_file), name="tracer-writer", daemon=True
+                    )
+                    cls._writer.start()
+        cls._queue.put(span)
+
+    @staticmethod
+    def _write(spans: queue.SimpleQueue, trace_file: str) -> None:
+        os.makedirs(os.path.dirname(trace_file), exist_ok=True)
+        with open(trace_file, "a") as file:
+            while (span := spans.get()) is not None:
+                file.write(json.dumps(span.to_dict(), default=str) + "\n")
+                if spans.empty():
+                    file.flush()
+
+    @classmethod
+    def load_trace(cls, trace_id: str | None = None, trace_file: str | None = None) -> list[dict[str, Any]]:
+        """
+        :param trace_id: The ID of the trace, defaults to the trace with the slowest root span.
+        :type trace_id: str
+        :param trace_file: The JSON lines file of the spans, defaults to the configured one.
+        :type trace_file: str
+        :return list[dict[str, Any]]: The spans of the trace, in the order they started.
+        """
+        trace_file = trace_file or cls._trace_file or Settings.get_instance().trace_file or cls._DEFAULT_TRACE_FILE
+        with open(trace_file) as file:
+            spans: list[dict[str, Any]] = [json.loads(line) for line in file if line.strip()]
+        if trace_id is None:
+            roots: list[dict[str, Any]] = [span for span in spans if span["parent_id"] is None]
+            if not roots:
+                return []
+            trace_id = max(roots, key=lambda span: span["duration_ms"])["trace_id"]
+        return sorted((span for span in spans if span["trace_id"] == trace_id), key=lambda span: span["start_time"])
+
+    @staticmethod
+    def format_trace(spans: list[dict[str, Any]]) -> str:
+        """
+        :param spans: The spans of a trace, see load_trace.
+        :type spans: list[dict[str, Any]]
+        :return str: The spans as a tree with the duration of each span and its share of the root span.
+        """
+        children: dict[str | None, list[dict[str, Any]]] = {}
+        span_ids: set[str] = {span["span_id"] for span in spans}
+        for span in spans:
+            parent_id: str | None = span["parent_id"] if span["parent_id"] in span_ids else None
+            children.setdefault(parent_id, []).append(span)
+        lines: list[str] = []
+
+        def add(span: dict[str, Any], depth: int, total: float) -> None:
+            share: float = span["duration_ms"] / total * 100 if total else 100.0
+            status: str = f" [{span["error"]}]" if span["error"] else ""
+            lines.append(f"{"  " * depth}{span["name"]}: {span["duration_ms"]:.3f} ms ({share:.1f}%){status}")
+            for child in children.get(span["span_id"], []):
+                add(child, depth + 1, total)
+
+        for root in children.get(None, []):
+            add(root, 0, root["duration_ms"])
+        return "\n".join(lines)
+
+
+atexit.register(Tracer.shutdown)
+
+
+def main():
+    trace_id: str | None = sys.argv[1] if len(sys.argv) > 1 else None
+    print(Tracer.format_trace(Tracer.load_trace(trace_id)))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,5 @@
+import functools
 import os
-from typing import Any
 
 from dotenv import load_dotenv
 
@@ -8,10 +8,13 @@ class Util:
     """
     Utility class for server.
     """
+    _is_env_loaded: bool = False
+
     @staticmethod
+    @functools.cache
     def get_root_dir() -> str:
         """
-        :return str: Returns the root directory using the src folder as the target folder.
+        :return str: Returns the root directory using the src folder as the target folder. It is looked up once.
         """
         current_dir: str = os.path.dirname(os.path.abspath(__file__))
         while current_dir != os.path.dirname(current_dir):
@@ -20,14 +23,11 @@ class Util:
             current_dir = os.path.dirname(current_dir)
         raise FileNotFoundError("The 'src' folder was not found in the directory hierarchy.")
 
-    @staticmethod
-    def get_env_variables(variables: list[str]) -> list[Any]:
-        env_file: str = os.path.join(Util.get_root_dir(), "secrets/.env")
-        load_dotenv(env_file)
-        values: list[Any] = []
-        for variable in variables:
-            value: Any = os.getenv(variable)
-            if value == None:
-                raise ValueError(f"The environment variable {variable} does not exist.")
-            values.append(value)
-        return values
\ No newline at end of file
+    @classmethod
+    def load_env(cls) -> None:
+        """
+        Loads secrets/.env into the environment once, variables already set are kept.
+        """
+        if not cls._is_env_loaded:
+            load_dotenv(os.path.join(Util.get_root_dir(), "secrets/.env"))
+            cls._is_env_loaded = True
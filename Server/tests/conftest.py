@@ -0,0 +1,16 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+import pytest
+from shared.utils.logger import Logger
+
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory: pytest.TempPathFactory) -> None:
+    """
+    Keeps the logs of the tests out of logs/logs.log.
+    """
+    Logger._LOG_DIR = str(tmp_path_factory.mktemp("logs"))
+    Logger.configure()
@@ -0,0 +1,45 @@
+import asyncio
+import json
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+
+
+class InMemoryCOTRepository(COTRepository):
+    """
+    Keeps the stored rows in a dict. Reads can be held back with the gate, and calls counts the reads.
+    """
+    def __init__(self):
+        self.rows: dict[tuple[str, str], tuple] = {}
+        self.calls: int = 0
+        self.gate: asyncio.Event | None = None
+
+    async def build_cot_report_table(self, cot_reports: list[COTReport]) -> None:
+        await self.insert_cot_reports(cot_reports)
+
+    async def insert_cot_reports(self, cot_reports: list[COTReport]) -> None:
+        for report in cot_reports:
+            self.rows[(report.asset_code, report.reported_date)] = (
+                len(self.rows) + 1, report.asset_code, report.reported_date, json.dumps(report.to_dict())
+            )
+
+    async def fetch_cot_reports_by(self, asset_codes=None, released_dates=None) -> list[tuple]:
+        results: list[tuple] = [
+            row for (code, date), row in self.rows.items()
+            if (not asset_codes or code in asset_codes) and (not released_dates or date in released_dates)
+        ]
+        return await self._answer(results)
+
+    async def fetch_cot_reports_between(self, asset_codes, start_date, end_date) -> list[tuple]:
+        results: list[tuple] = sorted(
+            (row for (code, date), row in self.rows.items() if code in asset_codes and start_date <= date <= end_date),
+            key=lambda row: row[2]
+        )
+        return await self._answer(results)
+
+    async def _answer(self, results: list[tuple]) -> list[tuple]:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if not results:
+            raise LookupError("No report was found.")
+        return results
@@ -0,0 +1,27 @@
+from features.sentiment.cot.core.interfaces.cot_service import COTService
+from features.sentiment.cot.core.models.cot_report import COTReport
+from shared.models.asset import Asset
+
+
+class LatestReleaseService(COTService):
+    """
+    Serves the given reports of the release date as the latest release, calls counts the fetches.
+    """
+    def __init__(self, cot_reports: list[COTReport], release_date: str):
+        self.cot_reports = cot_reports
+        self.release_date = release_date
+        self.calls: int = 0
+
+    async def fetch_latest_report(self, assets: list[Asset]) -> list[COTReport]:
+        self.calls += 1
+        asset_codes: set[str] = {asset.code for asset in assets}
+        return [
+            report for report in self.cot_reports
+            if report.reported_date == self.release_date and report.asset_code in asset_codes
+        ]
+
+    async def fetch_historical_report(self, assets: list[Asset], start_date: str, n_weeks: int) -> list[COTReport]:
+        raise NotImplementedError
+
+    def calculate_last_report_release_date(self) -> str:
+        return self.release_date
@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from in_memory_cot_repository import InMemoryCOTRepository
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=2, n_weeks=10)
+
+
+def test_range_is_served_from_the_cache(data):
+    async def run() -> None:
+        repository: InMemoryCOTRepository = InMemoryCOTRepository()
+        await repository.insert_cot_reports(data.to_reports())
+        cache: CachingCOTRepository = CachingCOTRepository(repository)
+        codes: list[str] = [asset.code for asset in data.assets]
+        expected: list[tuple] = await cache.fetch_cot_reports_between(codes, data.dates[0], data.dates[-1])
+        assert await cache.fetch_cot_reports_between(codes, data.dates[0], data.dates[-1]) == expected
+        narrower: list[tuple] = await cache.fetch_cot_reports_between(codes[:1], data.dates[2], data.dates[5])
+        assert repository.calls == 1
+        assert narrower == [row for row in expected if row[1] == codes[0] and data.dates[2] <= row[2] <= data.dates[5]]
+    asyncio.run(run())
+
+
+def test_write_invalidates_the_range_of_its_asset(data):
+    async def run() -> None:
+        repository: InMemoryCOTRepository = InMemoryCOTRepository()
+        reports: list[COTReport] = data.to_reports()
+        await repository.insert_cot_reports(reports[:-2])
+        cache: CachingCOTRepository = CachingCOTRepository(repository)
+        codes: list[str] = [asset.code for asset in data.assets]
+        assert len(await cache.fetch_cot_reports_between(codes, data.dates[0], data.dates[-1])) == len(reports) - 2
+        await cache.insert_cot_reports(reports[-2:])
+        assert len(await cache.fetch_cot_reports_between(codes, data.dates[0], data.dates[-1])) == len(reports)
+        assert repository.calls == 2
+    asyncio.run(run())
+
+
+def test_read_in_flight_during_a_write_is_not_cached(data):
+    async def run() -> None:
+        repository: InMemoryCOTRepository = InMemoryCOTRepository()
+        reports: list[COTReport] = data.to_reports()
+        await repository.insert_cot_reports(reports)
+        cache: CachingCOTRepository = CachingCOTRepository(repository)
+        repository.gate = asyncio.Event()
+        code, date = reports[-1].asset_code, reports[-1].reported_date
+        read: asyncio.Task = asyncio.create_task(cache.fetch_cot_reports_by([code], [date]))
+        await asyncio.sleep(0)
+        await cache.insert_cot_reports([reports[-1]])
+        repository.gate.set()
+        await read
+        await cache.fetch_cot_reports_by([code], [date])
+        assert repository.calls == 2
+    asyncio.run(run())
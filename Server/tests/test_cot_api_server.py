@@ -0,0 +1,139 @@
+import asyncio
+import gzip
+import json
+from typing import Awaitable, Callable
+import aiohttp
+import pytest
+from features.sentiment.cot.connections.api.server.cot_api_server import COTAPIServer
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from shared.connections.database.caching_cot_repository import CachingCOTRepository
+from in_memory_cot_repository import InMemoryCOTRepository
+from latest_release_service import LatestReleaseService
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=3, n_weeks=4)
+
+
+def serve(
+        data: SyntheticCOTData,
+        check: Callable[[COTAPIServer, aiohttp.ClientSession], Awaitable[None]],
+        cot_reports: list[COTReport] | None = None
+    ) -> None:
+    async def run() -> None:
+        nonlocal cot_reports
+        cot_reports = cot_reports or data.to_reports()
+        repository: CachingCOTRepository = CachingCOTRepository(InMemoryCOTRepository())
+        await repository.insert_cot_reports([report for report in cot_reports if report.reported_date < data.dates[-1]])
+        server: COTAPIServer = COTAPIServer(
+            LatestReleaseService(cot_reports, data.dates[-1]), repository, release_poll_interval=60
+        )
+        await server.start("127.0.0.1", 0)
+        try:
+            async with aiohttp.ClientSession(
+                server.url, headers={"Accept-Encoding": "identity"}, auto_decompress=False
+            ) as session:
+                await check(server, session)
+        finally:
+            await server.stop()
+
+    asyncio.run(run())
+
+
+def test_unchanged_response_is_answered_with_not_modified(data):
+    async def check(_: COTAPIServer, session: aiohttp.ClientSession) -> None:
+        async with session.get("/cot/latest") as response:
+            assert response.status == 200
+            etag: str = response.headers["ETag"]
+            assert len(json.loads(await response.read())) == 3
+        async with session.get("/cot/latest", headers={"If-None-Match": etag}) as response:
+            assert response.status == 304
+            assert response.headers["ETag"] == etag
+        async with session.get("/cot/latest", headers={"If-None-Match": '"other"'}) as response:
+            assert response.status == 200
+
+    serve(data, check)
+
+
+def test_response_is_gzipped_when_accepted(data):
+    async def check(_: COTAPIServer, session: aiohttp.ClientSession) -> None:
+        async with session.get("/cot/latest") as response:
+            body: bytes = await response.read()
+        async with session.get("/cot/latest", headers={"Accept-Encoding": "gzip, deflate"}) as response:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert response.headers["Vary"] == "Accept-Encoding"
+            assert gzip.decompress(await response.read()) == body
+            gzip_etag: str = response.headers["ETag"]
+        async with session.get("/cot/latest", headers={"Accept-Encoding": "gzip;q=0"}) as response:
+            assert "Content-Encoding" not in response.headers
+        async with session.get(
+            "/cot/latest", headers={"Accept-Encoding": "gzip", "If-None-Match": gzip_etag}
+        ) as response:
+            assert response.status == 304
+
+    serve(data, check)
+
+
+@pytest.mark.parametrize("path", [
+    "/cot/latest?assets=EUR,XXX",
+    "/cot/latest?view=compact",
+    "/cot/history?start=2024-01-02",
+    "/cot/history?start=2024-02-01&end=2024-01-02",
+    "/cot/history?start=yesterday&end=2024-01-02",
+    "/cot/screen?min_cot_index=101",
+    "/cot/screen?max_cot_index=high",
+    "/cot/screen?sentiment=sideways",
+])
+def test_invalid_request_is_answered_with_bad_request(data, path):
+    async def check(_: COTAPIServer, session: aiohttp.ClientSession) -> None:
+        async with session.get(path) as response:
+            assert response.status == 400
+            assert (await response.json())["error"] is True
+
+    serve(data, check)
+
+
+def test_history_includes_reports_written_after_it_was_served(data):
+    async def check(server: COTAPIServer, session: aiohttp.ClientSession) -> None:
+        path: str = f"/cot/history?start={data.dates[0]}&end={data.dates[-1]}"
+        async with session.get(path) as response:
+            assert len(json.loads(await response.read())) == 9
+        await server._cot_repository.insert_cot_reports(
+            [report for report in data.to_reports() if report.reported_date == data.dates[-1]]
+        )
+        async with session.get(path) as response:
+            assert len(json.loads(await response.read())) == 12
+
+    serve(data, check)
+
+
+def test_restatement_drops_the_cached_responses(data):
+    async def check(server: COTAPIServer, session: aiohttp.ClientSession) -> None:
+        codes: str = ",".join(asset.code for asset in data.assets)
+        async with session.get(f"/cot/latest?assets={codes}") as response:
+            assert response.status == 200
+        assert len(server.response_cache) == 1
+        server.on_restatement(data.to_reports()[:1])
+        assert len(server.response_cache) == 0
+
+    serve(data, check)
+
+
+def test_screen_leaves_out_unknown_cot_indexes_when_bounded(data):
+    cot_reports: list[COTReport] = data.to_reports()
+    latest_reports: list[COTReport] = [report for report in cot_reports if report.reported_date == data.dates[-1]]
+    latest_reports[0].commercials.cot_index = 5
+    latest_reports[1].commercials.cot_index = 80
+    codes: str = ",".join(asset.code for asset in data.assets)
+
+    async def check(_: COTAPIServer, session: aiohttp.ClientSession) -> None:
+        async with session.get(f"/cot/screen?assets={codes}&max_cot_index=10") as response:
+            screened: list[dict] = json.loads(await response.read())
+        assert [report["asset_code"] for report in screened] == [latest_reports[0].asset_code]
+        async with session.get(f"/cot/screen?assets={codes}") as response:
+            screened = json.loads(await response.read())
+        assert [report["commercials"]["cot_index"] for report in screened] == [80, 5, None]
+
+    serve(data, check, cot_reports)
@@ -0,0 +1,68 @@
+import asyncio
+import os
+from typing import Any
+import pytest
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.tools.cot_backfill_pipeline import COTBackfillPipeline
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
+from features.sentiment.cot.tools.percentile_rank_index import PercentileRankIndex
+from in_memory_cot_repository import InMemoryCOTRepository
+
+
+class PagedClient:
+    """
+    Answers each request with the next page, like SocrataClient.fetch_latest_report.
+    """
+    def __init__(self, pages: list[list[dict[str, Any]]]):
+        self.pages = pages
+
+    async def fetch_latest_report(self, params: dict[str, Any]) -> list[dict[str, Any]]:
+        page: int = params["$offset"] // params["$limit"]
+        return self.pages[page] if page < len(self.pages) else []
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=3, n_weeks=4)
+
+
+def build_pipeline(tmp_path) -> tuple[COTBackfillPipeline, COTIndexState, PercentileRankIndex]:
+    cot_index_state: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=2)
+    cot_index_state.advance("OLD", "2000-01-04", 10)
+    percentile_rank_index: PercentileRankIndex = PercentileRankIndex()
+    pipeline: COTBackfillPipeline = COTBackfillPipeline(
+        InMemoryCOTRepository(), cot_index_state=cot_index_state, percentile_rank_index=percentile_rank_index
+    )
+    return pipeline, cot_index_state, percentile_rank_index
+
+
+def test_unsupported_file_is_rejected_before_the_backfill_starts(tmp_path):
+    pipeline, cot_index_state, _ = build_pipeline(tmp_path)
+    with pytest.raises(ValueError):
+        asyncio.run(pipeline.run_from_files(["reports.xlsx"]))
+    assert cot_index_state.get_window("OLD") is not None
+
+
+def test_out_of_order_data_leaves_the_shared_state_intact(data, tmp_path):
+    records: list[dict[str, Any]] = data.to_records()
+    pages: list[list[dict[str, Any]]] = [records[6:], records[:6]]
+    pipeline, cot_index_state, percentile_rank_index = build_pipeline(tmp_path)
+
+    with pytest.raises(ValueError):
+        asyncio.run(pipeline.run_from_socrata(PagedClient(pages), "true", page_size=6))
+
+    assert cot_index_state.get_window("OLD") is not None
+    assert not any(percentile_rank_index.has_asset(asset.code) for asset in data.assets)
+    assert not os.path.exists(tmp_path / "state.json")
+
+
+def test_backfilled_history_replaces_the_shared_state(data, tmp_path):
+    records: list[dict[str, Any]] = data.to_records()
+    pipeline, cot_index_state, percentile_rank_index = build_pipeline(tmp_path)
+
+    asyncio.run(pipeline.run_from_socrata(PagedClient([records[:6], records[6:]]), "true", page_size=6))
+
+    assert cot_index_state.get_window("OLD") is None
+    assert all(cot_index_state.get_window(asset.code).latest_date == data.dates[-1] for asset in data.assets)
+    assert all(percentile_rank_index.has_asset(asset.code) for asset in data.assets)
+    assert os.path.exists(tmp_path / "state.json")
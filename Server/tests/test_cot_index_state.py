@@ -0,0 +1,81 @@
+import asyncio
+from datetime import date, timedelta
+import json
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState, RollingWindow
+from in_memory_cot_repository import InMemoryCOTRepository
+
+
+def week(n: int) -> str:
+    return str(date(2024, 1, 2) + timedelta(weeks=n))
+
+
+def test_cot_index_is_none_until_the_window_covers_n_weeks(tmp_path):
+    state: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=3)
+    assert state.advance("EUR", week(0), 10) is None
+    assert state.advance("EUR", week(1), 20) is None
+    assert state.advance("EUR", week(2), 30) == 100
+    assert state.advance("EUR", week(3), 20) == 0
+
+
+def test_missing_week_leaves_a_hole_in_the_window(tmp_path):
+    state: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=3)
+    state.advance("EUR", week(0), 100)
+    state.advance("EUR", week(1), 10)
+    assert state.advance("EUR", week(3), 20) == 100
+    assert state.get_window("EUR").historical_net == [20, 10]
+
+
+def test_report_of_the_newest_week_replaces_it(tmp_path):
+    state: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=3)
+    for n, net in enumerate([10, 20, 30]):
+        state.advance("EUR", week(n), net)
+    assert state.advance("EUR", week(2), 0) == 0
+    assert state.get_window("EUR").historical_net == [0, 20, 10]
+
+
+def test_report_older_than_the_window_is_not_applied(tmp_path):
+    state: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=3)
+    for n, net in enumerate([10, 20, 30]):
+        state.advance("EUR", week(n), net)
+    assert state.advance("EUR", week(1), 50) is None
+    assert state.get_window("EUR").historical_net == [30, 20, 10]
+
+
+def test_replace_latest_updates_the_extremes():
+    window: RollingWindow = RollingWindow(3, week(2), [(0, 10), (1, 20), (2, 30)])
+    window.replace_latest(5)
+    assert (window.minimum, window.maximum) == (5, 20)
+    window.replace_latest(40)
+    assert (window.minimum, window.maximum) == (10, 40)
+    assert window.historical_net == [40, 20, 10]
+
+
+def test_recover_rebuilds_the_windows_from_the_repository(tmp_path):
+    data: SyntheticCOTData = SyntheticCOTData(n_assets=2, n_weeks=10)
+    reports: list[COTReport] = data.to_reports()
+    repository: InMemoryCOTRepository = InMemoryCOTRepository()
+    asyncio.run(repository.insert_cot_reports(reports))
+    codes: list[str] = [asset.code for asset in data.assets]
+
+    recovered: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=4)
+    asyncio.run(recovered.recover(repository, codes + ["NEW"], data.dates[-1]))
+    replayed: COTIndexState = COTIndexState(str(tmp_path / "replayed.json"), n_weeks=4)
+    for report in sorted(reports, key=lambda report: report.reported_date):
+        replayed.advance(report.asset_code, report.reported_date, report.commercials.do_net())
+
+    for code in codes:
+        assert recovered.get_window(code).to_dict() == replayed.get_window(code).to_dict()
+    assert recovered.get_window("NEW").historical_net == []
+    loaded: COTIndexState = COTIndexState(str(tmp_path / "state.json"), n_weeks=4)
+    assert loaded.load()
+    assert loaded.get_window(codes[0]).to_dict() == recovered.get_window(codes[0]).to_dict()
+
+
+def test_unknown_cot_index_is_stored_as_null():
+    commercials: CommercialTraders = CommercialTraders(10, 0, 5, 0, historical_net=None, cot_index=None)
+    assert json.loads(json.dumps(commercials.to_dict(verbose=True, enhanced=True)))["cot_index"] is None
+    commercials.cot_index = 0
+    assert commercials.to_dict(verbose=True, enhanced=True)["cot_index"] == 0
@@ -0,0 +1,36 @@
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.commercial_traders import CommercialTraders
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_report_builder import COTReportBuilder
+from features.sentiment.cot.tools.week_calendar import WeekCalendar
+
+
+def test_cot_index_spans_156_calendar_weeks_despite_missing_weeks():
+    data: SyntheticCOTData = SyntheticCOTData(n_assets=1, n_weeks=200)
+    missing_dates: set[str] = {data.dates[50], data.dates[120], data.dates[121], data.dates[190]}
+    cot_reports: list[COTReport] = [report for report in data.to_reports() if report.reported_date not in missing_dates]
+
+    updated: list[COTReport] = COTReportBuilder().update_cot_index_group(cot_reports)
+
+    first_week: int = WeekCalendar.to_week(data.dates[0])
+    for report in updated:
+        week: int = WeekCalendar.to_week(report.reported_date)
+        if week - 155 < first_week:
+            assert report.commercials.cot_index is None
+            continue
+        window: list[int] = [
+            other.commercials.do_net() for other in updated
+            if week - 155 <= WeekCalendar.to_week(other.reported_date) <= week
+        ]
+        assert report.commercials.get_cot_index() == CommercialTraders.calculate_cot_index(
+            report.commercials.do_net(), min(window), max(window)
+        )
+
+
+def test_reports_carry_their_cot_index_without_a_historical_net():
+    data: SyntheticCOTData = SyntheticCOTData(n_assets=1, n_weeks=160)
+
+    updated: list[COTReport] = COTReportBuilder().update_cot_index_group(data.to_reports())
+
+    assert all(report.commercials.cot_index is not None for report in updated[:5])
+    assert all(report.commercials.historical_net is None for report in updated)
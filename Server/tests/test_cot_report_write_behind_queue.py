@@ -0,0 +1,150 @@
+import asyncio
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.interfaces.cot_repository import COTRepository
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_report_write_behind_queue import COTReportWriteBehindQueue
+
+
+class RecordingCOTRepository(COTRepository):
+    def __init__(self, failures: int = 0):
+        self.batches: list[list[COTReport]] = []
+        self.failures = failures
+        self.gate: asyncio.Event | None = None
+
+    async def build_cot_report_table(self, cot_reports: list[COTReport]) -> None:
+        await self.insert_cot_reports(cot_reports)
+
+    async def insert_cot_reports(self, cot_reports: list[COTReport]) -> None:
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.failures > 0:
+            self.failures -= 1
+            raise ConnectionError("The database is unavailable.")
+        self.batches.append(list(cot_reports))
+
+    async def fetch_cot_reports_by(self, asset_codes=None, released_dates=None) -> list[tuple]:
+        raise LookupError("No report was found.")
+
+    async def fetch_cot_reports_between(self, asset_codes, start_date, end_date) -> list[tuple]:
+        raise LookupError("No report was found.")
+
+
+def reports(n_weeks: int) -> list[COTReport]:
+    return SyntheticCOTData(n_assets=1, n_weeks=n_weeks).to_reports()
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository()
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(repository, batch_size=4, flush_interval=60)
+        await queue.put(reports(8))
+        await asyncio.wait_for(queue.flush(), timeout=1)
+        assert [len(batch) for batch in repository.batches] == [4, 4]
+        await queue.close()
+    asyncio.run(run())
+
+
+def test_partial_batch_is_written_after_the_interval():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository()
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(repository, batch_size=100, flush_interval=0.05)
+        await queue.put(reports(3))
+        await asyncio.sleep(0.01)
+        assert repository.batches == []
+        await asyncio.wait_for(queue.flush(), timeout=1)
+        assert [len(batch) for batch in repository.batches] == [3]
+        await queue.close()
+    asyncio.run(run())
+
+
+def test_put_waits_while_the_queue_is_full():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository()
+        repository.gate = asyncio.Event()
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(
+            repository, batch_size=1, flush_interval=60, max_pending=2
+        )
+        put: asyncio.Task = asyncio.create_task(queue.put(reports(5)))
+        await asyncio.sleep(0.05)
+        assert not put.done() and queue.pending == 2
+        repository.gate.set()
+        await put
+        await queue.close()
+        assert queue.persisted == 5
+    asyncio.run(run())
+
+
+def test_close_writes_the_queued_reports():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository()
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(repository, batch_size=100, flush_interval=60)
+        await queue.put(reports(5))
+        await queue.close()
+        assert sum(len(batch) for batch in repository.batches) == 5
+        assert queue.persisted == 5 and queue.pending == 0
+    asyncio.run(run())
+
+
+def test_failed_write_is_retried():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository(failures=2)
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(
+            repository, batch_size=3, flush_interval=60, max_retries=2, retry_delay=0.001
+        )
+        await queue.put(reports(3))
+        await queue.flush()
+        assert [len(batch) for batch in repository.batches] == [3]
+        assert queue.failed == 0
+        await queue.close()
+    asyncio.run(run())
+
+
+def test_reports_of_a_failed_batch_are_written_with_the_next_batch():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository(failures=2)
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(
+            repository, batch_size=2, flush_interval=60, max_retries=1, retry_delay=0.001
+        )
+        first, second = reports(4)[:2], reports(4)[2:]
+        await queue.put(first)
+        await queue.flush()
+        assert repository.batches == [] and queue.unwritten == 2
+        await queue.put(second)
+        await queue.flush()
+        assert repository.batches == [first + second]
+        assert queue.unwritten == 0 and queue.failed == 0
+        await queue.close()
+    asyncio.run(run())
+
+
+def test_reports_that_cannot_be_written_by_close_are_counted():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository(failures=100)
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(
+            repository, batch_size=100, flush_interval=60, max_retries=1, retry_delay=0.001
+        )
+        await queue.put(reports(3))
+        await queue.close()
+        assert queue.failed == 3 and queue.persisted == 0
+    asyncio.run(run())
+
+
+def test_callback_is_called_once_the_reports_are_written():
+    async def run() -> None:
+        repository: RecordingCOTRepository = RecordingCOTRepository(failures=1)
+        repository.gate = asyncio.Event()
+        queue: COTReportWriteBehindQueue = COTReportWriteBehindQueue(
+            repository, batch_size=2, flush_interval=60, retry_delay=0
+        )
+        written: list[list[COTReport]] = []
+        first, second = reports(3), reports(1)
+        await queue.put(first, on_written=written.append)
+        await queue.put(second, on_written=written.append)
+        await asyncio.sleep(0.01)
+        assert written == []
+        repository.gate.set()
+        await asyncio.wait_for(queue.flush(), timeout=1)
+        assert written == [first, second]
+        assert repository.failures == 0
+        await queue.close()
+    asyncio.run(run())
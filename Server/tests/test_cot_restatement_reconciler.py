@@ -0,0 +1,129 @@
+import asyncio
+import json
+import pytest
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_index_state import COTIndexState
+from features.sentiment.cot.tools.cot_release_broadcaster import COTReleaseBroadcaster, COTSubscription
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.cot_restatement_reconciler import COTRestatementReconciler
+from features.sentiment.cot.tools.percentile_rank_index import PercentileRankIndex
+from in_memory_cot_repository import InMemoryCOTRepository
+
+
+def derive(cot_reports: list[COTReport], state_file: str) -> list[COTReport]:
+    """
+    Computes the COT Index and percentile ranks of the whole history, as the backfill does.
+    """
+    cot_index_state: COTIndexState = COTIndexState(state_file)
+    cot_reports = sorted(cot_reports, key=lambda report: report.reported_date)
+    for report in cot_reports:
+        report.commercials.cot_index = cot_index_state.advance(
+            report.asset_code, report.reported_date, report.commercials.do_net()
+        )
+    PercentileRankIndex().rank(cot_reports)
+    return cot_reports
+
+
+def derived_values(rows: list[tuple], state_file: str) -> dict[tuple[str, str], tuple]:
+    return {
+        (report.asset_code, report.reported_date): (report.commercials.cot_index, report.percentile_ranks)
+        for report in derive(COTReportPresenter.from_list(rows), state_file)
+    }
+
+
+def restate(row: tuple) -> COTReport:
+    """
+    :return COTReport: The report of the row as published again with more commercial longs, without derived values.
+    """
+    report_data: dict = json.loads(row[3])
+    report_data["commercials"]["long"] += 1_000_000
+    report: COTReport = COTReportPresenter.from_list([(row[0], row[1], row[2], json.dumps(report_data))])[0]
+    report.commercials.cot_index = None
+    report.percentile_ranks = None
+    return report
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=2, n_weeks=180)
+
+
+@pytest.fixture
+def repository(data, tmp_path) -> InMemoryCOTRepository:
+    repository: InMemoryCOTRepository = InMemoryCOTRepository()
+    asyncio.run(repository.insert_cot_reports(derive(data.to_reports(), str(tmp_path / "backfill.json"))))
+    return repository
+
+
+def test_only_changed_reports_are_written_with_their_dependants(data, repository, tmp_path):
+    code: str = data.assets[0].code
+    published: list[COTReport] = COTReportPresenter.from_list(
+        [repository.rows[(code, reported_date)] for reported_date in data.dates[20: 40]]
+    )
+    published[10] = restate(repository.rows[(code, data.dates[30])])
+    reconciler: COTRestatementReconciler = COTRestatementReconciler(
+        repository, COTIndexState(str(tmp_path / "state.json"))
+    )
+    written: list[COTReport] = asyncio.run(reconciler.reconcile(published))
+
+    assert (written[0].asset_code, written[0].reported_date) == (code, data.dates[30])
+    assert all(report.asset_code == code and report.reported_date > data.dates[30] for report in written[1:])
+    assert asyncio.run(reconciler.reconcile(published)) == []
+
+
+def test_recomputed_values_match_a_full_recompute(data, repository, tmp_path):
+    code: str = data.assets[0].code
+    reconciler: COTRestatementReconciler = COTRestatementReconciler(
+        repository, COTIndexState(str(tmp_path / "state.json"))
+    )
+    asyncio.run(reconciler.reconcile([restate(repository.rows[(code, data.dates[30])])]))
+
+    rows: list[tuple] = list(repository.rows.values())
+    expected: dict[tuple[str, str], tuple] = derived_values(rows, str(tmp_path / "expected.json"))
+    stored: dict[tuple[str, str], tuple] = {
+        (report.asset_code, report.reported_date): (report.commercials.cot_index, report.percentile_ranks)
+        for report in COTReportPresenter.from_list(rows)
+    }
+    assert stored == expected
+    assert stored[(code, data.dates[-1])][0] is not None
+
+
+def test_written_reports_keep_their_percentile_ranks(data, repository, tmp_path):
+    code: str = data.assets[0].code
+    percentile_rank_index: PercentileRankIndex = PercentileRankIndex()
+    percentile_rank_index.add(COTReportPresenter.from_list([repository.rows[(code, data.dates[-1])]])[0])
+    notified: list[list[COTReport]] = []
+    reconciler: COTRestatementReconciler = COTRestatementReconciler(
+        repository,
+        COTIndexState(str(tmp_path / "state.json")),
+        percentile_rank_index=percentile_rank_index,
+        listeners=[notified.append]
+    )
+    written: list[COTReport] = asyncio.run(reconciler.reconcile([restate(repository.rows[(code, data.dates[30])])]))
+
+    assert written and all(report.percentile_ranks is not None for report in written)
+    assert all(
+        "percentile_ranks" in json.loads(repository.rows[(report.asset_code, report.reported_date)][3])
+        for report in written
+    )
+    assert notified == [written]
+    assert not percentile_rank_index.has_asset(code)
+
+
+def test_restatements_of_the_latest_release_are_published_again(data, repository):
+    broadcaster: COTReleaseBroadcaster = COTReleaseBroadcaster()
+    latest: list[COTReport] = COTReportPresenter.from_list(
+        [repository.rows[(asset.code, data.dates[-1])] for asset in data.assets]
+    )
+    broadcaster.publish(latest)
+    subscription: COTSubscription = broadcaster.subscribe()
+    older: COTReport = restate(repository.rows[(data.assets[0].code, data.dates[-2])])
+    restated: COTReport = restate(repository.rows[(data.assets[0].code, data.dates[-1])])
+
+    assert broadcaster.publish([restated]) == 0
+    assert broadcaster.publish_restatements([older, restated]) == 1
+    asyncio.run(subscription.get())
+    message: dict = json.loads(asyncio.run(subscription.get()))
+    assert message["restated"] is True
+    assert message["reports"] == [restated.to_dict(verbose=True, enhanced=True)]
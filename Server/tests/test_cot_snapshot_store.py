@@ -0,0 +1,61 @@
+import asyncio
+import os
+import pytest
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_snapshot_store import COTSnapshotStore
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from latest_release_service import LatestReleaseService
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=3, n_weeks=2)
+
+
+def test_complete_snapshot_is_written_and_loaded_by_another_store(data, tmp_path):
+    service: LatestReleaseService = LatestReleaseService(data.to_reports(), data.dates[-1])
+    store: COTSnapshotStore = COTSnapshotStore(service, str(tmp_path), data.assets)
+    asyncio.run(store.get_latest())
+    asyncio.run(store.get_latest())
+    assert service.calls == 1
+    assert os.path.exists(tmp_path / f"{data.dates[-1]}.json")
+
+    asyncio.run(COTSnapshotStore(service, str(tmp_path), data.assets).get_latest())
+    assert service.calls == 1
+
+
+def test_partial_snapshot_is_kept_in_memory_until_it_expires(data, tmp_path):
+    cot_reports: list[COTReport] = [report for report in data.to_reports() if report.asset_code != data.assets[0].code]
+    service: LatestReleaseService = LatestReleaseService(cot_reports, data.dates[-1])
+    store: COTSnapshotStore = COTSnapshotStore(service, str(tmp_path), data.assets, partial_snapshot_ttl=60)
+    assert not store.is_complete(asyncio.run(store.get_latest()))
+    asyncio.run(store.get_latest())
+    assert service.calls == 1
+    assert not os.path.exists(tmp_path / f"{data.dates[-1]}.json")
+
+    expired: COTSnapshotStore = COTSnapshotStore(service, str(tmp_path), data.assets, partial_snapshot_ttl=0)
+    asyncio.run(expired.get_latest())
+    asyncio.run(expired.get_latest())
+    assert service.calls == 3
+
+
+def test_snapshot_is_built_again_once_the_thresholds_change(data, tmp_path, monkeypatch):
+    service: LatestReleaseService = LatestReleaseService(data.to_reports(), data.dates[-1])
+    store: COTSnapshotStore = COTSnapshotStore(service, str(tmp_path), data.assets)
+    asyncio.run(store.get_latest())
+    monkeypatch.setattr(SentimentThresholds, "_configured", SentimentThresholds(50, by_asset_class={}, by_asset={}))
+    asyncio.run(store.get_latest())
+    assert service.calls == 2
+    asyncio.run(COTSnapshotStore(service, str(tmp_path), data.assets).get_latest())
+    assert service.calls == 2
+
+
+def test_invalidated_release_is_built_again(data, tmp_path):
+    service: LatestReleaseService = LatestReleaseService(data.to_reports(), data.dates[-1])
+    store: COTSnapshotStore = COTSnapshotStore(service, str(tmp_path), data.assets)
+    asyncio.run(store.get_latest())
+    store.invalidate([data.dates[-1]])
+    assert not os.path.exists(tmp_path / f"{data.dates[-1]}.json")
+    asyncio.run(store.get_latest())
+    assert service.calls == 2
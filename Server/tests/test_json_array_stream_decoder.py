@@ -0,0 +1,44 @@
+import pytest
+from features.sentiment.cot.connections.api.client.json_array_stream_decoder import JSONArrayStreamDecoder
+
+
+def decode(chunks: list[bytes]) -> list:
+    decoder: JSONArrayStreamDecoder = JSONArrayStreamDecoder()
+    elements: list = []
+    for chunk in chunks:
+        elements.extend(decoder.feed(chunk))
+    decoder.close()
+    return elements
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b"[1.", b"5]"], [1.5]),
+    ([b"[1e", b"3]"], [1000.0]),
+    ([b"[1.5E", b"-", b"2, 2]"], [0.015, 2]),
+    ([b"[-", b"12 ", b", 3]"], [-12, 3]),
+    ([b"[1", b"2", b"]"], [12]),
+    ([b"[tr", b"ue, nu", b"ll]"], [True, None]),
+])
+def test_number_split_across_chunks(chunks, expected):
+    assert decode(chunks) == expected
+
+
+def test_every_split_point():
+    data: bytes = b'[{"a": 1}, 2.5e1, "x", [3, 4], -0.25, true]'
+    for split in range(1, len(data)):
+        assert decode([data[:split], data[split:]]) == [{"a": 1}, 25.0, "x", [3, 4], -0.25, True]
+
+
+def test_empty_array():
+    assert decode([b" [ ", b" ] "]) == []
+
+
+@pytest.mark.parametrize("chunks", [[b"[1,]"], [b"[1,", b" ]"], [b"[1.x]"], [b"[1 2]"]])
+def test_invalid_array(chunks):
+    with pytest.raises(ValueError):
+        decode(chunks)
+
+
+def test_incomplete_array():
+    with pytest.raises(ValueError):
+        decode([b"[1, 2"])
@@ -0,0 +1,54 @@
+import asyncio
+import pytest
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.pair_reading_matrix import PairReadingCache, PairReadingMatrix
+from features.sentiment.cot.tools.sentiment_classifier import SentimentClassifier
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from shared.models.currency_pair import CurrencyPair
+from shared.models.reported_assets import ReportedAssets
+from shared.models.reported_pairs import ReportedPairs
+from latest_release_service import LatestReleaseService
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=3, n_weeks=1)
+
+
+@pytest.fixture
+def classifier() -> SentimentClassifier:
+    return SentimentClassifier(SentimentThresholds(default=5, by_asset_class={}, by_asset={}))
+
+
+def test_relative_cot_index_is_none_without_a_cot_index(data, classifier):
+    cot_reports: list[COTReport] = data.to_reports()
+    for report, cot_index in zip(cot_reports, [80, 30, None]):
+        report.commercials.cot_index = cot_index
+    matrix: PairReadingMatrix = PairReadingMatrix(cot_reports, data.dates[-1], classifier)
+
+    assert matrix.pair_to_dict(ReportedPairs.by_code["AUD/CAD"])["relative_cot_index"] == 50
+    assert matrix.pair_to_dict(ReportedPairs.by_code["AUD/CHF"])["relative_cot_index"] is None
+    assert matrix.pair_to_dict(ReportedPairs.by_code["CAD/CHF"])["relative_cot_index"] is None
+    assert "RELATIVE COT INDEX: N/A" in matrix.describe(ReportedPairs.by_code["CAD/CHF"])
+
+
+def test_matrix_missing_assets_is_not_kept(data, classifier):
+    cot_reports: list[COTReport] = data.to_reports()
+    service: LatestReleaseService = LatestReleaseService(cot_reports[:2], data.dates[-1])
+    cache: PairReadingCache = PairReadingCache(service, data.assets, classifier)
+    asyncio.run(cache.get())
+    asyncio.run(cache.get())
+    assert service.calls == 2
+
+    service.cot_reports = cot_reports
+    asyncio.run(cache.get())
+    matrix: PairReadingMatrix = asyncio.run(cache.get())
+    assert service.calls == 3
+    assert matrix.asset_codes == [asset.code for asset in data.assets]
+
+
+def test_pair_name_defaults_to_the_names_of_its_assets():
+    euro, dollar = ReportedAssets.by_code["EUR"], ReportedAssets.by_code["USD"]
+    assert ReportedPairs.by_code["EUR/USD"].name == f"{euro.name}/{dollar.name}"
+    assert CurrencyPair(euro, dollar, name="Fiber").name == "Fiber"
@@ -0,0 +1,42 @@
+import asyncio
+import pytest
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from features.sentiment.cot.core.models.cot_report import COTReport
+from features.sentiment.cot.tools.cot_report_presenter import COTReportPresenter
+from features.sentiment.cot.tools.sentiment_classifier import SentimentClassifier
+from features.sentiment.cot.tools.sentiment_thresholds import SentimentThresholds
+from shared.enums.reading import Reading
+from in_memory_cot_repository import InMemoryCOTRepository
+
+
+@pytest.fixture
+def data() -> SyntheticCOTData:
+    return SyntheticCOTData(n_assets=3, n_weeks=20)
+
+
+def test_stored_history_is_reclassified_with_new_thresholds(data):
+    repository: InMemoryCOTRepository = InMemoryCOTRepository()
+    cot_reports: list[COTReport] = data.to_reports()
+    asyncio.run(repository.insert_cot_reports(cot_reports))
+    stored_rows: dict[tuple[str, str], tuple] = dict(repository.rows)
+    classifier: SentimentClassifier = SentimentClassifier(SentimentThresholds(default=1, by_asset_class={}))
+
+    readings: dict[str, dict[str, Reading]] = asyncio.run(classifier.reclassify_history(
+        repository, [asset.code for asset in data.assets], data.dates[0], data.dates[-1]
+    ))
+
+    assert sum(map(len, readings.values())) == len(cot_reports)
+    for report in cot_reports:
+        assert readings[report.asset_code][report.reported_date] == report.noncommercials.get_sentiment(1)
+    assert repository.rows == stored_rows
+
+
+def test_presenter_builds_reports_with_the_configured_thresholds(data, monkeypatch):
+    asset_code: str = data.assets[0].code
+    thresholds: SentimentThresholds = SentimentThresholds(default=5, by_asset={asset_code: 100})
+    monkeypatch.setattr(SentimentThresholds, "_configured", thresholds)
+
+    for report in COTReportPresenter.from_list(data.to_rows()):
+        assert report.sentiment_threshold == thresholds.for_asset(report.asset_code)
+        if report.asset_code == asset_code:
+            assert report.to_dict()["noncommercials"]["sentiment"] == Reading.neutral.name
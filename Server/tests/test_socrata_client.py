@@ -0,0 +1,67 @@
+import asyncio
+import socket
+import aiohttp
+import pytest
+from features.sentiment.cot.connections.api.client.socrata_client import SocrataClient
+from features.sentiment.cot.connections.api.stand_in.socrata_stand_in_server import SocrataStandInServer
+from features.sentiment.cot.connections.api.stand_in.synthetic_cot_data import SyntheticCOTData
+from shared.utils.settings import Settings
+
+
+def stand_in(**kwargs) -> SocrataStandInServer:
+    return SocrataStandInServer(SyntheticCOTData(n_assets=2, n_weeks=3).to_records(), **kwargs)
+
+
+def test_only_the_local_stand_in_needs_no_app_token(monkeypatch):
+    monkeypatch.setattr(Settings, "_instance", Settings())
+    SocrataClient(base_url="http://127.0.0.1:8090/resource/6dca-aqww.json")
+    with pytest.raises(ValueError):
+        SocrataClient(base_url="https://publicreporting.cftc.gov/resource/6dca-aqww.json")
+
+
+def test_limits_are_not_shared_across_event_loops():
+    client: SocrataClient = SocrataClient(base_url="http://127.0.0.1:1/", app_token="test-token", max_concurrency=1)
+
+    async def run() -> list[list[dict]]:
+        async with stand_in() as server:
+            client.base_url = server.url
+            return await asyncio.gather(*(client.fetch_latest_report({"$limit": 1}) for _ in range(3)))
+
+    assert [len(records) for records in asyncio.run(run())] == [1, 1, 1]
+    assert [len(records) for records in asyncio.run(run())] == [1, 1, 1]
+
+
+def test_failed_and_throttled_requests_are_retried():
+    async def run() -> None:
+        async with stand_in(error_rate=0.5, seed=1) as server:
+            client: SocrataClient = SocrataClient(base_url=server.url, app_token="test-token", max_retries=10)
+            client._BASE_BACKOFF = 0.001
+            for _ in range(5):
+                assert len(await client.fetch_latest_report({"$limit": 2})) == 2
+            assert server.errors > 0
+    asyncio.run(run())
+
+
+def test_connection_errors_are_retried():
+    with socket.socket() as unused:
+        unused.bind(("127.0.0.1", 0))
+        port: int = unused.getsockname()[1]
+    client: SocrataClient = SocrataClient(base_url=f"http://127.0.0.1:{port}/", app_token="test-token", max_retries=2)
+    client._BASE_BACKOFF = 0.001
+    errors: float = client._REQUESTS.get(status="error")
+    with pytest.raises(aiohttp.ClientConnectionError):
+        asyncio.run(client.fetch_latest_report({}))
+    assert client._REQUESTS.get(status="error") - errors == 3
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3.0), ("-1", 0.0), ("soon", None), (None, None)])
+def test_parse_retry_after(value, expected):
+    assert SocrataClient._parse_retry_after(value) == expected
+
+
+def test_retry_after_is_capped():
+    class Response:
+        headers: dict[str, str] = {"Retry-After": "86400"}
+
+    client: SocrataClient = SocrataClient(base_url="http://127.0.0.1:1/", app_token="test-token")
+    assert client._calculate_retry_delay(Response(), 0) <= client._MAX_RETRY_AFTER + client._BASE_BACKOFF
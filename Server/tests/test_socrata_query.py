@@ -0,0 +1,37 @@
+import pytest
+from features.sentiment.cot.connections.api.stand_in.socrata_stand_in_server import SocrataQuery
+
+
+RECORDS: list[dict[str, str]] = [
+    {"code": "001", "open_interest_all": "9"},
+    {"code": "002", "open_interest_all": "10"},
+    {"code": "003", "open_interest_all": "100"},
+    {"code": "004", "open_interest_all": "n/a"},
+]
+
+
+def codes(params: dict[str, str]) -> list[str]:
+    return [record["code"] for record in SocrataQuery(params).apply(RECORDS)]
+
+
+@pytest.mark.parametrize("where, expected", [
+    ("open_interest_all > 9", ["002", "003"]),
+    ("open_interest_all >= 10 AND open_interest_all < 100", ["002"]),
+    ("open_interest_all = 10.0", ["002"]),
+    ("open_interest_all IN (9, 100)", ["001", "003"]),
+    ("open_interest_all != 9", ["002", "003"]),
+    ("code = '002'", ["002"]),
+    ("code IN ('001', '004')", ["001", "004"]),
+])
+def test_where_compares_numeric_columns_as_numbers(where, expected):
+    assert codes({"$where": where}) == expected
+
+
+def test_order_sorts_numeric_columns_as_numbers():
+    assert codes({"$order": "open_interest_all"}) == ["001", "002", "003", "004"]
+    assert codes({"$order": "open_interest_all DESC"}) == ["004", "003", "002", "001"]
+
+
+def test_unsupported_where_clause():
+    with pytest.raises(ValueError):
+        SocrataQuery({"$where": "open_interest_all LIKE 9"})